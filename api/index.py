@@ -2,25 +2,28 @@
 Vercel serverless function entry point for the transcript formatter.
 """
 
+import gzip
 import os
-import io
+import sys
+import time
+import zlib
+from importlib.util import find_spec
 from http.server import BaseHTTPRequestHandler
 import json
-import anthropic
-from docx import Document
-from docx.shared import Pt
-import cgi
-import re
 
-class handler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        """Handle GET requests."""
-        if self.path == '/' or self.path == '':
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/html; charset=utf-8')
-            self.end_headers()
-            
-            html_content = '''<!DOCTYPE html>
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from transcript_formatter.core.extractor import extract_text
+from transcript_formatter.web.jobs import JobStore
+from transcript_formatter.web.multipart import MultipartError, parse_multipart
+from transcript_formatter.web.serverless import (
+    DOCX_CONTENT_TYPE, advance_job, docx_filename, job_docx, make_formatter, start_job,
+)
+
+JOB_STORE = JobStore()
+
+# The upload page is static: encode, compress and fingerprint it once per
+# instance instead of on every GET
+INDEX_HTML = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -518,16 +521,31 @@ class handler(BaseHTTPRequestHandler):
                 updateProgress(progress, 'Processing transcript...');
             }, 500);
 
-            fetch('/api/upload', {
-                method: 'POST',
-                body: formData
-            })
-            .then(response => {
+            // Long transcripts come back as 202 with a job to poll until the DOCX is ready
+            function receive(response) {
+                if (response.status === 202) {
+                    clearInterval(progressInterval);
+                    return response.json().then(job => {
+                        updateProgress(Math.min(90, 100 * job.completed_chunks / job.total_chunks),
+                            'Formatted ' + job.completed_chunks + ' of ' + job.total_chunks + ' sections...');
+                        return new Promise(resolve => setTimeout(resolve, 1000))
+                            .then(() => fetch(job.status_url))
+                            .then(receive);
+                    });
+                }
                 if (!response.ok) {
-                    throw new Error('Processing failed');
+                    return response.json().catch(() => ({})).then(data => {
+                        throw new Error(data.error || 'Processing failed');
+                    });
                 }
                 return response.blob();
+            }
+
+            fetch('/api/upload', {
+                method: 'POST',
+                body: formData
             })
+            .then(receive)
             .then(blob => {
                 clearInterval(progressInterval);
                 updateProgress(100, 'Complete!');
@@ -579,77 +597,162 @@ class handler(BaseHTTPRequestHandler):
         }
     </script>
 </body>
-</html>'''
-            
-            self.wfile.write(html_content.encode('utf-8'))
+</html>""".encode('utf-8')
+INDEX_HTML_GZIP = gzip.compress(INDEX_HTML, compresslevel=9)
+INDEX_ETAG = f'"{zlib.crc32(INDEX_HTML):08x}"'
+# Browsers revalidate after five minutes; the CDN keeps it until the next deploy
+INDEX_CACHE_CONTROL = 'public, max-age=300, s-maxage=86400'
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows a gzip response."""
+    for coding in (accept_encoding or '').lower().split(','):
+        name, _, params = coding.partition(';')
+        if name.strip() in ('gzip', '*'):
+            return params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def etag_matches(if_none_match):
+    """Whether an If-None-Match header names the upload page's current ETag."""
+    tags = [tag.strip() for tag in (if_none_match or '').split(',')]
+    return '*' in tags or INDEX_ETAG in tags or f'W/{INDEX_ETAG}' in tags
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        """Handle GET requests."""
+        started = time.monotonic()
+        if self.path == '/' or self.path == '':
+            self._send_index()
             
         elif self.path == '/health':
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
             self.end_headers()
             
-            try:
-                # Test imports
-                import anthropic
-                from docx import Document
+            # Check the dependencies are installed without paying to import them
+            missing = [name for name in ('anthropic', 'docx') if find_spec(name) is None]
+            if missing:
+                response = {'status': 'unhealthy', 'error': f"No module named {', '.join(missing)}"}
+            else:
                 response = {'status': 'healthy', 'service': 'transcript-formatter'}
-            except ImportError as e:
-                response = {'status': 'unhealthy', 'error': str(e)}
             
             self.wfile.write(json.dumps(response).encode())
             
+        elif self.path.startswith('/api/jobs/'):
+            self._resume_job(self.path[len('/api/jobs/'):], started)
+            
         else:
             self.send_response(404)
             self.end_headers()
             self.wfile.write(b'Not found')
     
+    def _resume_job(self, job_id, started):
+        """Advance a stored job within this invocation's budget."""
+        try:
+            job = JOB_STORE.load(job_id)
+        except KeyError:
+            self._send_json(404, {'success': False, 'error': 'Job not found or expired; please upload again'})
+            return
+        
+        api_key = os.environ.get('ANTHROPIC_API_KEY')
+        if not api_key:
+            self.send_error(500, 'API key not configured')
+            return
+        
+        try:
+            advance_job(job, make_formatter(api_key), started)
+            self._send_job(job)
+        except Exception as e:
+            self.send_error(500, str(e))
+    
+    def _send_job(self, job):
+        """Send the DOCX if the job is done, otherwise save it and send 202 progress."""
+        if job.complete:
+            docx_data = job_docx(job)
+            JOB_STORE.delete(job.id)
+            self.send_response(200)
+            self.send_header('Content-Type', DOCX_CONTENT_TYPE)
+            self.send_header('Content-Disposition', f'attachment; filename="{docx_filename(job.filename)}"')
+            self.send_header('Content-Length', str(len(docx_data)))
+            self.end_headers()
+            self.wfile.write(docx_data)
+        elif job.failed or (job.completed == 0 and job.errors):
+            # A chunk keeps failing, or nothing succeeded: report the API error instead of looping
+            JOB_STORE.delete(job.id)
+            self._send_json(502, {'success': False, 'error': job.errors[-1]})
+        else:
+            JOB_STORE.save(job)
+            self._send_json(202, dict(job.status(), success=True))
+    
+    def _send_index(self):
+        """Send the upload page, gzipped when the client accepts it."""
+        if etag_matches(self.headers.get('If-None-Match')):
+            self.send_response(304)
+            self.send_header('ETag', INDEX_ETAG)
+            self.send_header('Cache-Control', INDEX_CACHE_CONTROL)
+            self.end_headers()
+            return
+        
+        body = INDEX_HTML
+        gzipped = accepts_gzip(self.headers.get('Accept-Encoding'))
+        if gzipped:
+            body = INDEX_HTML_GZIP
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', INDEX_ETAG)
+        self.send_header('Cache-Control', INDEX_CACHE_CONTROL)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
     def do_POST(self):
         """Handle POST requests."""
+        started = time.monotonic()
         if self.path == '/api/upload':
             try:
-                # Parse the form data
-                content_type = self.headers['content-type']
-                if not content_type or 'multipart/form-data' not in content_type:
-                    self.send_error(400, 'Invalid content type')
+                # Stream the multipart body; the size limit is enforced while reading
+                content_length = self.headers.get('Content-Length')
+                try:
+                    fields, files = parse_multipart(
+                        self.rfile,
+                        self.headers.get('content-type', ''),
+                        int(content_length) if content_length else None,
+                    )
+                except MultipartError as e:
+                    self.send_error(e.status, str(e))
                     return
                 
-                # Get boundary
-                ctype, pdict = cgi.parse_header(content_type)
-                pdict['boundary'] = pdict['boundary'].encode()
-                
-                # Parse multipart form data
-                content_length = int(self.headers['Content-Length'])
-                form = cgi.FieldStorage(
-                    fp=self.rfile,
-                    headers=self.headers,
-                    environ={'REQUEST_METHOD': 'POST'}
-                )
-                
                 # Get the file
-                if 'file' not in form:
+                upload = files.get('file')
+                if upload is None:
                     self.send_error(400, 'No file uploaded')
                     return
                 
-                file_item = form['file']
-                if not file_item.filename:
-                    self.send_error(400, 'No file selected')
-                    return
-                
-                # Check file extension
-                filename = file_item.filename
-                if not (filename.endswith('.txt') or filename.endswith('.docx')):
-                    self.send_error(400, 'Invalid file type')
-                    return
-                
-                # Read file content
-                file_content = file_item.file.read()
-                
-                # Extract text based on file type
-                if filename.endswith('.docx'):
-                    doc = Document(io.BytesIO(file_content))
-                    content = '\n'.join([p.text for p in doc.paragraphs])
-                else:
-                    content = file_content.decode('utf-8')
+                with upload.stream:
+                    filename = upload.filename
+                    if not filename:
+                        self.send_error(400, 'No file selected')
+                        return
+                    
+                    # Check file extension
+                    if not (filename.endswith('.txt') or filename.endswith('.docx')):
+                        self.send_error(400, 'Invalid file type')
+                        return
+                    
+                    # Extract text based on file type, straight from the spooled upload
+                    content = extract_text(upload.stream, filename)
                 
                 # Format with Claude
                 api_key = os.environ.get('ANTHROPIC_API_KEY')
@@ -657,65 +760,14 @@ class handler(BaseHTTPRequestHandler):
                     self.send_error(500, 'API key not configured')
                     return
                 
-                client = anthropic.Anthropic(api_key=api_key)
-                
-                prompt = """You are a professional transcript editor. Transform this raw transcript into a well-formatted, readable document.
-
-Please follow these guidelines:
-1. Create clear paragraph breaks for better readability
-2. Add proper punctuation and capitalization
-3. Identify and format speaker names (if present) consistently
-4. Remove filler words and false starts while preserving meaning
-5. Organize the content into logical sections
-6. Clean up any formatting issues or artifacts
-
-Raw Transcript:
-{transcript}
-
-Return the formatted transcript ready for a professional document."""
-                
-                response = client.messages.create(
-                    model="claude-3-haiku-20240307",
-                    max_tokens=4000,
-                    temperature=0.3,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": prompt.format(transcript=content[:10000])
-                        }
-                    ]
-                )
-                formatted_text = response.content[0].text
-                
-                # Create Word document
-                doc = Document()
-                doc.add_heading('Formatted Transcript', 0)
-                
-                # Process formatted text
-                paragraphs = formatted_text.split('\n\n')
-                for para_text in paragraphs:
-                    if para_text.strip():
-                        if ':' in para_text and len(para_text.split(':')[0]) < 50:
-                            p = doc.add_paragraph()
-                            speaker_parts = para_text.split(':', 1)
-                            speaker_run = p.add_run(speaker_parts[0] + ':')
-                            speaker_run.bold = True
-                            if len(speaker_parts) > 1:
-                                p.add_run(' ' + speaker_parts[1].strip())
-                        else:
-                            doc.add_paragraph(para_text.strip())
-                
-                # Save to bytes
-                docx_buffer = io.BytesIO()
-                doc.save(docx_buffer)
-                docx_buffer.seek(0)
-                
-                # Send response
-                self.send_response(200)
-                self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
-                self.send_header('Content-Disposition', 'attachment; filename=formatted_transcript.docx')
-                self.end_headers()
-                self.wfile.write(docx_buffer.getvalue())
+                # Format the full transcript in chunks; hand off what doesn't fit the budget
+                formatter = make_formatter(api_key)
+                job = start_job(content, filename, formatter)
+                if not job.chunks:
+                    self.send_error(400, 'File is empty')
+                    return
+                advance_job(job, formatter, started)
+                self._send_job(job)
                 
             except Exception as e:
                 self.send_error(500, str(e))
@@ -5,10 +5,18 @@ Upload handler for Vercel - working file upload processor.
 from http.server import BaseHTTPRequestHandler
 import json
 import os
-import io
-import cgi
-import anthropic
-from docx import Document
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from transcript_formatter.core.extractor import extract_text
+from transcript_formatter.web.jobs import JobStore
+from transcript_formatter.web.multipart import MultipartError, parse_multipart
+from transcript_formatter.web.serverless import (
+    DOCX_CONTENT_TYPE, advance_job, docx_filename, job_docx, make_formatter, start_job,
+)
+
+JOB_STORE = JobStore()
 
 class handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
@@ -19,60 +27,41 @@ class handler(BaseHTTPRequestHandler):
         self.end_headers()
     
     def do_POST(self):
+        started = time.monotonic()
         try:
-            # Get content type and length
-            content_type = self.headers.get('content-type', '')
-            content_length = int(self.headers.get('content-length', 0))
-            
-            if content_length == 0:
-                self.send_error(400, 'No data received')
+            # Stream the multipart body; the size limit is enforced while reading
+            content_length = self.headers.get('content-length')
+            try:
+                fields, files = parse_multipart(
+                    self.rfile,
+                    self.headers.get('content-type', ''),
+                    int(content_length) if content_length else None,
+                )
+            except MultipartError as e:
+                self.send_error(e.status, str(e))
                 return
             
-            # Use cgi.FieldStorage for proper multipart parsing
-            environ = {
-                'REQUEST_METHOD': 'POST',
-                'CONTENT_TYPE': content_type,
-                'CONTENT_LENGTH': str(content_length),
-            }
-            
-            # Parse the multipart form data
-            form = cgi.FieldStorage(
-                fp=self.rfile,
-                headers=self.headers,
-                environ=environ
-            )
-            
             # Get the uploaded file
-            if 'file' not in form:
+            file_item = files.get('file')
+            if file_item is None:
                 self.send_error(400, 'No file field found')
                 return
             
-            file_item = form['file']
-            if not hasattr(file_item, 'filename') or not file_item.filename:
-                self.send_error(400, 'No file uploaded')
-                return
-            
-            filename = file_item.filename
-            if not (filename.lower().endswith('.txt') or filename.lower().endswith('.docx')):
-                self.send_error(400, 'Only .txt and .docx files supported')
-                return
-            
-            # Read file content
-            file_content = file_item.file.read()
-            
-            # Extract text
-            if filename.lower().endswith('.docx'):
-                try:
-                    doc = Document(io.BytesIO(file_content))
-                    text_content = '\\n'.join([p.text for p in doc.paragraphs if p.text.strip()])
-                except Exception as e:
-                    self.send_error(400, f'Error reading Word document: {str(e)}')
+            with file_item.stream:
+                if not file_item.filename:
+                    self.send_error(400, 'No file uploaded')
+                    return
+                
+                filename = file_item.filename
+                if not (filename.lower().endswith('.txt') or filename.lower().endswith('.docx')):
+                    self.send_error(400, 'Only .txt and .docx files supported')
                     return
-            else:
+                
+                # Extract text straight from the spooled upload
                 try:
-                    text_content = file_content.decode('utf-8', errors='ignore')
-                except Exception as e:
-                    self.send_error(400, f'Error reading text file: {str(e)}')
+                    text_content = extract_text(file_item.stream, filename)
+                except ValueError as e:
+                    self.send_error(400, f'Error reading Word document: {str(e)}')
                     return
             
             if not text_content.strip():
@@ -85,69 +74,39 @@ class handler(BaseHTTPRequestHandler):
                 self.send_error(500, 'API key not configured')
                 return
             
+            # Format the full transcript in chunks within the time budget
             try:
-                client = anthropic.Anthropic(api_key=api_key)
-                
-                prompt = f\"\"\"You are a professional transcript editor. Transform this raw transcript into a well-formatted, readable document.
-
-Please follow these guidelines:
-1. Create clear paragraph breaks for better readability
-2. Add proper punctuation and capitalization
-3. Identify and format speaker names (if present) consistently
-4. Remove filler words and false starts while preserving meaning
-5. Organize the content into logical sections
-6. Clean up any formatting issues or artifacts
-
-Raw Transcript:
-{text_content[:8000]}
-
-Return the formatted transcript ready for a professional document.\"\"\"
-                
-                response = client.messages.create(
-                    model="claude-3-haiku-20240307",
-                    max_tokens=4000,
-                    temperature=0.3,
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                
-                formatted_text = response.content[0].text
-                
+                formatter = make_formatter(api_key)
+                job = start_job(text_content, filename, formatter)
+                advance_job(job, formatter, started)
             except Exception as e:
                 self.send_error(500, f'AI processing failed: {str(e)}')
                 return
             
+            if job.failed or (job.completed == 0 and job.errors):
+                self.send_error(500, f'AI processing failed: {job.errors[-1]}')
+                return
+            
+            if not job.complete:
+                # Out of time: save the job; GET /api/jobs/<id> resumes it
+                JOB_STORE.save(job)
+                body = json.dumps(dict(job.status(), success=True)).encode()
+                self.send_response(202)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            
             # Create Word document
             try:
-                doc = Document()
-                doc.add_heading('Formatted Transcript', 0)
-                
-                # Add formatted content
-                paragraphs = formatted_text.split('\\n\\n')
-                for para_text in paragraphs:
-                    if para_text.strip():
-                        # Check for speaker format
-                        if ':' in para_text and len(para_text.split(':')[0]) < 50:
-                            # Speaker line
-                            p = doc.add_paragraph()
-                            speaker_parts = para_text.split(':', 1)
-                            speaker_run = p.add_run(speaker_parts[0] + ':')
-                            speaker_run.bold = True
-                            if len(speaker_parts) > 1:
-                                p.add_run(' ' + speaker_parts[1].strip())
-                        else:
-                            # Regular paragraph
-                            doc.add_paragraph(para_text.strip())
-                
-                # Save to buffer
-                docx_buffer = io.BytesIO()
-                doc.save(docx_buffer)
-                docx_buffer.seek(0)
-                docx_data = docx_buffer.getvalue()
+                docx_data = job_docx(job)
                 
                 # Send response
                 self.send_response(200)
-                self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document')
-                self.send_header('Content-Disposition', f'attachment; filename="formatted_{filename.replace(".txt", ".docx")}"')
+                self.send_header('Content-Type', DOCX_CONTENT_TYPE)
+                self.send_header('Content-Disposition', f'attachment; filename="{docx_filename(filename)}"')
                 self.send_header('Access-Control-Allow-Origin', '*')
                 self.send_header('Content-Length', str(len(docx_data)))
                 self.end_headers()
@@ -39,7 +39,7 @@ except ImportError:
         Preserve all original content and meaning."""
         
         message = client.messages.create(
-            model="claude-3-5-sonnet-20240620",
+            model="claude-sonnet-4-5-20250929",
             max_tokens=8000,
             temperature=0.1,
             system=system_prompt,
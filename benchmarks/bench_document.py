@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Benchmark formatted-text parsing into the shared document model.
+
+Usage:
+    python benchmarks/bench_document.py [files...] [--repeat N]
+
+Defaults to the transcripts in examples/input.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from transcript_formatter.core.document import parse_document
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', type=Path)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    files = args.files or sorted((ROOT / 'examples' / 'input').glob('*.txt'))
+    for path in files:
+        text = path.read_text(encoding='utf-8', errors='replace')
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            document = parse_document(text)
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"{path.name:45} {len(text):>8} chars {len(document):>6} blocks "
+              f"{elapsed * 1000:8.3f} ms/parse")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark .docx text extraction: streaming extractor vs python-docx.
+
+Usage:
+    python benchmarks/bench_docx_extract.py [files...] [--repeat N]
+
+Defaults to the Word documents in examples/input. Also checks that both
+approaches return the same text.
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from docx import Document
+
+from transcript_formatter.core.extractor import extract_docx_text
+
+
+def python_docx_text(path):
+    return '\n'.join(paragraph.text for paragraph in Document(path).paragraphs)
+
+
+def measure(func, path, repeat):
+    """Return (ms per call, peak KiB of a single call, result)."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(path)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    func(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1024, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', type=Path)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    files = args.files or sorted((ROOT / 'examples' / 'input').glob('*.docx'))
+    print(f"{'file':40} {'python-docx':>22} {'streaming':>22} {'speedup':>8}  same")
+    for path in files:
+        old_ms, old_kib, old_text = measure(python_docx_text, path, args.repeat)
+        new_ms, new_kib, new_text = measure(extract_docx_text, path, args.repeat)
+        print(f"{path.name[:40]:40} {old_ms:8.2f} ms {old_kib:8.0f} KiB "
+              f"{new_ms:8.2f} ms {new_kib:8.0f} KiB {old_ms / new_ms:7.1f}x  "
+              f"{'yes' if old_text == new_text else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
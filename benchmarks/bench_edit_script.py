@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Compare full-rewrite and edit-script formatting on real transcripts.
+
+Usage:
+    python benchmarks/bench_edit_script.py [files...] [--repeat N] [--model MODEL]
+
+Defaults to the transcripts in examples/input. Each file is formatted by
+Claude in both modes (ANTHROPIC_API_KEY must be set), and the benchmark
+reports wall time, input and output tokens per run from a throwaway usage
+ledger, plus how many edits the applier had to skip. Edit-script runs whose
+script was rejected fall back to a full rewrite and are flagged.
+
+Results: UNMEASURED. No output-token or latency savings have been recorded
+for edit-script mode yet. The one attempted run (2026-10-18) failed before
+reaching the API, because the installed anthropic SDK's
+``messages.stream()`` rejected the ``temperature`` argument that every
+streaming path passes. Until this benchmark has been run against the API
+and its table recorded here, treat the savings described in
+``core/edit_script.py`` as expected, not measured.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from transcript_formatter.core.extractor import extract_text
+from transcript_formatter.usage import LEDGER_ENV, UsageLedger
+
+
+def run(formatter, text, ledger_path):
+    """Format once; returns seconds, input tokens, output tokens and progress notes."""
+    notes = []
+    with UsageLedger(ledger_path) as ledger:
+        last_id = ledger.conn.execute('SELECT COALESCE(MAX(id), 0) FROM calls').fetchone()[0]
+    started = time.perf_counter()
+    formatter.format_transcript(text, notes.append)
+    elapsed = time.perf_counter() - started
+    with UsageLedger(ledger_path) as ledger:
+        inp, out = ledger.conn.execute(
+            'SELECT SUM(input_tokens + cache_write_tokens + cache_read_tokens), SUM(output_tokens) '
+            'FROM calls WHERE id > ?', (last_id,)).fetchone()
+    return elapsed, inp or 0, out or 0, notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('files', nargs='*', type=Path)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--model', help='Pin a model instead of routing by size')
+    args = parser.parse_args()
+
+    if not os.environ.get('ANTHROPIC_API_KEY'):
+        parser.error('ANTHROPIC_API_KEY is not set; this benchmark calls the API')
+
+    from transcript_formatter.core.claude_formatter import ClaudeFormatter
+
+    files = args.files or sorted(p for p in (ROOT / 'examples' / 'input').iterdir()
+                                 if p.suffix in ('.txt', '.docx'))
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger_path = os.path.join(tmp, 'usage.sqlite3')
+        os.environ[LEDGER_ENV] = ledger_path
+        print(f"{'file':40} {'mode':8} {'seconds':>8} {'in tok':>8} {'out tok':>8}  notes")
+        for path in files:
+            text = extract_text(path)
+            totals = {}
+            for mode in ('rewrite', 'edits'):
+                formatter = ClaudeFormatter(model=args.model, mode=mode)
+                for _ in range(args.repeat):
+                    elapsed, inp, out, notes = run(formatter, text, ledger_path)
+                    flags = [note for note in notes if 'rejected' in note or 'Skipped' in note]
+                    print(f"{path.name[:40]:40} {mode:8} {elapsed:8.1f} {inp:8} {out:8}  {'; '.join(flags)}")
+                    seconds, tokens = totals.get(mode, (0.0, 0))
+                    totals[mode] = (seconds + elapsed, tokens + out)
+            (rewrite_s, rewrite_out), (edits_s, edits_out) = totals['rewrite'], totals['edits']
+            print(f"{'':40} {'ratio':8} {edits_s / rewrite_s:8.2f} {'':8} "
+                  f"{edits_out / max(rewrite_out, 1):8.2f}  edits / rewrite")
+
+
+if __name__ == '__main__':
+    main()
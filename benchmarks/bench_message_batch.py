@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Run a season of transcripts through `batch --message-batch` against a local
+stand-in for the Message Batches API.
+
+Usage:
+    python benchmarks/bench_message_batch.py [--episodes N] [--chars N]
+                                             [--process-seconds S] [--error-every N]
+    python benchmarks/bench_message_batch.py --serve [--port 8765]
+
+The stand-in accepts batches, reports them in progress for --process-seconds,
+then serves a JSONL results file that echoes each transcript back lightly
+formatted. The benchmark writes N episodes, runs the CLI with
+ANTHROPIC_BASE_URL pointing at the stand-in, and reports wall time, HTTP
+requests and peak open connections, then reruns with --resume to check that
+nothing is submitted twice. --serve only runs the stand-in, for manual runs.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+_CUSTOM_ID = re.compile(r'^[a-zA-Z0-9_-]{1,64}$')
+_PROMPT = 'Please format this transcript:\n\n'
+
+
+class StandIn(ThreadingHTTPServer):
+    """In-memory Message Batches endpoint."""
+
+    daemon_threads = True
+
+    def __init__(self, port=0, process_seconds=2.0, error_every=0):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.process_seconds = process_seconds
+        self.error_every = error_every
+        self.batches = {}
+        self.lock = threading.Lock()
+        self.http_requests = 0
+        self.open_connections = 0
+        self.peak_connections = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def batch_json(self, batch):
+        ended = time.time() >= batch['created'] + self.process_seconds
+        total = len(batch['requests'])
+        errored = sum(1 for i in range(total) if self.error_every and (i + 1) % self.error_every == 0)
+        created = datetime.fromtimestamp(batch['created'], timezone.utc)
+        return {
+            'id': batch['id'],
+            'type': 'message_batch',
+            'processing_status': 'ended' if ended else 'in_progress',
+            'request_counts': {
+                'processing': 0 if ended else total,
+                'succeeded': total - errored if ended else 0,
+                'errored': errored if ended else 0,
+                'canceled': 0,
+                'expired': 0,
+            },
+            'created_at': created.isoformat(),
+            'expires_at': (created + timedelta(days=1)).isoformat(),
+            'ended_at': (created + timedelta(seconds=self.process_seconds)).isoformat() if ended else None,
+            'archived_at': None,
+            'cancel_initiated_at': None,
+            'results_url': f"{self.url}/v1/messages/batches/{batch['id']}/results" if ended else None,
+        }
+
+    def results_lines(self, batch):
+        for i, request in enumerate(batch['requests']):
+            if self.error_every and (i + 1) % self.error_every == 0:
+                result = {'type': 'errored', 'error': {'type': 'error', 'error': {
+                    'type': 'overloaded_error', 'message': 'Overloaded'}}}
+            else:
+                prompt = request['params']['messages'][0]['content']
+                text = _fake_format(prompt.split(_PROMPT, 1)[-1])
+                result = {'type': 'succeeded', 'message': {
+                    'id': f"msg_{uuid.uuid4().hex[:24]}", 'type': 'message', 'role': 'assistant',
+                    'model': request['params']['model'],
+                    'content': [{'type': 'text', 'text': text}],
+                    'stop_reason': 'end_turn', 'stop_sequence': None,
+                    'usage': {'input_tokens': len(prompt) // 4, 'output_tokens': len(text) // 4,
+                              'cache_creation_input_tokens': 0, 'cache_read_input_tokens': 0},
+                }}
+            yield json.dumps({'custom_id': request['custom_id'], 'result': result}) + '\n'
+
+
+def _fake_format(raw):
+    """Title from the first line, then one speaker paragraph per remaining line."""
+    lines = [line.strip() for line in raw.splitlines() if line.strip()]
+    if not lines:
+        return ''
+    return '\n\n'.join([lines[0]] + [f"Billy: {line}" for line in lines[1:]])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.open_connections += 1
+            self.server.peak_connections = max(self.server.peak_connections,
+                                               self.server.open_connections)
+
+    def finish(self):
+        super().finish()
+        with self.server.lock:
+            self.server.open_connections -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type='application/json'):
+        data = body.encode() if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        self.server.http_requests += 1
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if self.path.rstrip('/') != '/v1/messages/batches':
+            return self._send(404, json.dumps({'type': 'error', 'error': {'type': 'not_found_error', 'message': self.path}}))
+        requests = body.get('requests') or []
+        ids = [request.get('custom_id', '') for request in requests]
+        if not requests or len(set(ids)) != len(ids) or not all(_CUSTOM_ID.match(i) for i in ids):
+            return self._send(400, json.dumps({'type': 'error', 'error': {
+                'type': 'invalid_request_error', 'message': 'custom_id values must be unique and match [a-zA-Z0-9_-]{1,64}'}}))
+        batch = {'id': f"msgbatch_{uuid.uuid4().hex[:24]}", 'created': time.time(), 'requests': requests}
+        with self.server.lock:
+            self.server.batches[batch['id']] = batch
+        self._send(200, json.dumps(self.server.batch_json(batch)))
+
+    def do_GET(self):
+        self.server.http_requests += 1
+        match = re.match(r'^/v1/messages/batches/([\w-]+)(/results)?$', self.path.split('?')[0])
+        batch = self.server.batches.get(match.group(1)) if match else None
+        if batch is None:
+            return self._send(404, json.dumps({'type': 'error', 'error': {'type': 'not_found_error', 'message': self.path}}))
+        if match.group(2):
+            return self._send(200, ''.join(self.server.results_lines(batch)), 'application/binary')
+        self._send(200, json.dumps(self.server.batch_json(batch)))
+
+
+def write_episodes(directory, count, chars):
+    paragraph = "and so we press on in faith, trusting the word of God in every season of life. "
+    for i in range(count):
+        body = '\n'.join(paragraph * max(1, chars // len(paragraph) // 20) for _ in range(20))
+        (directory / f"episode_{i + 1:03d}.txt").write_text(f"Episode {i + 1}\n{body}\n", encoding='utf-8')
+
+
+def run_cli(args):
+    from click.testing import CliRunner
+    from transcript_formatter.cli import cli
+
+    started = time.perf_counter()
+    result = CliRunner().invoke(cli, args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--episodes', type=int, default=300)
+    parser.add_argument('--chars', type=int, default=30000, help='Characters per transcript')
+    parser.add_argument('--process-seconds', type=float, default=3.0,
+                        help='How long the stand-in reports a batch in progress')
+    parser.add_argument('--error-every', type=int, default=0,
+                        help='Make every Nth request in a batch fail')
+    parser.add_argument('--serve', action='store_true', help='Only run the stand-in')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = StandIn(args.port if args.serve else 0, args.process_seconds, args.error_every)
+    if args.serve:
+        print(f"Message Batches stand-in on {server.url}; set ANTHROPIC_BASE_URL={server.url}")
+        server.serve_forever()
+        return
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ.update(ANTHROPIC_BASE_URL=server.url, ANTHROPIC_API_KEY='stand-in',
+                      TRANSCRIPT_USAGE_LEDGER='off')
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs, outputs = Path(tmp) / 'season', Path(tmp) / 'formatted'
+        inputs.mkdir()
+        write_episodes(inputs, args.episodes, args.chars)
+        base = ['batch', str(inputs), '-o', str(outputs), '--message-batch',
+                '--poll-interval', '1', '-j', '4']
+
+        result, elapsed = run_cli(base)
+        exported = len(list(outputs.glob('*.docx')))
+        print(f"{args.episodes} episodes: {exported} exported in {elapsed:.1f}s "
+              f"(exit {result.exit_code}); {len(server.batches)} batch(es), "
+              f"{server.http_requests} HTTP requests, peak {server.peak_connections} open connections")
+        if result.exit_code not in (0, 1) or result.exception and not isinstance(result.exception, SystemExit):
+            print(result.output[-2000:])
+            raise SystemExit(1)
+
+        requests_before = server.http_requests
+        result, elapsed = run_cli(base + ['--resume'])
+        print(f"--resume: {result.output.strip().splitlines()[-1 if result.exit_code == 0 else -2]} "
+              f"({server.http_requests - requests_before} HTTP requests, "
+              f"{len(server.batches)} batch(es) in total)")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold-start import time of the serverless and CLI entry points.
+
+Each target is imported in a fresh interpreter, as on a cold start. The
+report shows the median wall time and the slowest imports from
+``python -X importtime`` (cumulative microseconds, top-level packages only
+unless --all is given).
+
+Usage:
+    python benchmarks/bench_startup.py [targets...] [--repeat N] [--top N] [--all]
+
+Targets are file paths (api/index.py) or module names (transcript_formatter.cli);
+defaults to the Vercel handlers in api/.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_TARGETS = ['api/index.py', 'api/upload.py']
+
+LOAD_FILE = (
+    "import importlib.util as u; s = u.spec_from_file_location('target', {path!r}); "
+    "s.loader.exec_module(u.module_from_spec(s))"
+)
+
+
+def import_code(target):
+    """Python source that imports a target file or module."""
+    if target.endswith('.py'):
+        return LOAD_FILE.format(path=str(ROOT / target))
+    return f"import {target}"
+
+
+def run(target, importtime=False):
+    """Import a target in a fresh interpreter; return (seconds, stderr)."""
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', import_code(target)]
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode:
+        raise RuntimeError(f"{target} failed to import:\n{result.stderr}")
+    return elapsed, result.stderr
+
+
+def parse_importtime(stderr, depth=0):
+    """Parse -X importtime output into (cumulative_us, module) pairs."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # importtime indents each nesting level by two spaces after one leading space
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        if level <= depth:
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)
+
+
+def time_command(argv, repeat):
+    """Median wall time of running a command in a fresh interpreter."""
+    command = [sys.executable, '-c', 'from transcript_formatter.cli import cli; cli()'] + argv
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+        times.append(time.perf_counter() - start)
+        if result.returncode:
+            raise RuntimeError(f"{' '.join(argv)} failed:\n{result.stderr}")
+    return statistics.median(times)
+
+
+def bench_cli(repeat, baseline):
+    """Time the CLI commands that scripts call in a loop."""
+    examples = ROOT / 'examples' / 'output'
+    commands = [['--help'], ['format', '--help'], ['display', '--help']]
+    sample = next(iter(sorted(examples.glob('*.docx'))), None)
+    if sample is not None:
+        commands.append(['display', str(sample.relative_to(ROOT))])
+    for argv in commands:
+        median = time_command(argv, repeat)
+        label = 'transcript-format ' + ' '.join(argv)
+        print(f"{label[:60]:60} {median * 1000:8.1f} ms (+{(median - baseline) * 1000:.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('targets', nargs='*')
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--depth', type=int, help='Import nesting levels to report')
+    parser.add_argument('--cli', action='store_true', help='Time transcript-format commands')
+    args = parser.parse_args()
+
+    baseline = statistics.median(run('sys')[0] for _ in range(args.repeat))
+    print(f"{'interpreter startup':45} {baseline * 1000:8.1f} ms")
+
+    if args.cli:
+        bench_cli(args.repeat, baseline)
+        return
+
+    for target in args.targets or DEFAULT_TARGETS:
+        times = [run(target)[0] for _ in range(args.repeat)]
+        median = statistics.median(times)
+        print(f"\n{target:45} {median * 1000:8.1f} ms "
+              f"(+{(median - baseline) * 1000:.1f} ms over startup, median of {args.repeat})")
+        # A file target's imports are at level 0; a module's are nested under it
+        depth = args.depth if args.depth is not None else int(not target.endswith('.py'))
+        imports = parse_importtime(run(target, importtime=True)[1], depth)
+        for cumulative, name in imports[:args.top]:
+            print(f"    {name:41} {cumulative / 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def no_usage_ledger(monkeypatch):
+    """Keep tests from writing usage_ledger.sqlite3 into the working directory."""
+    monkeypatch.setenv('TRANSCRIPT_USAGE_LEDGER', 'off')
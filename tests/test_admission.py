@@ -0,0 +1,148 @@
+import importlib
+
+import pytest
+
+from transcript_formatter.web import admission as admission_module
+from transcript_formatter.web.admission import (
+    DEFAULT_BYTES_PER_SECOND, MAX_RETRY_AFTER, MIN_RETRY_AFTER, AdmissionController, Rejected,
+    estimated_tokens,
+)
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission_module.time, 'monotonic', clock)
+    return clock
+
+
+def test_idle_controller_admits_any_size(clock):
+    controller = AdmissionController(max_jobs=1, max_bytes=100, max_tokens=10)
+    with controller.admit(10_000) as ticket:
+        assert controller.stats()['in_flight'] == 1
+    assert ticket.released
+
+
+def test_rejects_when_full_with_retry_after_from_throughput(clock):
+    controller = AdmissionController(max_jobs=1, max_bytes=0, max_tokens=0)
+    # 2800 bytes at 280 bytes/s: due to finish 10s after it started
+    controller.admit(2800)
+    clock.now += 4
+    with pytest.raises(Rejected) as excinfo:
+        controller.admit(100)
+    assert excinfo.value.retry_after == 6
+    assert '1 jobs in progress' in str(excinfo.value)
+
+
+@pytest.mark.parametrize('running_size, elapsed, expected', [
+    (280, 30, MIN_RETRY_AFTER),          # overdue: retry soon, not at once
+    (10 ** 9, 0, MAX_RETRY_AFTER),       # far off: capped
+])
+def test_retry_after_is_bounded(clock, running_size, elapsed, expected):
+    controller = AdmissionController(max_jobs=1, max_bytes=0, max_tokens=0)
+    controller.admit(running_size)
+    clock.now += elapsed
+    with pytest.raises(Rejected) as excinfo:
+        controller.check(100)
+    assert excinfo.value.retry_after == expected
+
+
+def test_check_reserves_nothing(clock):
+    controller = AdmissionController(max_jobs=2, max_bytes=0, max_tokens=0)
+    controller.admit(100)
+    controller.check(100)
+    controller.check(100)
+    assert controller.stats()['in_flight'] == 1
+
+
+def test_byte_and_token_limits(clock):
+    controller = AdmissionController(max_jobs=0, max_bytes=1000, max_tokens=0)
+    controller.admit(800)
+    with pytest.raises(Rejected, match='transcript text'):
+        controller.admit(300)
+    controller.admit(200)
+
+    controller = AdmissionController(max_jobs=0, max_bytes=0, max_tokens=estimated_tokens(1000))
+    controller.admit(800)
+    with pytest.raises(Rejected, match='token budget'):
+        controller.admit(300)
+
+
+def test_ticket_is_released_when_the_job_fails(clock):
+    controller = AdmissionController(max_jobs=1, max_bytes=0, max_tokens=0)
+    with pytest.raises(RuntimeError):
+        with controller.admit(5000):
+            clock.now += 1
+            raise RuntimeError('formatting failed')
+    stats = controller.stats()
+    assert (stats['in_flight'], stats['queued_bytes'], stats['estimated_tokens']) == (0, 0, 0)
+    assert stats['completed'] == 1
+    # A failed job's duration is not a throughput measurement
+    assert controller.bytes_per_second == DEFAULT_BYTES_PER_SECOND
+    # The slot is free again
+    controller.admit(100)
+
+
+def test_completed_job_updates_throughput(clock):
+    controller = AdmissionController()
+    with controller.admit(28_000):
+        clock.now += 10
+    # Moving average towards 2800 bytes/s
+    assert controller.bytes_per_second == pytest.approx(DEFAULT_BYTES_PER_SECOND + 0.2 * (2800 - 280))
+
+
+def test_release_is_idempotent(clock):
+    controller = AdmissionController()
+    ticket = controller.admit(100)
+    ticket.release()
+    ticket.release()
+    assert controller.stats()['completed'] == 1
+
+
+def test_stats_report_load_and_rejections(clock):
+    controller = AdmissionController(max_jobs=2, max_bytes=0, max_tokens=0)
+    controller.admit(1000)
+    controller.admit(3000)
+    with pytest.raises(Rejected):
+        controller.admit(10)
+    stats = controller.stats()
+    assert stats['in_flight'] == 2
+    assert stats['queued_bytes'] == 4000
+    assert stats['estimated_tokens'] == estimated_tokens(1000) + estimated_tokens(3000)
+    assert stats['rejected'] == 1
+    assert stats['max_jobs'] == 2
+
+
+@pytest.fixture
+def web_app(monkeypatch, tmp_path):
+    # web_app creates its upload and output folders in the working directory
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module('web_app')
+
+
+def test_full_worker_answers_upload_with_fast_503(web_app, monkeypatch, clock):
+    controller = AdmissionController(max_jobs=1, max_bytes=0, max_tokens=0)
+    monkeypatch.setattr(web_app, 'admission', controller)
+    controller.admit(2800)
+    clock.now += 3
+
+    client = web_app.app.test_client()
+    response = client.post('/upload', data=b'x' * 100, content_type='multipart/form-data; boundary=b')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '7'
+    assert response.get_json()['retry_after'] == 7
+
+    queue = client.get('/api/queue').get_json()
+    assert (queue['in_flight'], queue['queued_bytes'], queue['rejected']) == (1, 2800, 1)
+    assert 'scheduler' in queue
+    metrics = client.get('/metrics').get_data(as_text=True)
+    assert 'transcript_admission_in_flight 1' in metrics
+    assert 'transcript_admission_queued_bytes 2800' in metrics
@@ -0,0 +1,180 @@
+import importlib
+import io
+import socket
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from transcript_formatter.core.cancellation import (
+    CHARS_PER_TOKEN, Cancelled, CancelToken, collect_stream,
+)
+from transcript_formatter.web.cancellation import ActiveJobs, JobAlreadyRunning, client_disconnected
+
+
+def wait_until(condition):
+    deadline = time.perf_counter() + 5
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+class FakeStream:
+    """A message stream whose read blocks after ``pieces`` until it is closed."""
+
+    def __init__(self, pieces, usage=None):
+        self.pieces = pieces
+        self.closed = threading.Event()
+        self.blocked = threading.Event()
+        if usage is not None:
+            self.current_message_snapshot = SimpleNamespace(usage=usage)
+
+    @property
+    def text_stream(self):
+        yield from self.pieces
+        self.blocked.set()
+        self.closed.wait(5)
+        # What httpx raises when the connection is closed under a read
+        raise RuntimeError('stream closed')
+
+    def close(self):
+        self.closed.set()
+
+
+def test_cancel_callbacks_run_once():
+    token = CancelToken()
+    calls = []
+    token.on_cancel(lambda: calls.append('a'))
+    unregister = token.on_cancel(lambda: calls.append('b'))
+    unregister()
+    token.cancel('first')
+    token.cancel('second')
+    assert calls == ['a']
+    assert token.reason == 'first'
+    with pytest.raises(Cancelled, match='first'):
+        token.raise_if_cancelled()
+    # Registered after the fact: runs at once
+    token.on_cancel(lambda: calls.append('late'))
+    assert calls == ['a', 'late']
+
+
+def test_cancelling_closes_the_stream_and_raises_cancelled():
+    token = CancelToken()
+    stream = FakeStream(['Hello ', 'there'], usage=SimpleNamespace(input_tokens=120, output_tokens=2))
+    threading.Thread(target=lambda: (stream.blocked.wait(5), token.cancel('client disconnected')),
+                     daemon=True).start()
+
+    with pytest.raises(Cancelled) as excinfo:
+        collect_stream(stream, 'prompt', token)
+    assert stream.closed.is_set()
+    assert excinfo.value.reason == 'client disconnected'
+    assert excinfo.value.usage.output_tokens == 2
+
+
+def test_cancelled_stream_without_snapshot_estimates_usage():
+    token = CancelToken()
+    stream = FakeStream(['x' * 40])
+
+    def on_text(text):
+        token.cancel()
+
+    with pytest.raises(Cancelled) as excinfo:
+        collect_stream(stream, 'p' * 400, token, on_text=on_text)
+    assert stream.closed.is_set()
+    assert excinfo.value.usage.input_tokens == 400 // CHARS_PER_TOKEN
+    assert excinfo.value.usage.output_tokens == 40 // CHARS_PER_TOKEN
+
+
+def test_stream_errors_without_a_cancel_are_raised():
+    stream = FakeStream(['partial'])
+    stream.close()
+    with pytest.raises(RuntimeError, match='stream closed'):
+        collect_stream(stream, 'prompt', CancelToken())
+
+
+def test_finished_stream_unregisters_its_close():
+    token = CancelToken()
+    closed = []
+    stream = SimpleNamespace(text_stream=iter(['a', 'b']), close=lambda: closed.append(True))
+    assert collect_stream(stream, 'prompt', token) == 'ab'
+    token.cancel()
+    assert closed == []
+
+
+def test_disconnect_detection():
+    server, peer = socket.socketpair()
+    try:
+        assert not client_disconnected(server)
+        # A pipelined request is left for the server to read
+        peer.sendall(b'GET / HTTP/1.1\r\n')
+        assert not client_disconnected(server)
+        assert server.recv(64) == b'GET / HTTP/1.1\r\n'
+        peer.close()
+        assert client_disconnected(server)
+    finally:
+        server.close()
+
+
+def test_tracked_job_is_cancelled_when_the_client_disconnects(tmp_path):
+    jobs = ActiveJobs(tmp_path, poll_interval=0.01)
+    server, peer = socket.socketpair()
+    try:
+        with jobs.track('job1', server) as token:
+            peer.close()
+            wait_until(lambda: token.cancelled)
+            assert token.reason == 'client disconnected'
+    finally:
+        server.close()
+
+
+def test_cancel_request_reaches_a_job_in_another_worker(tmp_path):
+    owner, other = ActiveJobs(tmp_path, poll_interval=0.01), ActiveJobs(tmp_path, poll_interval=0.01)
+    assert other.cancel('job1') is None
+    with owner.track('job1') as token:
+        assert (tmp_path / 'job1.running').exists()
+        assert other.cancel('job1') == 'requested'
+        wait_until(lambda: token.cancelled)
+        assert token.reason == 'cancelled by request'
+    assert list(tmp_path.iterdir()) == []
+    assert 'job1' not in owner
+
+
+def test_a_job_id_runs_once_per_worker(tmp_path):
+    jobs = ActiveJobs(tmp_path)
+    with jobs.track('job1'):
+        with pytest.raises(JobAlreadyRunning):
+            with jobs.track('job1'):
+                pass
+        assert 'job1' in jobs
+    with jobs.track('job1'):
+        pass
+
+
+@pytest.fixture
+def web_app(monkeypatch, tmp_path):
+    # web_app creates its upload and output folders in the working directory
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module('web_app')
+    monkeypatch.setattr(module, 'active_jobs', ActiveJobs(tmp_path / 'cancel', poll_interval=0.01))
+    return module
+
+
+def test_cancel_endpoint_stops_a_tracked_job(web_app):
+    client = web_app.app.test_client()
+    assert client.post('/api/jobs/job1/cancel').status_code == 404
+    assert client.post('/api/jobs/bad.id/cancel').status_code == 400
+    with web_app.active_jobs.track('job1') as token:
+        response = client.post('/api/jobs/job1/cancel')
+        assert response.status_code == 200
+        assert response.get_json()['status'] == 'cancelled'
+        assert token.cancelled
+
+
+def test_upload_reusing_a_live_job_id_is_a_conflict(web_app):
+    client = web_app.app.test_client()
+    with web_app.active_jobs.track('job1'):
+        response = client.post('/upload', data={'job_id': 'job1',
+                                                'file': (io.BytesIO(b'Hello.'), 'talk.txt')})
+    assert response.status_code == 409
+    assert 'already running' in response.get_json()['error']
@@ -0,0 +1,91 @@
+import sys
+
+import pytest
+from click.testing import CliRunner
+
+from transcript_formatter import cli
+from transcript_formatter.core import claude_formatter
+from transcript_formatter.core.document import parse_document
+
+
+@pytest.mark.parametrize('argv, expected', [
+    (['render', 'talk.json'], ['render', 'talk.json']),
+    (['usage'], ['usage']),
+    (['talk.txt'], ['format', 'talk.txt']),
+])
+def test_main_passes_subcommands_and_defaults_to_format(monkeypatch, argv, expected):
+    seen = []
+    monkeypatch.setattr(sys, 'argv', ['transcript-formatter'] + argv)
+    monkeypatch.setattr(cli, 'cli', lambda: seen.append(sys.argv[1:]))
+    cli.main()
+    assert seen == [expected]
+
+
+FORMATTED = '**Billy:** Read **John 3:16** now.\n'
+
+
+class FakeFormatter:
+    def __init__(self, **kwargs):
+        pass
+
+    def format_document(self, transcript_text, progress_callback=None):
+        return parse_document(FORMATTED)
+
+
+@pytest.fixture
+def transcript(tmp_path, monkeypatch):
+    monkeypatch.setattr(claude_formatter, 'ClaudeFormatter', FakeFormatter)
+    path = tmp_path / 'ep.txt'
+    path.write_text('billy read john 3 16 now\n', encoding='utf-8')
+    return path
+
+
+def test_format_writes_next_to_the_input_by_default(transcript):
+    result = CliRunner().invoke(cli.cli, ['format', str(transcript), '--format', 'txt'])
+    assert result.exit_code == 0, result.output
+    assert transcript.read_text(encoding='utf-8') == 'billy read john 3 16 now\n'
+    assert 'Read John 3:16 now.' in (transcript.parent / 'ep_formatted.txt').read_text(encoding='utf-8')
+    assert (transcript.parent / 'ep_formatted.formatted.json.gz').exists()
+
+
+@pytest.mark.parametrize('output', ['ep.txt', 'ep.docx', 'sub/../ep.md'])
+def test_format_refuses_to_overwrite_the_input(transcript, output):
+    result = CliRunner().invoke(cli.cli, ['format', str(transcript), '--format', 'txt',
+                                          '-o', str(transcript.parent / output)])
+    assert result.exit_code == 2
+    assert 'would overwrite' in result.output
+    assert transcript.read_text(encoding='utf-8') == 'billy read john 3 16 now\n'
+
+
+@pytest.fixture
+def formatted_source(tmp_path):
+    path = tmp_path / 'ep.txt'
+    path.write_text(FORMATTED, encoding='utf-8')
+    return path
+
+
+def test_render_writes_next_to_a_text_source_by_default(formatted_source):
+    result = CliRunner().invoke(cli.cli, ['render', str(formatted_source), '--format', 'txt'])
+    assert result.exit_code == 0, result.output
+    # The markup is what render exists to re-use
+    assert formatted_source.read_text(encoding='utf-8') == FORMATTED
+    rendered = (formatted_source.parent / 'ep_formatted.txt').read_text(encoding='utf-8')
+    assert 'Read John 3:16 now.' in rendered
+
+
+def test_render_refuses_to_overwrite_the_source(formatted_source):
+    result = CliRunner().invoke(cli.cli, ['render', str(formatted_source), '--format', 'txt',
+                                          '-o', str(formatted_source)])
+    assert result.exit_code == 2
+    assert 'would overwrite' in result.output
+    assert formatted_source.read_text(encoding='utf-8') == FORMATTED
+
+
+def test_render_saved_formatted_text_next_to_it(transcript):
+    CliRunner().invoke(cli.cli, ['format', str(transcript), '--format', 'txt'])
+    saved = transcript.parent / 'ep_formatted.formatted.json.gz'
+    (transcript.parent / 'ep_formatted.txt').unlink()
+    result = CliRunner().invoke(cli.cli, ['render', str(saved), '--format', 'txt', '--format', 'md'])
+    assert result.exit_code == 0, result.output
+    assert (transcript.parent / 'ep_formatted.txt').exists()
+    assert (transcript.parent / 'ep_formatted.md').exists()
@@ -0,0 +1,102 @@
+import pytest
+
+from transcript_formatter.core.document import parse_document
+from transcript_formatter.core.edit_script import (MAX_DELETED_FRACTION, apply_edit_script,
+                                                   parse_edit_script)
+
+
+SENTENCES = [
+    'Welcome to World Impact.',
+    'male announcer: Today we look at the last days.',
+    'Paul wrote about it in 2 Timothy chapter 3, verses 1 through 5.',
+    '♪ Holy, holy, holy',
+    '♪ Lord God Almighty',
+    'Thank you for joining us.',
+]
+
+
+def test_malformed_and_unknown_lines_are_all_reported():
+    script = '\n'.join([
+        'P 1',
+        'this is not an operation',
+        'X 2 something',
+        'H 3 Missing number',
+        'S 4',
+        'R 2 2 Timothy chapter 3 => the last days',
+        'P 5 stray text',
+    ])
+    with pytest.raises(ValueError) as excinfo:
+        parse_edit_script(script, len(SENTENCES))
+    message = str(excinfo.value)
+    for line in (2, 3, 4, 5, 6, 7):
+        assert f"line {line}:" in message
+    assert 'line 1:' not in message
+    assert 'not a Scripture reference' in message
+
+
+def test_blank_lines_comments_and_fences_are_ignored():
+    ops = parse_edit_script('```\n# edits\n\nP 1\n```', len(SENTENCES))
+    assert [(op.code, op.index) for op in ops] == [('P', 1)]
+
+
+def test_out_of_range_sentence_is_rejected():
+    with pytest.raises(ValueError, match='sentence 6 does not exist'):
+        parse_edit_script('P 6', len(SENTENCES))
+    with pytest.raises(ValueError, match='bad lyric range'):
+        parse_edit_script('L 3 9', len(SENTENCES))
+    with pytest.raises(ValueError, match='bad lyric range'):
+        parse_edit_script('L 4 3', len(SENTENCES))
+
+
+def test_deleting_too_much_is_rejected():
+    sentences = ['a' * 10] * 10
+    deleting = int(len(sentences) * MAX_DELETED_FRACTION) + 1
+    ops = parse_edit_script('\n'.join(f'D {i}' for i in range(deleting)), len(sentences))
+    with pytest.raises(ValueError, match='deletes'):
+        apply_edit_script(sentences, ops)
+
+    # Exactly at the limit is allowed
+    allowed = parse_edit_script('\n'.join(f'D {i}' for i in range(deleting - 1)), len(sentences))
+    apply_edit_script(sentences, allowed)
+
+
+def test_lyric_range_becomes_one_song_block():
+    ops = parse_edit_script('L 3 4\nP 5', len(SENTENCES))
+    text, skipped = apply_edit_script(SENTENCES, ops)
+    assert skipped == []
+    assert '♪ Holy, holy, holy ♪\n♪ Lord God Almighty ♪' in text.split('\n\n')
+    assert [block.kind for block in parse_document(text)].count('lyrics') == 1
+
+
+def test_speaker_label_on_deleted_sentence_moves_to_next_kept():
+    sentences = ['Welcome to World Impact.', 'Um, okay.', SENTENCES[2], SENTENCES[5]]
+    ops = parse_edit_script('S 1 Male Announcer\nD 1\nP 3', len(sentences))
+    text, _ = apply_edit_script(sentences, ops)
+    assert text.split('\n\n') == [
+        'Welcome to World Impact.',
+        '**Male Announcer:** Paul wrote about it in 2 Timothy chapter 3, verses 1 through 5.',
+        'Thank you for joining us.',
+    ]
+
+
+def test_scripture_and_raw_label_edits():
+    script = '\n'.join([
+        'T 0 The Last Days',
+        'S 1 Male Announcer',
+        'D 1 male announcer:',
+        'R 2 2 Timothy chapter 3, verses 1 through 5 => 2 Timothy 3:1-5',
+    ])
+    ops = parse_edit_script(script, len(SENTENCES))
+    text, skipped = apply_edit_script(SENTENCES[:3], ops)
+    assert skipped == []
+    assert text.split('\n\n')[0] == 'The Last Days'
+    assert '**Male Announcer:** Today we look at the last days.' in text
+    assert 'Paul wrote about it in **2 Timothy 3:1-5**.' in text
+
+
+def test_edit_text_not_in_sentence_is_skipped_or_strict_error():
+    ops = parse_edit_script('D 0 nonexistent words', len(SENTENCES))
+    text, skipped = apply_edit_script(SENTENCES, ops)
+    assert len(skipped) == 1 and 'Welcome to World Impact.' in text
+    with pytest.raises(ValueError, match='does not match'):
+        apply_edit_script(SENTENCES, ops, strict=True)
@@ -0,0 +1,154 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from transcript_formatter.core import incremental
+from transcript_formatter.core.cancellation import Cancelled, CancelToken
+from transcript_formatter.core.chunked_formatter import ChunkedFormatter
+from transcript_formatter.core.chunking import split_stable
+from transcript_formatter.core.incremental import (
+    PRUNE_AFTER_SECONDS, ChunkCache, chunk_key, format_incremental,
+)
+
+
+TEMPLATE = 'Format this transcript:\n{transcript}'
+CHUNK_CHARS = 400
+TRANSCRIPT = ' '.join(f"Sentence number {i} talks about topic {i % 7} in some detail."
+                      for i in range(120))
+
+
+class FakeClient:
+    """Formats by upper-casing the transcript part of the prompt."""
+
+    def __init__(self, on_call=None):
+        self.prompts = []
+        self.on_call = on_call
+        self._lock = threading.Lock()
+        self.messages = SimpleNamespace(create=self.create)
+
+    def create(self, messages, **kwargs):
+        prompt = messages[0]['content']
+        with self._lock:
+            self.prompts.append(prompt)
+            if self.on_call:
+                self.on_call(len(self.prompts))
+        text = prompt.split('Format this transcript:\n', 1)[1].upper()
+        return SimpleNamespace(content=[SimpleNamespace(text=text)], usage=None)
+
+
+def formatter(client, template=TEMPLATE):
+    return ChunkedFormatter(client, 'claude-test', template, system_prompt='Be careful.',
+                            max_workers=1, entry_point='cli')
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with ChunkCache(tmp_path / 'chunks.sqlite3') as cache:
+        yield cache
+
+
+def run(client, cache, text, episode='ep1', **kwargs):
+    return format_incremental(formatter(client), cache, episode, text, CHUNK_CHARS, **kwargs)
+
+
+def test_one_word_edit_only_resends_its_chunk(cache):
+    first_text, stats = run(FakeClient(), cache, TRANSCRIPT)
+    chunks = len(split_stable(TRANSCRIPT, CHUNK_CHARS))
+    assert chunks > 5
+    assert stats == {'chunks': chunks, 'changed': chunks, 'cached': 0, 'sent': chunks}
+
+    edited = TRANSCRIPT.replace('Sentence number 60 talks', 'Sentence number 60 speaks')
+    client = FakeClient()
+    text, stats = run(client, cache, edited)
+
+    assert stats['sent'] == len(client.prompts) == 1
+    assert stats['changed'] == 1
+    assert stats['cached'] == stats['chunks'] - 1
+    assert 'SENTENCE NUMBER 60 SPEAKS' in text
+    assert text == first_text.replace('SENTENCE NUMBER 60 TALKS', 'SENTENCE NUMBER 60 SPEAKS')
+
+
+def test_counts_for_a_new_episode_with_cached_chunks(cache):
+    run(FakeClient(), cache, TRANSCRIPT, episode='ep1')
+    client = FakeClient()
+    _, stats = run(client, cache, TRANSCRIPT, episode='ep2')
+    # Every chunk is new to ep2, but all of them are already formatted
+    assert stats['changed'] == stats['chunks']
+    assert stats['cached'] == stats['chunks']
+    assert stats['sent'] == 0
+    assert client.prompts == []
+
+
+def test_whole_transcript_is_not_reused_as_the_first_part(cache):
+    first_chunk = split_stable(TRANSCRIPT, CHUNK_CHARS)[0]
+    run(FakeClient(), cache, first_chunk)
+
+    client = FakeClient()
+    _, stats = run(client, cache, TRANSCRIPT)
+    # Formatted alone, the first chunk had no "part 1 of N" note
+    assert stats['cached'] == 0
+    assert client.prompts[0].startswith('This is part 1 of')
+
+
+def test_key_covers_prompts_and_position():
+    key = chunk_key('text', 'model', 'system', TEMPLATE, first=True)
+    assert key == chunk_key('text', 'model', 'system', TEMPLATE, first=True)
+    assert key != chunk_key('text', 'model', 'system', 'Other:\n{transcript}', first=True)
+    assert key != chunk_key('text', 'model', 'other system', TEMPLATE, first=True)
+    assert key != chunk_key('text', 'model', 'system', TEMPLATE, first=False)
+    assert key != chunk_key('text', 'model', 'system', TEMPLATE, first=True, whole=True)
+
+
+def test_changed_template_resends_everything(cache):
+    run(FakeClient(), cache, TRANSCRIPT)
+    client = FakeClient()
+    _, stats = format_incremental(formatter(client, 'New rules.\nFormat this transcript:\n{transcript}'),
+                                  cache, 'ep1', TRANSCRIPT, CHUNK_CHARS)
+    assert stats['cached'] == 0
+    assert stats['sent'] == stats['chunks']
+
+
+def test_chunks_formatted_before_a_cancel_are_cached(cache):
+    token = CancelToken()
+
+    def cancel_after_two(calls):
+        if calls == 2:
+            token.cancel('client disconnected')
+
+    with pytest.raises(Cancelled):
+        run(FakeClient(cancel_after_two), cache, TRANSCRIPT, cancel=token)
+    # The episode is only remembered once it is complete
+    assert cache.previous('ep1') == []
+
+    client = FakeClient()
+    _, stats = run(client, cache, TRANSCRIPT)
+    assert stats['cached'] == 2
+    assert stats['sent'] == stats['chunks'] - 2
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_prune_drops_only_old_unreferenced_chunks(cache, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(incremental.time, 'time', clock)
+    cache.put('orphan', 'old text')
+    cache.put('kept', 'old text')
+    cache.remember('ep1', ['kept'])
+
+    clock.now += PRUNE_AFTER_SECONDS - 60
+    cache.put('recent', 'new text')
+    cache.remember('ep2', [])
+    assert set(cache.get_many(['orphan', 'kept', 'recent'])) == {'orphan', 'kept', 'recent'}
+
+    # get_many() marked all three used; a month later only the referenced one stays
+    clock.now += PRUNE_AFTER_SECONDS + 60
+    cache.remember('ep2', [])
+    assert set(cache.get_many(['orphan', 'kept', 'recent'])) == {'kept'}
+    assert cache.previous('ep1') == ['kept']
@@ -0,0 +1,73 @@
+import time
+from types import SimpleNamespace
+
+from transcript_formatter.core.chunked_formatter import ChunkedFormatter
+from transcript_formatter.web.jobs import MAX_CHUNK_ATTEMPTS, Job, JobStore
+from transcript_formatter.web.serverless import advance_job
+
+
+class FakeMessages:
+    """Formats every chunk except those containing ``bad``, which always fail."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **request):
+        self.calls += 1
+        prompt = request['messages'][0]['content']
+        if 'bad' in prompt:
+            raise RuntimeError('overloaded')
+        return SimpleNamespace(content=[SimpleNamespace(text='formatted')], usage=None)
+
+
+def make_formatter():
+    messages = FakeMessages()
+    client = SimpleNamespace(messages=messages)
+    return ChunkedFormatter(client, 'model', '{transcript}', max_workers=2), messages
+
+
+def test_job_fails_after_a_chunk_reaches_the_attempt_cap():
+    formatter, messages = make_formatter()
+    job = Job.create('talk.txt', ['good one', 'bad one', 'good two'])
+
+    for attempt in range(1, MAX_CHUNK_ATTEMPTS + 1):
+        assert not job.failed
+        advance_job(job, formatter, time.monotonic())
+        assert job.failures == [0, attempt, 0]
+
+    assert job.failed
+    assert job.completed == 2
+    status = job.status()
+    assert status['status'] == 'failed'
+    assert 'overloaded' in status['errors'][-1]
+
+    # A failed job is not retried again
+    calls = messages.calls
+    advance_job(job, formatter, time.monotonic())
+    assert messages.calls == calls
+
+
+def test_job_that_recovers_completes():
+    formatter, _ = make_formatter()
+    job = Job.create('talk.txt', ['good one', 'bad one'])
+    advance_job(job, formatter, time.monotonic())
+    assert job.status()['status'] == 'pending'
+
+    job.chunks[1] = 'fine now'
+    advance_job(job, formatter, time.monotonic())
+    assert job.complete and not job.failed
+    assert job.status()['status'] == 'complete'
+
+
+def test_failure_counts_survive_the_store(tmp_path):
+    store = JobStore(str(tmp_path))
+    job = Job.create('talk.txt', ['a', 'b'])
+    job.failures[1] = 2
+    store.save(job)
+    assert store.load(job.id).failures == [0, 2]
+
+
+def test_jobs_saved_before_failure_counts_load():
+    legacy = Job.create('talk.txt', ['a', 'b']).to_dict()
+    del legacy['failures']
+    assert Job(**legacy).failures == [0, 0]
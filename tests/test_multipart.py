@@ -0,0 +1,84 @@
+import io
+
+import pytest
+
+from transcript_formatter.web.multipart import (MultipartError, RequestTooLarge, parse_multipart)
+
+
+BOUNDARY = 'XyZ-boundary'
+CONTENT_TYPE = f'multipart/form-data; boundary="{BOUNDARY}"'
+
+
+def multipart_body(fields, files):
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                     .encode() + value.encode() + b'\r\n')
+    for name, (filename, data) in files.items():
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"; '
+                     f'filename="{filename}"\r\nContent-Type: text/plain\r\n\r\n'.encode()
+                     + data + b'\r\n')
+    return b''.join(parts) + f'--{BOUNDARY}--\r\n'.encode()
+
+
+class TrickleStream(io.BytesIO):
+    """Returns at most ``step`` bytes per read, like a slow socket."""
+
+    def __init__(self, data, step):
+        super().__init__(data)
+        self.step = step
+
+    def read(self, size=-1):
+        return super().read(self.step if size < 0 else min(size, self.step))
+
+
+# Large enough that the file spans many reads and the delimiter falls across them
+FILE_DATA = b''.join(b'line %d with some text\r\n' % i for i in range(5000))
+
+
+@pytest.mark.parametrize('step', [1, 7, 100, 65536])
+def test_parses_fields_and_files_for_any_read_size(step):
+    body = multipart_body({'document_type': 'meeting', 'formats': 'docx,srt'},
+                          {'file': ('talk.txt', FILE_DATA)})
+    if step == 1:
+        # Byte-at-a-time reads are slow; a smaller file covers the same paths
+        body = multipart_body({'document_type': 'meeting', 'formats': 'docx,srt'},
+                              {'file': ('talk.txt', FILE_DATA[:3000])})
+    fields, files = parse_multipart(TrickleStream(body, step), CONTENT_TYPE, len(body))
+
+    assert fields == {'document_type': 'meeting', 'formats': 'docx,srt'}
+    upload = files['file']
+    assert upload.filename == 'talk.txt'
+    expected = FILE_DATA[:3000] if step == 1 else FILE_DATA
+    assert upload.size == len(expected)
+    assert upload.stream.read() == expected
+    upload.close()
+
+
+def test_declared_length_over_limit_is_rejected_before_reading():
+    stream = TrickleStream(b'', 1)
+    with pytest.raises(RequestTooLarge) as excinfo:
+        parse_multipart(stream, CONTENT_TYPE, content_length=2048, max_bytes=1024)
+    assert excinfo.value.status == 413
+
+
+def test_body_over_limit_is_rejected_while_reading():
+    body = multipart_body({}, {'file': ('big.txt', b'x' * 5000)})
+    # No Content-Length: the limit is enforced on the bytes actually read
+    with pytest.raises(RequestTooLarge) as excinfo:
+        parse_multipart(TrickleStream(body, 1000), CONTENT_TYPE, None, max_bytes=4096)
+    assert excinfo.value.status == 413
+
+
+def test_truncated_body_is_a_bad_request():
+    body = multipart_body({'mode': 'rewrite'}, {'file': ('t.txt', b'hello world')})
+    truncated = body[:-30]
+    with pytest.raises(MultipartError) as excinfo:
+        parse_multipart(io.BytesIO(truncated), CONTENT_TYPE, len(truncated))
+    assert excinfo.value.status == 400
+    assert not isinstance(excinfo.value, RequestTooLarge)
+
+
+def test_missing_boundary_is_a_bad_request():
+    with pytest.raises(MultipartError):
+        parse_multipart(io.BytesIO(b''), 'multipart/form-data', 0)
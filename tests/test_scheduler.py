@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+
+from transcript_formatter.web import scheduler as scheduler_module
+from transcript_formatter.web.scheduler import Scheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scheduler_module.time, 'monotonic', clock)
+    return clock
+
+
+def wait_until(condition):
+    deadline = time.perf_counter() + 5
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+class Jobs:
+    """
+    Jobs that hold their slot until the test finishes them.
+
+    Only the test thread submits and finishes jobs, and it waits for each
+    change to land, so the scheduler sees the same queue on every run.
+    """
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.started = []
+        self.waited = {}
+        self._done = {}
+        self._threads = {}
+
+    def submit(self, name, cost, client=''):
+        before = self.scheduler.stats()
+        self._done[name] = threading.Event()
+
+        def run():
+            with self.scheduler.slot(cost, client) as waited:
+                self.waited[name] = waited
+                self.started.append(name)
+                self._done[name].wait(5)
+
+        self._threads[name] = threading.Thread(target=run, daemon=True)
+        self._threads[name].start()
+        wait_until(lambda: name in self.started
+                   or self.scheduler.stats()['waiting'] > before['waiting'])
+
+    def finish(self, name):
+        """End a running job and return the job that took its slot, if any."""
+        count = len(self.started)
+        waiting = self.scheduler.stats()['waiting']
+        self._done[name].set()
+        self._threads[name].join(5)
+        if not waiting:
+            return None
+        wait_until(lambda: len(self.started) > count)
+        return self.started[-1]
+
+    def finish_all(self):
+        for name in list(self._done):
+            self._done[name].set()
+        for thread in self._threads.values():
+            thread.join(5)
+
+
+@pytest.fixture
+def make_jobs():
+    created = []
+
+    def make(scheduler):
+        created.append(Jobs(scheduler))
+        return created[-1]
+
+    yield make
+    for jobs in created:
+        jobs.finish_all()
+
+
+def test_short_job_overtakes_long_one(clock, make_jobs):
+    jobs = make_jobs(Scheduler(slots=1))
+    jobs.submit('running', 60)
+    jobs.submit('sermon', 180)
+    clock.now += 1
+    jobs.submit('snippet', 10)
+    clock.now += 59
+
+    assert jobs.finish('running') == 'snippet'
+    assert jobs.waited['snippet'] == 59
+    clock.now += 10
+    assert jobs.finish('snippet') == 'sermon'
+    assert jobs.waited['sermon'] == 70
+
+
+def test_aging_bounds_the_wait_of_a_long_job(clock, make_jobs):
+    jobs = make_jobs(Scheduler(slots=1, aging_rate=1.0))
+    jobs.submit('first', 10)
+    jobs.submit('long', 180)
+    running = 'first'
+    # A new 10-second job arrives every 10 seconds, for ever
+    for i in range(40):
+        clock.now += 10
+        jobs.submit(f'short{i}', 10)
+        running = jobs.finish(running)
+        if running == 'long':
+            break
+    # Its 180 seconds of cost are worked off at one per second until only
+    # a fresh short job's 10 remain
+    assert running == 'long'
+    assert jobs.waited['long'] == 170
+
+
+def test_without_aging_the_long_job_keeps_waiting(clock, make_jobs):
+    jobs = make_jobs(Scheduler(slots=1, aging_rate=0.0))
+    jobs.submit('first', 10)
+    jobs.submit('long', 180)
+    running = 'first'
+    for i in range(40):
+        clock.now += 10
+        jobs.submit(f'short{i}', 10)
+        running = jobs.finish(running)
+    assert 'long' not in jobs.started
+
+
+def test_one_client_does_not_take_every_slot(clock, make_jobs):
+    jobs = make_jobs(Scheduler(slots=2))
+    # With nobody else waiting, one client may use every slot
+    jobs.submit('bulk0', 1, client='bulk')
+    jobs.submit('bulk1', 1, client='bulk')
+    assert jobs.started == ['bulk0', 'bulk1']
+
+    for i in range(2, 6):
+        jobs.submit(f'bulk{i}', 1, client='bulk')
+    clock.now += 1
+    jobs.submit('other', 100, client='other')
+
+    # 'bulk' holds its share (one of two slots) already; the other client's
+    # job goes first although it is 100 times as long
+    assert jobs.finish('bulk0') == 'other'
+    assert jobs.finish('bulk1') == 'bulk2'
+    # 'other' has nothing waiting, so 'bulk' gets the freed slots
+    assert jobs.finish('bulk2') == 'bulk3'
+    assert jobs.scheduler.stats()['running'] == 2
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from transcript_formatter.web.singleflight import SingleFlight, flight_key
+
+
+def wait_for_followers(flights, key, started):
+    """Give followers time to join the leader's call before it finishes."""
+    started.wait(5)
+    deadline = time.monotonic() + 5
+    while key not in flights._calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.2)
+
+
+def run_concurrently(flights, key, job, callers):
+    outcomes = [None] * callers
+
+    def call(i):
+        try:
+            outcomes[i] = ('ok', flights.run(key, job))
+        except Exception as e:
+            outcomes[i] = ('error', e)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    return threads, outcomes
+
+
+def test_concurrent_callers_share_one_execution(tmp_path):
+    flights = SingleFlight(str(tmp_path))
+    key = flight_key(b'transcript', 'talk.txt', '', 'meeting', 'docx', 'rewrite')
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def job():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return {'filename': 'talk_formatted.docx'}
+
+    threads, outcomes = run_concurrently(flights, key, job, 4)
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    wait_for_followers(flights, key, started)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(runs) == 1
+    assert all(kind == 'ok' for kind, _ in outcomes)
+    results = [value for _, value in outcomes]
+    assert all(result == {'filename': 'talk_formatted.docx'} for result, _ in results)
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+
+
+def test_leader_error_reaches_every_follower(tmp_path):
+    flights = SingleFlight(str(tmp_path))
+    key = flight_key(b'transcript', 'talk.txt')
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def job():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        raise RuntimeError('Claude API error: overloaded')
+
+    threads, outcomes = run_concurrently(flights, key, job, 3)
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    wait_for_followers(flights, key, started)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(runs) == 1
+    assert [kind for kind, _ in outcomes] == ['error'] * 3
+    assert all('overloaded' in str(error) for _, error in outcomes)
+
+    # The failure is not cached: the next caller runs the job again
+    with pytest.raises(RuntimeError):
+        flights.run(key, job)
+    assert len(runs) == 2
+
+
+def test_key_covers_file_name_and_episode():
+    base = flight_key(b'same bytes', 'a.txt', '', 'meeting', 'docx', 'rewrite')
+    assert base == flight_key(b'same bytes', 'a.txt', '', 'meeting', 'docx', 'rewrite')
+    assert base != flight_key(b'same bytes', 'b.txt', '', 'meeting', 'docx', 'rewrite')
+    assert base != flight_key(b'same bytes', 'a.txt', 'ep-12', 'meeting', 'docx', 'rewrite')
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pytest
+
+from transcript_formatter.core.document import parse_document, render_markup
+from transcript_formatter.core.structured import (TOOL_NAME, document_from_data,
+                                                  document_from_message)
+
+
+VALID = {
+    'title': 'The Last Days',
+    'blocks': [
+        {'type': 'speaker', 'speaker': 'Billy Wilson', 'spans': [
+            {'text': 'Welcome to '},
+            {'text': 'World Impact', 'style': 'bold'},
+            {'text': '. Paul warned us in '},
+            {'text': '2 Timothy 3:1-5', 'style': 'scripture'},
+            {'text': '.'},
+        ]},
+        {'type': 'heading', 'number': 1, 'text': 'A Counterculture Mindset'},
+        {'type': 'paragraph', 'spans': [
+            {'text': 'He called it '},
+            {'text': 'terrible times', 'style': 'italic'},
+            {'text': '.'},
+        ]},
+        {'type': 'lyrics', 'lines': ['Holy, holy, holy', 'Lord God Almighty']},
+    ],
+}
+
+
+def with_block(block):
+    return dict(VALID, blocks=VALID['blocks'] + [block])
+
+
+def kinds(document):
+    return [block.kind for block in document if block.kind != 'blank']
+
+
+def test_valid_payload_round_trips_through_markup():
+    document = document_from_data(VALID)
+    assert kinds(document) == ['title', 'speaker', 'heading', 'paragraph', 'lyrics']
+
+    reparsed = parse_document(render_markup(document))
+    assert kinds(reparsed) == kinds(document)
+    assert render_markup(reparsed) == render_markup(document)
+
+    speaker = [block for block in reparsed if block.kind == 'speaker'][0]
+    assert speaker.label == 'Billy Wilson:'
+    assert [span.text for span in speaker.spans if span.scripture] == ['2 Timothy 3:1-5']
+
+
+@pytest.mark.parametrize('block_type', ['table', 'quote', None, 7])
+def test_unknown_block_type_is_rejected(block_type):
+    with pytest.raises(ValueError, match=r'blocks\[4\]\.type: unknown block type'):
+        document_from_data(with_block({'type': block_type, 'text': 'x'}))
+
+
+@pytest.mark.parametrize('speaker', ['', '   ', None])
+def test_empty_speaker_is_rejected(speaker):
+    with pytest.raises(ValueError, match=r'blocks\[4\]\.speaker: must be a non-empty string'):
+        document_from_data(with_block({'type': 'speaker', 'speaker': speaker, 'spans': []}))
+
+
+def test_sentence_as_speaker_is_rejected():
+    with pytest.raises(ValueError, match='is not a speaker name'):
+        document_from_data(with_block({'type': 'speaker', 'speaker': 'Note: he said', 'spans': []}))
+
+
+@pytest.mark.parametrize('text', ['the last days', 'terrible times will come'])
+def test_non_scripture_reference_is_rejected(text):
+    block = {'type': 'paragraph', 'spans': [{'text': text, 'style': 'scripture'}]}
+    with pytest.raises(ValueError, match='is not a Scripture reference'):
+        document_from_data(with_block(block))
+
+
+def test_problems_are_listed_together():
+    data = {'title': '', 'blocks': [{'type': 'paragraph', 'spans': []},
+                                    {'type': 'heading', 'number': 0, 'text': 'Intro'}]}
+    with pytest.raises(ValueError) as excinfo:
+        document_from_data(data)
+    message = str(excinfo.value)
+    assert 'title:' in message and 'blocks[0].spans' in message and 'blocks[1].number' in message
+
+
+def test_message_without_tool_call_or_cut_off_is_rejected():
+    tool_call = SimpleNamespace(type='tool_use', name=TOOL_NAME, input=VALID)
+    assert kinds(document_from_message(SimpleNamespace(stop_reason='tool_use', content=[tool_call])))
+
+    with pytest.raises(ValueError, match='cut off'):
+        document_from_message(SimpleNamespace(stop_reason='max_tokens', content=[tool_call]))
+    text_only = SimpleNamespace(type='text', text='Here is the transcript')
+    with pytest.raises(ValueError, match='did not call'):
+        document_from_message(SimpleNamespace(stop_reason='end_turn', content=[text_only]))
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+import pytest
+from click.testing import CliRunner
+
+from transcript_formatter.cli import cli
+from transcript_formatter.usage import UsageLedger
+
+
+def usage(input_tokens, output_tokens, cache_read=0):
+    return SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens,
+                           cache_creation_input_tokens=0, cache_read_input_tokens=cache_read)
+
+
+@pytest.fixture
+def ledger_path(tmp_path):
+    path = tmp_path / 'usage.sqlite3'
+    with UsageLedger(path) as ledger:
+        # Two completed calls on 2 KB and 1 KB of transcript
+        ledger.add('web', 'claude-sonnet-4-5', usage(1000, 1500, cache_read=1000), 10.0, 2048)
+        ledger.add('web', 'claude-sonnet-4-5', usage(1500, 1500), 20.0, 1024)
+        # Cut off halfway through a 4 KB transcript
+        ledger.add('web', 'claude-sonnet-4-5', usage(2000, 900), 3.0, 4096, status='cancelled')
+        ledger.add('web', 'claude-sonnet-4-5', None, 0.5, 1024, status='error')
+    return path
+
+
+def test_cancelled_tokens_are_kept_out_of_per_kb_figures(ledger_path):
+    with UsageLedger(ledger_path) as ledger:
+        group, = ledger.report(1, by='entry_point')
+
+    assert (group['calls'], group['errors'], group['cancelled']) == (4, 1, 1)
+    assert group['input_tokens'] == 3500
+    assert group['output_tokens'] == 3000
+    assert group['cancelled_input_tokens'] == 2000
+    assert group['cancelled_output_tokens'] == 900
+    assert group['transcript_bytes'] == 3072
+    assert group['input_per_kb'] == pytest.approx(3500 / 3)
+    assert group['output_per_kb'] == pytest.approx(1000)
+    assert (group['p50_latency'], group['p95_latency']) == (10.0, 20.0)
+    # The cut-off call was still paid for
+    expected = (4500 * 3.00 + 3900 * 15.00 + 1000 * 0.30) / 1_000_000
+    assert group['cost_usd'] == pytest.approx(expected, abs=1e-4)
+
+
+def test_usage_command_shows_cancelled_tokens(ledger_path):
+    result = CliRunner().invoke(cli, ['usage', '--days', '1', '--by', 'entry_point',
+                                      '--ledger', str(ledger_path)])
+    assert result.exit_code == 0, result.output
+    assert 'cancel tok' in result.output
+    web = next(line for line in result.output.splitlines() if line.startswith('web '))
+    assert '2,900' in web
+    assert web.split()[-2:] == ['1167', '1000']
@@ -0,0 +1,35 @@
+import pytest
+from click.testing import CliRunner
+
+from transcript_formatter.cli import cli
+from transcript_formatter.watcher import FolderWatcher
+
+
+def test_output_folder_cannot_be_the_watched_folder(tmp_path):
+    with pytest.raises(ValueError, match='watched folder'):
+        FolderWatcher(tmp_path, tmp_path / 'sub' / '..', process=lambda *args: {})
+
+
+def test_watch_command_rejects_the_watched_folder_as_output(tmp_path):
+    result = CliRunner().invoke(cli, ['watch', str(tmp_path), '-o', str(tmp_path), '--once',
+                                      '--format', 'txt'])
+    assert result.exit_code == 1
+    assert 'cannot be the watched folder' in result.output
+
+
+def test_outputs_are_not_formatted_again(tmp_path):
+    processed = []
+
+    def process(input_path, output_base):
+        processed.append(input_path.name)
+        output = output_base.with_name(output_base.name + '.txt')
+        output.write_text('formatted', encoding='utf-8')
+        return {'txt': str(output)}
+
+    (tmp_path / 'ep.txt').write_text('raw transcript', encoding='utf-8')
+    for _ in range(2):
+        FolderWatcher(tmp_path, formats=('txt',), settle=0, use_inotify=False,
+                      process=process, log=lambda message: None).run(once=True)
+
+    assert processed == ['ep.txt']
+    assert (tmp_path / 'formatted' / 'ep_formatted.txt').exists()
@@ -1,11 +1,12 @@
 import click
 import os
+import re
 from pathlib import Path
-from docx import Document
-from docx.shared import Inches
-from .core.claude_formatter import ClaudeFormatter, format_with_claude
-from .exporters.word_exporter import WordExporter
-import anthropic
+from .core.extractor import iter_docx_formatted
+from .exporters import EXPORTERS
+
+# Heavy dependencies (anthropic, and python-docx via the Word exporter) are
+# imported inside the commands that use them so --help and display start quickly.
 
 
 @click.group()
@@ -18,18 +19,81 @@ def cli():
 @click.argument('input_file', type=click.Path(exists=True, readable=True))
 @click.option('-o', '--output', 'output_file', 
               type=click.Path(), 
-              help='Output file path (supports .docx)')
-@click.option('--format', 'output_format', 
-              type=click.Choice(['docx'], case_sensitive=False),
-              default='docx',
-              help='Output format (default: docx)')
-def format(input_file, output_file, output_format):
+              help='Output file path; the extension is replaced per format '
+                   '(default: <input stem>_formatted next to the input)')
+@click.option('--format', 'output_formats', 
+              type=click.Choice(list(EXPORTERS), case_sensitive=False),
+              multiple=True,
+              default=('docx',),
+              help='Output format, repeat for several (default: docx)')
+@click.option('--profile', is_flag=True,
+              help='Profile the run; writes OUTPUT.prof and a hotspot summary next to it')
+@click.option('--profile-top', type=click.IntRange(min=1), default=25, show_default=True,
+              help='Functions listed in the profile summary')
+@click.option('--mode', type=click.Choice(['rewrite', 'edits', 'structured']), default='rewrite',
+              show_default=True,
+              help='rewrite: Claude returns the formatted transcript; '
+                   'edits: Claude returns an edit script applied locally (fewer output tokens); '
+                   'structured: Claude returns the document structure, validated before export')
+@click.option('--incremental', is_flag=True,
+              help='Only send the parts changed since this episode was last formatted '
+                   '(chunk cache in $TRANSCRIPT_CHUNK_CACHE, else ./chunk_cache.sqlite3)')
+@click.option('--episode', help='Episode id matching earlier versions with --incremental '
+                                '(default: the input file name)')
+def format(input_file, output_file, output_formats, profile, profile_top, mode, incremental, episode):
     """Convert raw transcript text files into formatted documents using Claude AI."""
+    from contextlib import nullcontext
+    from .profiling import Profiler
+    
+    if incremental and mode != 'rewrite':
+        raise click.BadParameter('only the rewrite mode can be incremental', param_hint='--mode')
+    if episode and not incremental:
+        raise click.BadParameter('requires --incremental', param_hint='--episode')
+    
+    # Every format is rendered from the same output base
+    output_base = _output_base(input_file, output_file, output_formats)
+    
+    profiler = Profiler(f"{output_base}.prof", top=profile_top) if profile else nullcontext()
+    try:
+        with profiler:
+            _format_file(input_file, output_base, output_formats, mode,
+                         (episode or Path(input_file).stem) if incremental else None)
+    finally:
+        if profile and profiler.report:
+            report = profiler.report
+            click.echo(f"Profile written to {report['prof_path']} "
+                       f"(summary: {report['summary_path']})")
+            click.echo(report['summary'])
+
+
+def _output_base(source, output_file, output_formats):
+    """Output base for `format` and `render`: OUTPUT without its extension, else
+    ``<stem>_formatted`` next to SOURCE, as `batch` and `watch` name their outputs.
+    
+    Raises:
+        click.BadParameter: If one of the outputs would overwrite SOURCE
+    """
+    if output_file:
+        output_base = Path(output_file).with_suffix('')
+    else:
+        output_base = Path(source).with_name(f"{Path(source).stem}_formatted")
+    source_path = Path(source).resolve()
+    for fmt in output_formats:
+        if output_base.with_name(f"{output_base.name}.{fmt.lower()}").resolve() == source_path:
+            raise click.BadParameter(f"the {fmt} output would overwrite {source}",
+                                     param_hint='-o/--output')
+    return output_base
+
+
+def _format_file(input_file, output_base, output_formats, mode='rewrite', episode=None):
+    """Read, format with Claude, export and index one transcript.
     
-    # Determine output file if not provided
-    if not output_file:
-        input_path = Path(input_file)
-        output_file = input_path.with_suffix(f'.{output_format.lower()}')
+    With an ``episode``, only the parts changed since that episode was last
+    formatted are sent to Claude.
+    """
+    import anthropic
+    from .core.claude_formatter import ClaudeFormatter
+    from .exporters import export_formats
     
     # Read the input file
     with open(input_file, 'r', encoding='utf-8') as f:
@@ -42,85 +106,427 @@ def format(input_file, output_file, output_format):
         def progress_callback(message):
             click.echo(f"  {message}")
         
-        formatted_text = format_with_claude(raw_text, progress_callback)
+        # Parsed once here (or built directly from structured output) and
+        # shared by every exporter and the search index
+        formatter = ClaudeFormatter(mode=mode)
+        if episode:
+            from .core.document import parse_document
+            from .core.incremental import DEFAULT_CACHE_PATH, cache_path_if_enabled
+            document = parse_document(formatter.format_incremental(
+                raw_text, episode, cache_path_if_enabled() or DEFAULT_CACHE_PATH, progress_callback))
+        else:
+            document = formatter.format_document(raw_text, progress_callback)
         
     except (anthropic.APIError, ValueError, RuntimeError) as e:
         click.echo(f"Claude AI formatting failed: {e}")
         click.echo("Please check your ANTHROPIC_API_KEY environment variable and try again.")
         raise
     
-    # Export to desired format
-    if output_format.lower() == 'docx':
-        # Use the professional WordExporter
-        exporter = WordExporter()
-        exporter.export(formatted_text, output_file)
+    # Export all requested formats from the single formatting result
+    outputs = export_formats(document, output_base, output_formats)
+    
+    for output_path in outputs.values():
+        click.echo(f"Successfully converted {input_file} to {output_path}")
     
-    click.echo(f"Successfully converted {input_file} to {output_file}")
+    # Kept so a new template or format is a `render`, not another Claude call
+    from .core.formatted_store import save_formatted
+    save_formatted(output_base, document)
+    
+    if 'docx' in outputs:
+        import sqlite3
+        from .core.search_index import index_if_enabled
+        try:
+            if index_if_enabled(outputs['docx'], document):
+                click.echo(f"Indexed {outputs['docx']} for search")
+        except (sqlite3.Error, OSError) as e:
+            click.echo(f"Warning: could not update the search index: {e}")
+
+
+@cli.command()
+@click.argument('source', type=click.Path(exists=True, dir_okay=False, readable=True))
+@click.option('-o', '--output', 'output_file', type=click.Path(),
+              help='Output file path; the extension is replaced per format '
+                   '(default: next to SOURCE; <stem>_formatted for a text file)')
+@click.option('--format', 'output_formats',
+              type=click.Choice(list(EXPORTERS), case_sensitive=False),
+              multiple=True,
+              default=('docx',),
+              help='Output format, repeat for several (default: docx)')
+def render(source, output_file, output_formats):
+    """Re-render documents from saved formatted text, without calling Claude.
+    
+    SOURCE is the .formatted.json.gz file that `format` saves next to its
+    outputs, or any formatted text file (e.g. from a batch run's cache).
+    """
+    import time
+    from .core.formatted_store import FORMATTED_SUFFIX, load_formatted
+    from .exporters import export_formats
+    
+    try:
+        formatted_text, options = load_formatted(source)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='SOURCE')
+    
+    if source.endswith(FORMATTED_SUFFIX) and not output_file:
+        # Next to the outputs `format` rendered from the same base
+        output_base = Path(source[:-len(FORMATTED_SUFFIX)])
+    else:
+        output_base = _output_base(source, output_file, output_formats)
+    output_base.parent.mkdir(parents=True, exist_ok=True)
+    
+    started = time.perf_counter()
+    outputs = export_formats(formatted_text, output_base, output_formats,
+                             title_from_first_line=options.get('title_from_first_line', False))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for output_path in outputs.values():
+        click.echo(f"Rendered {output_path}")
+    click.echo(f"Rendered {len(outputs)} file(s) in {elapsed_ms:.0f} ms")
 
 
 @cli.command()
 @click.argument('input_path', type=click.Path(exists=True, readable=True))
-def display(input_path):
+@click.option('-r', '--recursive', is_flag=True, help='Include Word documents in subfolders')
+@click.option('-n', '--limit', type=click.IntRange(min=1), help='Show at most this many documents')
+@click.option('-g', '--grep', 'pattern', help='Only show paragraphs matching this regular expression (case-insensitive)')
+@click.option('-j', '--workers', type=click.IntRange(min=1), default=os.cpu_count() or 1,
+              show_default=True, help='Documents read in parallel')
+def display(input_path, recursive, limit, pattern, workers):
     """Display formatted content from Word documents in the input folder."""
     path = Path(input_path)
+    try:
+        matcher = re.compile(pattern, re.IGNORECASE) if pattern else None
+    except re.error as e:
+        raise click.BadParameter(f"invalid regular expression: {e}", param_hint='--grep')
     
     if path.is_file() and path.suffix.lower() == '.docx':
-        # Display single Word document
-        _display_word_document(path)
+        # Display single Word document, streaming paragraph by paragraph
+        for line in _display_lines(path, matcher):
+            click.echo(line)
     elif path.is_dir():
-        # Display all Word documents in directory
-        docx_files = list(path.glob('*.docx'))
-        if not docx_files:
-            click.echo(f"No Word documents found in {input_path}")
-            return
-        
-        for docx_file in docx_files:
+        # Display Word documents in directory, read on a worker pool
+        shown = 0
+        for docx_file, lines in _render_documents(_find_documents(path, recursive), matcher, workers):
+            if matcher and not lines:
+                continue
             click.echo(f"\n{'='*60}")
-            click.echo(f"Document: {docx_file.name}")
+            click.echo(f"Document: {docx_file.relative_to(path) if recursive else docx_file.name}")
             click.echo(f"{'='*60}")
-            _display_word_document(docx_file)
+            if lines:
+                click.echo('\n'.join(lines))
+            shown += 1
+            if shown == limit:
+                break
+        if not shown:
+            click.echo(f"No {'matching ' if matcher else ''}Word documents found in {input_path}")
     else:
         click.echo("Please provide a .docx file or directory containing .docx files")
 
 
-def _display_word_document(docx_path):
-    """Display the content of a Word document with formatting indicators."""
+def _find_documents(root, recursive):
+    """Yield .docx files under root in sorted order without listing the whole tree first."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            # Skip Word's "~$name.docx" lock files
+            if filename.lower().endswith('.docx') and not filename.startswith('~$'):
+                yield Path(dirpath) / filename
+        if not recursive:
+            break
+
+
+def _render_documents(paths, matcher, workers):
+    """
+    Render documents on a process pool, yielding (path, lines) in input order.
+
+    At most ``2 * workers`` documents are in flight, so a folder of thousands
+    of files is never held in memory at once.
+    """
+    if workers == 1:
+        for docx_path in paths:
+            yield docx_path, _render_document(docx_path, matcher)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor
+    from collections import deque
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        try:
+            for docx_path in paths:
+                pending.append((docx_path, pool.submit(_render_document, docx_path, matcher)))
+                if len(pending) >= 2 * workers:
+                    docx_path, future = pending.popleft()
+                    yield docx_path, future.result()
+            while pending:
+                docx_path, future = pending.popleft()
+                yield docx_path, future.result()
+        finally:
+            # Stopped early (--limit): drop work that has not started
+            for _, future in pending:
+                future.cancel()
+
+
+def _render_document(docx_path, matcher=None):
+    """Render one document's display lines (run in worker processes)."""
+    return list(_display_lines(docx_path, matcher))
+
+
+def _display_lines(docx_path, matcher=None):
+    """Yield the content of a Word document with formatting indicators."""
     try:
-        doc = Document(docx_path)
-        
-        for i, paragraph in enumerate(doc.paragraphs):
-            if not paragraph.text.strip():
+        for paragraph in iter_docx_formatted(docx_path):
+            text = paragraph.text
+            if not text.strip() or (matcher and not matcher.search(text)):
                 continue
-                
+            
             # Analyze paragraph formatting
-            alignment = ""
-            if paragraph.alignment == 1:  # CENTER
-                alignment = "[CENTER] "
+            alignment = "[CENTER] " if paragraph.centered else ""
             
             # Analyze run formatting
             formatted_text = ""
-            for run in paragraph.runs:
-                text = run.text
-                if run.bold:
-                    text = f"**{text}**"
-                if run.italic:
-                    text = f"*{text}*"
-                formatted_text += text
+            for run_text, bold, italic in paragraph.runs:
+                if bold:
+                    run_text = f"**{run_text}**"
+                if italic:
+                    run_text = f"*{run_text}*"
+                formatted_text += run_text
             
-            # Display with formatting indicators
-            if alignment or any(run.bold for run in paragraph.runs):
-                click.echo(f"{alignment}{formatted_text}")
+            yield f"{alignment}{formatted_text}"
+    
+    except (ValueError, OSError) as e:
+        yield f"Error reading {docx_path}: {e}"
+
+
+@cli.command()
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--index', 'index_path', type=click.Path(dir_okay=False),
+              help='Index database (default: $TRANSCRIPT_INDEX or ./transcript_index.sqlite3)')
+@click.option('--prune', is_flag=True, help='Drop indexed documents under PATHS that no longer exist')
+def index(paths, index_path, prune):
+    """Add formatted Word documents to the search index (only new or changed files are read)."""
+    from .core.search_index import TranscriptIndex
+    
+    with TranscriptIndex(index_path) as transcript_index:
+        counts = transcript_index.update(paths, prune=prune)
+        total = len(transcript_index)
+    click.echo(', '.join(f"{count} {name}" for name, count in counts.items()) +
+               f" ({total} documents in {transcript_index.path})")
+
+
+@cli.command()
+@click.argument('query', required=False)
+@click.option('--speaker', help='Speaker name, or part of one')
+@click.option('--scripture', help='Scripture reference, e.g. "2 Timothy 3" or "John 3:16"')
+@click.option('--heading', help='Text in a numbered section header')
+@click.option('-n', '--limit', type=click.IntRange(min=1), default=20, show_default=True)
+@click.option('--index', 'index_path', type=click.Path(dir_okay=False),
+              help='Index database (default: $TRANSCRIPT_INDEX or ./transcript_index.sqlite3)')
+def search(query, speaker, scripture, heading, limit, index_path):
+    """Search indexed transcripts by words, speaker, Scripture reference or heading."""
+    import time
+    from .core.search_index import TranscriptIndex, default_index_path
+    
+    index_path = index_path or default_index_path()
+    if not os.path.exists(index_path):
+        raise click.ClickException(f"No search index at {index_path}; run 'index' first")
+    
+    with TranscriptIndex(index_path) as transcript_index:
+        started = time.perf_counter()
+        try:
+            results = transcript_index.search(query, speaker=speaker, scripture=scripture,
+                                              heading=heading, limit=limit)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+        elapsed = (time.perf_counter() - started) * 1000
+    
+    for result in results:
+        click.echo(f"\n{result['title']}")
+        click.echo(f"  {result['path']}")
+        if result['speakers']:
+            click.echo(f"  Speakers: {', '.join(result['speakers'])}")
+        if result['scriptures']:
+            click.echo(f"  Scripture: {', '.join(result['scriptures'])}")
+        if result['snippet']:
+            click.echo(f"  {' '.join(result['snippet'].split())}")
+    click.echo(f"\n{len(results)} result{'' if len(results) == 1 else 's'} in {elapsed:.1f} ms")
+
+
+@cli.command()
+@click.argument('inputs', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('-o', '--output-dir', type=click.Path(file_okay=False), default='formatted',
+              show_default=True, help='Where formatted files go')
+@click.option('--format', 'output_formats',
+              type=click.Choice(list(EXPORTERS), case_sensitive=False),
+              multiple=True,
+              default=('docx',),
+              help='Output format, repeat for several (default: docx)')
+@click.option('--pattern', 'patterns', multiple=True, default=('*.txt',), show_default=True,
+              help='File name pattern for inputs found in folders, repeat for several')
+@click.option('--resume', is_flag=True,
+              help='Skip files already done and restart others at their first unfinished stage')
+@click.option('--manifest', 'manifest_path', type=click.Path(dir_okay=False),
+              help='Progress manifest (default: OUTPUT_DIR/.transcript-batch.jsonl)')
+@click.option('-j', '--workers', type=click.IntRange(min=1), default=2, show_default=True,
+              help='Transcripts formatted (or, with --message-batch, exported) at the same time')
+@click.option('--message-batch', is_flag=True,
+              help='Submit everything as one Message Batch (half price, results within 24 hours)')
+@click.option('--poll-interval', type=click.FloatRange(min=1), default=30.0, show_default=True,
+              help='Seconds before the second batch status check; later checks back off')
+def batch(inputs, output_dir, output_formats, patterns, resume, manifest_path, workers,
+          message_batch, poll_interval):
+    """Format many transcripts, recording progress so an interrupted run can --resume."""
+    import fnmatch
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from .core.claude_formatter import ClaudeFormatter
+    from .manifest import Manifest
+    from .pipeline import process_file, run_message_batch
+    
+    files = []
+    for input_path in map(Path, inputs):
+        if input_path.is_dir():
+            files.extend(sorted(p for p in input_path.iterdir() if p.is_file() and
+                                any(fnmatch.fnmatch(p.name, pattern) for pattern in patterns)))
+        else:
+            files.append(input_path)
+    if not files:
+        raise click.ClickException("No input files found")
+    
+    output_dir = Path(output_dir)
+    manifest = Manifest(manifest_path or output_dir / '.transcript-batch.jsonl')
+    try:
+        formatter = ClaudeFormatter(entry_point='batch')
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    
+    def run(input_path):
+        started = time.perf_counter()
+        try:
+            record = process_file(input_path, output_dir / f"{input_path.stem}_formatted",
+                                  output_formats, formatter, manifest, output_dir / '.cache',
+                                  resume=resume, log=click.echo)
+        except Exception as e:
+            return input_path, None, e, time.perf_counter() - started
+        return input_path, record, None, time.perf_counter() - started
+    
+    counts = {'formatted': 0, 'skipped': 0, 'failed': 0}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if message_batch:
+            import anthropic
+            try:
+                outcomes = run_message_batch(files, output_dir, output_formats, formatter, manifest,
+                                             output_dir / '.cache', resume=resume, workers=workers,
+                                             poll_interval=poll_interval, log=click.echo)
+            except anthropic.APIError as e:
+                raise click.ClickException(f"Message batch failed: {e}; run again with --resume")
+        else:
+            outcomes = pool.map(run, files)
+        for input_path, record, error, elapsed in outcomes:
+            if error is not None:
+                counts['failed'] += 1
+                click.echo(f"Failed {input_path}: {error}")
+            elif record['resumed']:
+                counts['skipped'] += 1
             else:
-                click.echo(formatted_text)
-        
-    except Exception as e:
-        click.echo(f"Error reading {docx_path}: {e}")
+                counts['formatted'] += 1
+                click.echo(f"Formatted {input_path} in {elapsed:.1f}s -> "
+                           f"{', '.join(record['outputs'][fmt] for fmt in output_formats)}")
+    
+    click.echo(f"\n{counts['formatted']} formatted, {counts['skipped']} already done, "
+               f"{counts['failed']} failed in {time.perf_counter() - started:.1f}s "
+               f"(manifest: {manifest.path})")
+    if counts['failed']:
+        click.echo("Run again with --resume to retry only the unfinished work.")
+        raise SystemExit(1)
+
+
+@cli.command()
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('-o', '--output-dir', type=click.Path(file_okay=False),
+              help='Where formatted files go, not DIRECTORY itself (default: DIRECTORY/formatted)')
+@click.option('--format', 'output_formats',
+              type=click.Choice(list(EXPORTERS), case_sensitive=False),
+              multiple=True,
+              default=('docx',),
+              help='Output format, repeat for several (default: docx)')
+@click.option('--pattern', 'patterns', multiple=True, default=('*.txt',), show_default=True,
+              help='File name pattern to pick up, repeat for several')
+@click.option('-j', '--workers', type=click.IntRange(min=1), default=2, show_default=True,
+              help='Transcripts formatted at the same time')
+@click.option('--settle', type=click.FloatRange(min=0), default=2.0, show_default=True,
+              help='Seconds a file must stay unchanged before it is read')
+@click.option('--poll-interval', type=click.FloatRange(min=0.1), default=2.0, show_default=True,
+              help='Seconds between folder scans when polling')
+@click.option('--polling', is_flag=True, help='Poll the folder even where inotify is available')
+@click.option('--once', is_flag=True, help='Format what is in the folder now, then exit')
+def watch(directory, output_dir, output_formats, patterns, workers, settle, poll_interval,
+          polling, once):
+    """Format new transcripts as they are dropped into DIRECTORY."""
+    from .watcher import FolderWatcher
+    
+    try:
+        watcher = FolderWatcher(directory, output_dir, output_formats, patterns, workers,
+                                settle, poll_interval, use_inotify=not polling, log=click.echo)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    try:
+        watcher.run(once=once)
+    except KeyboardInterrupt:
+        click.echo("Stopped")
+
+
+@cli.command()
+@click.option('--days', type=click.IntRange(min=1), default=14, show_default=True,
+              help='Days to include, counting today')
+@click.option('--by', 'group_by', type=click.Choice(['day', 'entry_point', 'document_type', 'model']),
+              default='day', show_default=True, help='How to group the report')
+@click.option('--ledger', 'ledger_path', type=click.Path(dir_okay=False),
+              help='Usage ledger (default: $TRANSCRIPT_USAGE_LEDGER or ./usage_ledger.sqlite3)')
+def usage(days, group_by, ledger_path):
+    """Report Claude token usage, cost and latency from the usage ledger."""
+    from .usage import UsageLedger, default_ledger_path
+    
+    ledger_path = ledger_path or default_ledger_path()
+    if not ledger_path or not os.path.exists(ledger_path):
+        raise click.ClickException(f"No usage ledger at {ledger_path or '(recording is off)'}")
+    
+    with UsageLedger(ledger_path) as ledger:
+        groups = ledger.report(days, by=group_by)
+    if not groups:
+        click.echo(f"No Claude calls recorded in the last {days} days")
+        return
+    
+    def number(value, spec):
+        return '-' if value is None else f"{value:{spec}}"
+    
+    # Tokens of cancelled calls are shown apart; they are left out of the per-KB figures
+    header = (f"{group_by:<28} {'calls':>6} {'errors':>6} {'cancel':>6} {'input':>10} {'output':>9} "
+              f"{'cached':>9} {'cancel tok':>10} {'cost $':>9} {'p50 s':>7} {'p95 s':>7} "
+              f"{'in/KB':>7} {'out/KB':>7}")
+    click.echo(header)
+    click.echo('-' * len(header))
+    totals = dict(calls=0, errors=0, cancelled=0, input_tokens=0, output_tokens=0,
+                  cache_read_tokens=0, cancelled_tokens=0, cost_usd=0.0)
+    for group in groups:
+        group['cancelled_tokens'] = group['cancelled_input_tokens'] + group['cancelled_output_tokens']
+        for key in totals:
+            totals[key] += group[key]
+        click.echo(f"{str(group['group'])[:28]:<28} {group['calls']:>6} {group['errors']:>6} "
+                   f"{group['cancelled']:>6} {group['input_tokens']:>10,} {group['output_tokens']:>9,} "
+                   f"{group['cache_read_tokens']:>9,} {group['cancelled_tokens']:>10,} {group['cost_usd']:>9.2f} "
+                   f"{number(group['p50_latency'], '.1f'):>7} {number(group['p95_latency'], '.1f'):>7} "
+                   f"{number(group['input_per_kb'], '.0f'):>7} {number(group['output_per_kb'], '.0f'):>7}")
+    click.echo('-' * len(header))
+    click.echo(f"{'total':<28} {totals['calls']:>6} {totals['errors']:>6} {totals['cancelled']:>6} "
+               f"{totals['input_tokens']:>10,} {totals['output_tokens']:>9,} "
+               f"{totals['cache_read_tokens']:>9,} {totals['cancelled_tokens']:>10,} {totals['cost_usd']:>9.2f}")
 
 
 def main():
     """Entry point for backward compatibility."""
     import sys
-    if len(sys.argv) > 1 and sys.argv[1] not in ['format', 'display', '--help']:
+    if len(sys.argv) > 1 and sys.argv[1] not in ['format', 'render', 'display', 'index', 'search', 'batch', 'watch', 'usage', '--help']:
         # Old-style usage - treat as format command
         sys.argv.insert(1, 'format')
     cli()
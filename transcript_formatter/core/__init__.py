@@ -1,5 +1,30 @@
 """Core transcript processing modules."""
 
-from .claude_formatter import ClaudeFormatter, format_with_claude
+from .cancellation import Cancelled, CancelToken
+from .document import TranscriptDocument, parse_document, render_markup
+from .edit_script import apply_edit_script, parse_edit_script, prepare_source
+from .extractor import extract_docx_text, extract_text, iter_docx_formatted, iter_docx_paragraphs
+from .routing import Route, choose_route
 
-__all__ = ['ClaudeFormatter', 'format_with_claude']
\ No newline at end of file
+__all__ = [
+    'ClaudeFormatter', 'format_with_claude', 'TranscriptDocument', 'parse_document', 'render_markup',
+    'extract_docx_text', 'extract_text', 'iter_docx_formatted', 'iter_docx_paragraphs',
+    'Route', 'choose_route', 'TranscriptIndex',
+    'apply_edit_script', 'parse_edit_script', 'prepare_source', 'Cancelled', 'CancelToken',
+]
+
+# claude_formatter pulls in the anthropic SDK (over a second to import), so it
+# is only loaded when used; importing the lightweight modules stays fast
+_LAZY = {
+    'ClaudeFormatter': 'claude_formatter',
+    'format_with_claude': 'claude_formatter',
+    'TranscriptIndex': 'search_index',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        from importlib import import_module
+        module = import_module(f'.{_LAZY[name]}', __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,154 @@
+"""
+Cooperative cancellation of formatting work.
+
+A CancelToken is passed down to the code that talks to Claude. Cancelling
+it runs the callbacks registered with ``on_cancel()``; ``collect_stream()``
+registers the message stream's ``close``, so a generation in progress stops
+at once instead of running to completion, and work split into several
+requests checks ``raise_if_cancelled()`` between them. The Cancelled
+exception carries the tokens the cut-off call had used, for the usage
+ledger.
+"""
+
+import logging
+import threading
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a token, for usage estimates when the API reported none
+CHARS_PER_TOKEN = 4
+
+
+class Cancelled(Exception):
+    """
+    The job was cancelled before it finished.
+
+    ``usage`` is the token usage of the Claude call that was cut off, or
+    None when no call was in progress.
+    """
+
+    def __init__(self, reason: Optional[str] = None, usage=None):
+        super().__init__(reason or 'cancelled')
+        self.reason = reason or 'cancelled'
+        self.usage = usage
+
+
+class CancelToken:
+    """A cancellation flag with callbacks, safe to cancel from any thread."""
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = 'cancelled'):
+        """Cancel the job and run the registered callbacks (once)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                # Closing an already finished stream and the like
+                logger.debug(f"Cancel callback failed: {e}")
+
+    def raise_if_cancelled(self):
+        """
+        Raises:
+            Cancelled: If the token was cancelled
+        """
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Run ``callback`` when the token is cancelled (now, if it already is).
+
+        Returns:
+            A function that unregisters the callback; call it once the
+            work the callback would interrupt is over
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._unregister(callback)
+        callback()
+        return lambda: None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until cancelled or ``timeout``; True if cancelled."""
+        return self._event.wait(timeout)
+
+    def _unregister(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def collect_stream(stream, prompt_text: str, cancel: Optional[CancelToken] = None,
+                   on_text: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Join a message stream's text, closing the stream if ``cancel`` fires.
+
+    Args:
+        stream: An open ``messages.stream()`` stream
+        prompt_text: The text sent, for usage estimates
+        cancel: Optional token to stop early
+        on_text: Optional callback for each text delta as it arrives
+
+    Returns:
+        The streamed text
+
+    Raises:
+        Cancelled: With the partial usage, if the token was cancelled
+    """
+    received = []
+    close = getattr(stream, 'close', None)
+    unregister = cancel.on_cancel(close) if cancel and close else None
+    try:
+        for text in stream.text_stream:
+            if on_text is not None:
+                on_text(text)
+            received.append(text)
+            if cancel and cancel.cancelled:
+                break
+    except Exception:
+        # Closing the stream from another thread breaks the read in progress
+        if not (cancel and cancel.cancelled):
+            raise
+    finally:
+        if unregister:
+            unregister()
+    if cancel and cancel.cancelled:
+        raise Cancelled(cancel.reason, partial_usage(stream, prompt_text, ''.join(received)))
+    return ''.join(received)
+
+
+def partial_usage(stream, prompt_text: str, received_text: str):
+    """
+    Token usage of a stream that was cut off.
+
+    The stream's message snapshot carries the input tokens and the output
+    tokens generated so far; when no snapshot arrived, both are estimated
+    from the text lengths.
+    """
+    try:
+        usage = stream.current_message_snapshot.usage
+        if usage is not None:
+            return usage
+    except (AssertionError, AttributeError):
+        pass
+    return SimpleNamespace(input_tokens=len(prompt_text) // CHARS_PER_TOKEN,
+                           output_tokens=len(received_text) // CHARS_PER_TOKEN)
@@ -0,0 +1,165 @@
+"""
+Concurrent, deadline-aware formatting of transcript chunks.
+
+Long transcripts are split with ``split_transcript`` and each chunk is
+formatted by its own Claude request on a thread pool. A chunk is only
+started if its estimated generation time still fits before the deadline,
+so a caller with a hard time budget (a serverless function) gets back
+whatever finished and can resume the rest later.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from ..usage import record_usage
+from .cancellation import CancelToken
+
+
+# Rough generation-speed model used to decide whether a chunk still fits
+CHARS_PER_TOKEN = 4.0
+OUTPUT_TOKENS_PER_SECOND = 120.0
+REQUEST_OVERHEAD_SECONDS = 2.0
+
+
+def chunk_prompt(prompt_template: str, chunk: str, index: int, total: int) -> str:
+    """User prompt for one chunk; a part of a longer transcript is told so."""
+    prompt = prompt_template.format(transcript=chunk)
+    if total > 1:
+        prompt = (
+            f"This is part {index + 1} of {total} of a longer transcript. "
+            "Format only this part and do not add a title, introduction or "
+            "closing remarks unless they are in this part.\n\n" + prompt
+        )
+    return prompt
+
+
+class ChunkedFormatter:
+    """
+    Format transcript chunks concurrently with one Claude request per chunk.
+
+    Args:
+        client: An ``anthropic.Anthropic`` client
+        model: Model name
+        prompt_template: User prompt with a ``{transcript}`` placeholder
+        max_tokens: Output token limit per chunk
+        system_prompt: Optional system prompt
+        temperature: Sampling temperature
+        max_workers: Number of chunks formatted at the same time
+        entry_point: Usage-ledger tag for where calls come from
+        document_type: Usage-ledger tag for the kind of transcript formatted
+        ledger_path: Usage ledger file; defaults to ``usage.default_ledger_path()``
+    """
+
+    def __init__(self, client, model: str, prompt_template: str, max_tokens: int = 4000,
+                 system_prompt: Optional[str] = None, temperature: float = 0.3,
+                 max_workers: int = 4, entry_point: str = 'serverless',
+                 document_type: str = 'general', ledger_path: Optional[str] = None):
+        self.client = client
+        self.model = model
+        self.prompt_template = prompt_template
+        self.max_tokens = max_tokens
+        self.system_prompt = system_prompt
+        self.temperature = temperature
+        self.max_workers = max_workers
+        self.entry_point = entry_point
+        self.document_type = document_type
+        self.ledger_path = ledger_path
+
+    def estimate_seconds(self, chunk: str) -> float:
+        """Estimated wall time to format one chunk."""
+        tokens = min(len(chunk) / CHARS_PER_TOKEN, self.max_tokens)
+        return REQUEST_OVERHEAD_SECONDS + tokens / OUTPUT_TOKENS_PER_SECOND
+
+    def chunk_chars_for(self, seconds: float) -> int:
+        """Largest chunk, in characters, estimated to format within ``seconds``."""
+        tokens = min((seconds - REQUEST_OVERHEAD_SECONDS) * OUTPUT_TOKENS_PER_SECOND,
+                     self.max_tokens)
+        return max(int(tokens * CHARS_PER_TOKEN), 1000)
+
+    def estimate_total_seconds(self, chunks: Sequence[str]) -> float:
+        """Estimated wall time for all chunks given the worker count."""
+        estimates = sorted((self.estimate_seconds(chunk) for chunk in chunks), reverse=True)
+        lanes = [0.0] * max(1, min(self.max_workers, len(estimates)))
+        for estimate in estimates:
+            lanes[lanes.index(min(lanes))] += estimate
+        return max(lanes) if estimates else 0.0
+
+    def format_chunks(self, chunks: Sequence[str], results: Optional[List[Optional[str]]] = None,
+                      deadline: Optional[float] = None,
+                      cancel: Optional[CancelToken] = None,
+                      failures: Optional[List[int]] = None) -> Tuple[List[Optional[str]], List[str]]:
+        """
+        Format every chunk that is not done yet and fits before the deadline.
+
+        Args:
+            chunks: Raw transcript chunks
+            results: Results from an earlier run; ``None`` marks chunks still to do
+            deadline: ``time.monotonic()`` value by which all work must finish
+            cancel: Optional token; once cancelled, chunks not yet sent are
+                skipped (left ``None``) and the caller decides what to raise
+            failures: Optional failed-attempt count per chunk, incremented in
+                place for each chunk that fails
+
+        Returns:
+            Tuple of the updated results list (``None`` where a chunk was not
+            finished) and a list of error messages from failed chunks
+        """
+        results = list(results) if results is not None else [None] * len(chunks)
+        pending = [i for i, result in enumerate(results) if result is None]
+        errors = []
+        if not pending:
+            return results, errors
+
+        total = len(chunks)
+        # The first pending chunk always runs while time is left, so a job
+        # whose chunks are all estimated over budget still makes progress
+        first = pending[0]
+
+        def work(index):
+            if cancel is not None and cancel.cancelled:
+                return index, None, None
+            chunk = chunks[index]
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0 or (index != first and timeout < self.estimate_seconds(chunk)):
+                    return index, None, None
+            try:
+                return index, self._format_one(chunk, index, total, timeout), None
+            except Exception as e:
+                return index, None, f"Chunk {index + 1}/{total}: {e}"
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+            for index, text, error in pool.map(work, pending):
+                results[index] = text
+                if error:
+                    errors.append(error)
+                    if failures is not None:
+                        failures[index] += 1
+        return results, errors
+
+    def _format_one(self, chunk: str, index: int, total: int, timeout: Optional[float]) -> str:
+        """Send one chunk to Claude and return the formatted text."""
+        prompt = chunk_prompt(self.prompt_template, chunk, index, total)
+        request = dict(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            messages=[{"role": "user", "content": prompt}],
+        )
+        if self.system_prompt:
+            request['system'] = self.system_prompt
+        if timeout is not None:
+            request['timeout'] = timeout
+
+        started = time.perf_counter()
+        try:
+            response = self.client.messages.create(**request)
+        except Exception:
+            record_usage(self.entry_point, self.model, None, time.perf_counter() - started,
+                         chunk, self.document_type, status='error', path=self.ledger_path)
+            raise
+        record_usage(self.entry_point, self.model, response.usage, time.perf_counter() - started,
+                     chunk, self.document_type, path=self.ledger_path)
+        return response.content[0].text
@@ -0,0 +1,130 @@
+"""
+Split long transcripts into chunks that can be formatted independently.
+
+Chunks break on paragraph boundaries where possible, then on line and
+sentence boundaries, so each request to Claude sees whole thoughts.
+
+``split_stable`` chooses its boundaries from the content instead of by
+filling chunks up, so an edit only changes the chunks around it and the
+rest of an edited transcript splits exactly as before (see
+``incremental.py``).
+"""
+
+import re
+import zlib
+from typing import Iterable, List
+
+
+DEFAULT_CHUNK_CHARS = 8000
+
+_SENTENCE_END = re.compile(r'(?<=[.!?♪"”])\s+')
+_BOUNDARY = re.compile(r'(?<=[.!?♪"”])\s+|\n\s*')
+
+
+def split_transcript(text: str, max_chars: int = DEFAULT_CHUNK_CHARS) -> List[str]:
+    """
+    Split a transcript into chunks of at most ``max_chars`` characters.
+
+    Args:
+        text: The raw transcript text
+        max_chars: Upper bound on chunk length
+
+    Returns:
+        Non-empty chunks in order; ``''.join`` of them loses only whitespace
+        at the split points
+    """
+    if max_chars <= 0:
+        raise ValueError("max_chars must be positive")
+
+    text = text.strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    chunks = []
+    current = []
+    current_len = 0
+
+    for piece, sep in _pieces(text, max_chars):
+        added = len(piece) + (len(sep) if current else 0)
+        if current and current_len + added > max_chars:
+            chunks.append(''.join(current).strip())
+            current, current_len = [], 0
+            added = len(piece)
+        if current:
+            current.append(sep)
+        current.append(piece)
+        current_len += added
+
+    if current:
+        chunks.append(''.join(current).strip())
+    return [chunk for chunk in chunks if chunk]
+
+
+def _pieces(text: str, max_chars: int):
+    """Yield (piece, separator before it) pairs no longer than max_chars."""
+    for paragraph in re.split(r'\n\s*\n', text):
+        sep = '\n\n'
+        if len(paragraph) <= max_chars:
+            yield paragraph, sep
+            continue
+        for line in paragraph.split('\n'):
+            if len(line) <= max_chars:
+                yield line, sep
+                sep = '\n'
+                continue
+            for sentence in _SENTENCE_END.split(line):
+                # A single run-on "sentence" longer than a chunk is cut hard
+                for start in range(0, len(sentence), max_chars):
+                    yield sentence[start:start + max_chars], sep
+                    sep = ''
+                sep = ' '
+            sep = '\n'
+
+
+def split_stable(text: str, target_chars: int = DEFAULT_CHUNK_CHARS) -> List[str]:
+    """
+    Split a transcript at content-defined sentence boundaries.
+
+    Once a chunk holds half of ``target_chars``, it ends after a sentence
+    whose checksum falls in a window proportional to the sentence's length,
+    so chunks average about ``target_chars`` and never exceed twice that.
+    Whether a sentence ends a chunk depends only on the sentence and the
+    length since the previous cut, so after an edit the boundaries fall
+    back into step at the next cut, and later chunks come out identical.
+
+    Args:
+        text: The raw transcript text
+        target_chars: Average chunk length to aim for
+
+    Returns:
+        Non-empty chunks in order, each stripped of surrounding whitespace
+    """
+    if target_chars <= 1:
+        raise ValueError("target_chars must be greater than 1")
+
+    text = text.strip()
+    min_chars, max_chars = target_chars // 2, target_chars * 2
+    chunks = []
+    start = sentence_start = 0
+    for boundary in _BOUNDARY.finditer(text):
+        # Run-on text without sentence breaks is cut hard
+        while boundary.start() - start > max_chars:
+            chunks.append(text[start:start + max_chars])
+            start = sentence_start = start + max_chars
+        sentence = text[sentence_start:boundary.start()]
+        sentence_start = boundary.end()
+        if boundary.start() - start < min_chars:
+            continue
+        if zlib.crc32(sentence.encode('utf-8')) % min_chars < len(sentence):
+            chunks.append(text[start:boundary.start()])
+            start = boundary.end()
+    while len(text) - start > max_chars:
+        chunks.append(text[start:start + max_chars])
+        start += max_chars
+    chunks.append(text[start:])
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+
+def merge_formatted_chunks(formatted_chunks: Iterable[str]) -> str:
+    """Join separately formatted chunks back into one transcript."""
+    return '\n\n'.join(chunk.strip() for chunk in formatted_chunks if chunk and chunk.strip())
@@ -7,11 +7,25 @@ encoding fixes, and paragraph structuring.
 """
 
 import os
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 from dotenv import load_dotenv
 import anthropic
 from anthropic import Anthropic
 
+from ..usage import BATCH_COST_FACTOR, record_usage
+from .cancellation import Cancelled, CancelToken, collect_stream
+from .document import TranscriptDocument, parse_document, render_markup
+from .routing import choose_route
+
+
+USER_PROMPT = "Please format this transcript:\n\n{transcript}"
+
+# 'rewrite': Claude returns the whole formatted transcript.
+# 'edits': Claude returns an edit script applied locally (see edit_script.py).
+# 'structured': Claude returns the document model through a tool (see structured.py).
+MODES = ('rewrite', 'edits', 'structured')
+
 
 class ClaudeFormatter:
     """
@@ -26,13 +40,26 @@ class ClaudeFormatter:
     - Merge fragmented lines
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, entry_point: str = 'cli',
+                 document_type: str = 'world_impact', model: Optional[str] = None,
+                 mode: str = 'rewrite'):
         """
         Initialize the Claude formatter.
         
         Args:
             api_key: Optional API key. If not provided, will load from environment.
+            entry_point: Usage-ledger tag for where calls come from (cli, batch, watch, ...)
+            document_type: Kind of transcript formatted, for routing and the usage ledger
+            model: Pin a model; by default each transcript is routed by the
+                policy in ``routing.py``
+            mode: ``rewrite`` (Claude returns the formatted transcript),
+                ``edits`` (Claude returns an edit script, far fewer output tokens)
+                or ``structured`` (Claude returns the document model; use
+                ``format_document()`` to skip the markdown round trip)
         """
+        if mode not in MODES:
+            raise ValueError(f"Unknown formatting mode {mode!r}; expected one of {', '.join(MODES)}")
+        
         # Load environment variables
         load_dotenv()
         
@@ -47,15 +74,21 @@ class ClaudeFormatter:
         
         # Initialize Anthropic client
         self.client = Anthropic(api_key=self.api_key)
-        self.model = "claude-sonnet-4-5-20250929"  # Using Claude Sonnet 4.5 - latest model
+        self.model = model
+        self.entry_point = entry_point
+        self.document_type = document_type
+        self.mode = mode
     
-    def format_transcript(self, transcript_text: str, progress_callback=None) -> str:
+    def format_transcript(self, transcript_text: str, progress_callback=None,
+                          cancel: Optional[CancelToken] = None) -> str:
         """
         Format a transcript using Claude AI.
         
         Args:
             transcript_text: The raw transcript text to format
             progress_callback: Optional callback function for progress updates
+            cancel: Optional token; cancelling it closes the Claude stream in
+                progress and skips requests not yet sent
             
         Returns:
             Formatted transcript text in markdown format
@@ -63,6 +96,7 @@ class ClaudeFormatter:
         Raises:
             anthropic.APIError: If the API request fails
             ValueError: If the transcript text is empty
+            Cancelled: If ``cancel`` fired before formatting finished
         """
         if not transcript_text or not transcript_text.strip():
             raise ValueError("Transcript text cannot be empty")
@@ -70,40 +104,108 @@ class ClaudeFormatter:
         if progress_callback:
             progress_callback("Preparing transcript for Claude AI...")
         
+        # Model, output limit and chunking come from the routing policy
+        route = choose_route(len(transcript_text), self.document_type, self.entry_point)
+        model = self.model or route.model
+        if self.mode == 'edits':
+            formatted_text = self._format_with_edits(transcript_text, route, model, progress_callback,
+                                                     cancel)
+            if formatted_text is not None:
+                return formatted_text
+        elif self.mode == 'structured' and not route.chunk_chars:
+            document = self._format_structured(transcript_text, route, model, progress_callback,
+                                               cancel)
+            if document is not None:
+                return render_markup(document)
+        return self._format_rewrite(transcript_text, route, model, progress_callback, cancel)
+    
+    def format_document(self, transcript_text: str, progress_callback=None,
+                        cancel: Optional[CancelToken] = None) -> TranscriptDocument:
+        """
+        Format a transcript into the document model the exporters render.
+        
+        In structured mode this is Claude's validated structured output, with
+        no markdown in between; other modes parse the formatted text. Long
+        transcripts that the routing policy chunks are formatted as text.
+        
+        Raises:
+            anthropic.APIError: If the API request fails
+            ValueError: If the transcript text is empty
+            Cancelled: If ``cancel`` fired before formatting finished
+        """
+        if self.mode != 'structured':
+            return parse_document(self.format_transcript(transcript_text, progress_callback, cancel))
+        if not transcript_text or not transcript_text.strip():
+            raise ValueError("Transcript text cannot be empty")
+        
+        if progress_callback:
+            progress_callback("Preparing transcript for Claude AI...")
+        route = choose_route(len(transcript_text), self.document_type, self.entry_point)
+        model = self.model or route.model
+        if not route.chunk_chars:
+            document = self._format_structured(transcript_text, route, model, progress_callback,
+                                               cancel)
+            if document is not None:
+                return document
+        return parse_document(self._format_rewrite(transcript_text, route, model, progress_callback,
+                                                   cancel))
+    
+    def _format_rewrite(self, transcript_text: str, route, model: str, progress_callback=None,
+                        cancel: Optional[CancelToken] = None) -> str:
+        """Have Claude return the whole formatted transcript as text."""
         # Prepare the formatting instructions
         system_prompt = self._get_system_prompt()
         
+        if route.chunk_chars:
+            return self._format_chunked(transcript_text, system_prompt, route, model,
+                                        progress_callback, cancel)
+        
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        started = time.perf_counter()
         try:
             if progress_callback:
                 progress_callback("Sending transcript to Claude AI...")
             
             # Send request to Claude with streaming for long requests
             with self.client.messages.stream(
-                model=self.model,
-                max_tokens=8192,  # Max tokens for Claude Sonnet 4.5
+                model=model,
+                max_tokens=route.max_tokens,
                 temperature=0.1,  # Low temperature for consistent formatting
                 system=system_prompt,
                 messages=[
                     {
                         "role": "user",
-                        "content": f"Please format this transcript:\n\n{transcript_text}"
+                        "content": USER_PROMPT.format(transcript=transcript_text)
                     }
                 ]
             ) as stream:
                 if progress_callback:
                     progress_callback("Processing Claude AI response...")
                 
-                # Collect the streamed response
-                formatted_text = ""
-                for text in stream.text_stream:
-                    formatted_text += text
+                # Collect the streamed response; cancelling closes the stream
+                formatted_text = collect_stream(stream, transcript_text, cancel)
+                
+                usage = stream.get_final_message().usage
+            
+            record_usage(self.entry_point, model, usage, time.perf_counter() - started,
+                         transcript_text, self.document_type)
             
             if progress_callback:
                 progress_callback("Transcript formatting completed!")
             
             return formatted_text
             
+        except Cancelled as e:
+            record_usage(self.entry_point, model, e.usage, time.perf_counter() - started,
+                         transcript_text, self.document_type, status='cancelled')
+            if progress_callback:
+                progress_callback("Formatting cancelled")
+            raise
+            
         except Exception as e:
+            record_usage(self.entry_point, model, None, time.perf_counter() - started,
+                         transcript_text, self.document_type, status='error')
             if "anthropic" in str(type(e)).lower() or "api" in str(e).lower():
                 error_msg = f"API error: {str(e)}"
             else:
@@ -118,6 +220,263 @@ class ClaudeFormatter:
                 progress_callback(f"Error: {error_msg}")
             raise RuntimeError(error_msg) from e
     
+    def _format_chunked(self, transcript_text: str, system_prompt: str, route, model: str,
+                        progress_callback=None, cancel: Optional[CancelToken] = None) -> str:
+        """Format a transcript too long for one request as concurrent chunks."""
+        from .chunked_formatter import ChunkedFormatter
+        from .chunking import merge_formatted_chunks, split_transcript
+        
+        chunks = split_transcript(transcript_text, route.chunk_chars)
+        if progress_callback:
+            progress_callback(f"Sending transcript to Claude AI in {len(chunks)} parts...")
+        
+        formatter = ChunkedFormatter(self.client, model, USER_PROMPT, max_tokens=route.max_tokens,
+                                     system_prompt=system_prompt, temperature=0.1,
+                                     entry_point=self.entry_point, document_type=self.document_type)
+        results, errors = formatter.format_chunks(chunks, cancel=cancel)
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if errors:
+            error_msg = f"Claude API error: {'; '.join(errors)}"
+            if progress_callback:
+                progress_callback(f"Error: {error_msg}")
+            raise RuntimeError(error_msg)
+        
+        if progress_callback:
+            progress_callback("Transcript formatting completed!")
+        return merge_formatted_chunks(results)
+    
+    def format_incremental(self, transcript_text: str, episode: str, cache_path: str,
+                           progress_callback=None, cancel: Optional[CancelToken] = None) -> str:
+        """
+        Format a transcript, re-sending only the parts that changed.
+        
+        Chunks formatted for this or any earlier version (see
+        ``incremental.py``) are reused from the cache, so re-uploading a
+        corrected transcript only sends the edited parts to Claude.
+        
+        Args:
+            transcript_text: The raw transcript text to format
+            episode: Identifies the transcript across versions, e.g. its file name
+            cache_path: Chunk cache file
+            progress_callback: Optional callback function for progress updates
+            cancel: Optional token to stop sending parts
+        
+        Returns:
+            Formatted transcript text in markdown format
+        
+        Raises:
+            RuntimeError: If any changed part could not be formatted
+            ValueError: If the transcript text is empty
+            Cancelled: If ``cancel`` fired; parts already formatted stay cached
+        """
+        from .chunked_formatter import ChunkedFormatter
+        from .incremental import ChunkCache, format_incremental
+        
+        if not transcript_text or not transcript_text.strip():
+            raise ValueError("Transcript text cannot be empty")
+        
+        route = choose_route(len(transcript_text), self.document_type, self.entry_point)
+        formatter = ChunkedFormatter(self.client, self.model or route.model, USER_PROMPT,
+                                     max_tokens=route.max_tokens,
+                                     system_prompt=self._get_system_prompt(), temperature=0.1,
+                                     entry_point=self.entry_point, document_type=self.document_type)
+        with ChunkCache(cache_path) as cache:
+            formatted_text, _ = format_incremental(formatter, cache, episode, transcript_text,
+                                                   progress_callback=progress_callback,
+                                                   cancel=cancel)
+        if progress_callback:
+            progress_callback("Transcript formatting completed!")
+        return formatted_text
+    
+    def _format_structured(self, transcript_text: str, route, model: str, progress_callback=None,
+                           cancel: Optional[CancelToken] = None) -> Optional[TranscriptDocument]:
+        """Format via the structured-output tool; None if Claude's output was rejected."""
+        from .structured import document_from_message, request_structured
+        
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if progress_callback:
+            progress_callback("Requesting structured output from Claude AI...")
+        started = time.perf_counter()
+        try:
+            message = request_structured(self.client, model, route.max_tokens, self._get_system_prompt(),
+                                         USER_PROMPT.format(transcript=transcript_text))
+        except Exception as e:
+            record_usage(self.entry_point, model, None, time.perf_counter() - started,
+                         transcript_text, self.document_type, status='error')
+            raise RuntimeError(f"Claude API error: {str(e)}") from e
+        record_usage(self.entry_point, model, message.usage, time.perf_counter() - started,
+                     transcript_text, self.document_type)
+        
+        try:
+            document = document_from_message(message)
+        except ValueError as e:
+            if progress_callback:
+                progress_callback(f"Structured output rejected ({e}); formatting as text instead")
+            return None
+        if progress_callback:
+            progress_callback("Transcript formatting completed!")
+        return document
+    
+    def _format_with_edits(self, transcript_text: str, route, model: str, progress_callback=None,
+                           cancel: Optional[CancelToken] = None) -> Optional[str]:
+        """
+        Format via an edit script; None if Claude's script was rejected.
+        
+        The whole transcript goes in one request: its output is a few tokens
+        per paragraph, so the route's chunking for long outputs does not apply.
+        """
+        from .edit_script import (EDIT_SCRIPT_PROMPT, EDIT_USER_PROMPT, apply_edit_script,
+                                  number_sentences, parse_edit_script, prepare_source)
+        
+        sentences = prepare_source(transcript_text)
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+        if progress_callback:
+            progress_callback(f"Requesting an edit script for {len(sentences)} sentences...")
+        
+        started = time.perf_counter()
+        try:
+            with self.client.messages.stream(
+                model=model,
+                max_tokens=route.max_tokens,
+                temperature=0.1,
+                system=EDIT_SCRIPT_PROMPT,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": EDIT_USER_PROMPT.format(transcript=number_sentences(sentences))
+                    }
+                ]
+            ) as stream:
+                script = collect_stream(stream, transcript_text, cancel)
+                usage = stream.get_final_message().usage
+        except Cancelled as e:
+            record_usage(self.entry_point, model, e.usage, time.perf_counter() - started,
+                         transcript_text, self.document_type, status='cancelled')
+            raise
+        except Exception as e:
+            record_usage(self.entry_point, model, None, time.perf_counter() - started,
+                         transcript_text, self.document_type, status='error')
+            raise RuntimeError(f"Claude API error: {str(e)}") from e
+        record_usage(self.entry_point, model, usage, time.perf_counter() - started,
+                     transcript_text, self.document_type)
+        
+        try:
+            formatted_text, skipped = apply_edit_script(
+                sentences, parse_edit_script(script, len(sentences)))
+        except ValueError as e:
+            if progress_callback:
+                progress_callback(f"Edit script rejected ({e}); formatting in full instead")
+            return None
+        if skipped and progress_callback:
+            progress_callback(f"Skipped {len(skipped)} edits that did not match the transcript")
+        if progress_callback:
+            progress_callback("Transcript formatting completed!")
+        return formatted_text
+    
+    # Message Batches: half the price, no open connections, results within 24 hours
+    
+    def batch_requests(self, key: str, transcript_text: str) -> List[Dict[str, Any]]:
+        """
+        Message Batches requests for one transcript, routed like ``format_transcript``.
+        
+        Args:
+            key: Prefix for the requests' ``custom_id`` (letters, digits, ``-``
+                and ``_``, at most 58 characters)
+            transcript_text: The raw transcript text
+            
+        Returns:
+            One request per chunk, with ``custom_id`` ``<key>-<chunk number>``
+        """
+        from .chunked_formatter import chunk_prompt
+        from .chunking import split_transcript
+        
+        if not transcript_text or not transcript_text.strip():
+            raise ValueError("Transcript text cannot be empty")
+        route = choose_route(len(transcript_text), self.document_type, self.entry_point)
+        chunks = split_transcript(transcript_text, route.chunk_chars) if route.chunk_chars else [transcript_text]
+        system_prompt = self._get_system_prompt()
+        return [
+            {
+                "custom_id": f"{key}-{index}",
+                "params": {
+                    "model": self.model or route.model,
+                    "max_tokens": route.max_tokens,
+                    "temperature": 0.1,
+                    "system": system_prompt,
+                    "messages": [
+                        {"role": "user", "content": chunk_prompt(USER_PROMPT, chunk, index, len(chunks))}
+                    ],
+                },
+            }
+            for index, chunk in enumerate(chunks)
+        ]
+    
+    def submit_batch(self, requests: List[Dict[str, Any]]) -> str:
+        """Submit requests from ``batch_requests`` as one Message Batch and return its id."""
+        return self.client.messages.batches.create(requests=requests).id
+    
+    def wait_for_batch(self, batch_id: str, poll_interval: float = 30.0,
+                       max_poll_interval: float = 600.0, progress_callback=None):
+        """
+        Poll a Message Batch until it has ended, backing off between polls.
+        
+        Args:
+            batch_id: The batch to wait for
+            poll_interval: Seconds before the second poll; grows by half each time
+            max_poll_interval: Longest wait between polls
+            progress_callback: Optional callback function for progress updates
+            
+        Returns:
+            The ended MessageBatch
+        """
+        interval = poll_interval
+        while True:
+            batch = self.client.messages.batches.retrieve(batch_id)
+            if batch.processing_status == 'ended':
+                return batch
+            if progress_callback:
+                counts = batch.request_counts
+                progress_callback(f"Batch {batch_id}: {counts.processing} processing, "
+                                  f"{counts.succeeded} succeeded, {counts.errored} errored; "
+                                  f"next check in {interval:.0f}s")
+            time.sleep(interval)
+            interval = min(interval * 1.5, max_poll_interval)
+    
+    def iter_batch_results(self, batch_id: str, latency_seconds: float = 0.0,
+                           request_texts: Optional[Dict[str, str]] = None
+                           ) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        """
+        Stream an ended batch's results, recording each request's token usage.
+        
+        Args:
+            batch_id: An ended batch
+            latency_seconds: Batch turnaround, recorded as each request's latency
+            request_texts: ``custom_id -> prompt text``, for tokens-per-KB figures
+            
+        Yields:
+            ``(custom_id, formatted text, None)`` for succeeded requests and
+            ``(custom_id, None, error message)`` for the rest, in arrival order
+        """
+        request_texts = request_texts or {}
+        for entry in self.client.messages.batches.results(batch_id):
+            result = entry.result
+            text = request_texts.get(entry.custom_id, '')
+            if result.type == 'succeeded':
+                message = result.message
+                record_usage(self.entry_point, message.model, message.usage, latency_seconds,
+                             text, self.document_type, cost_factor=BATCH_COST_FACTOR)
+                yield entry.custom_id, ''.join(
+                    block.text for block in message.content if block.type == 'text'), None
+            else:
+                error = getattr(getattr(result, 'error', None), 'error', None)
+                detail = getattr(error, 'message', None) or result.type
+                record_usage(self.entry_point, self.model or '', None, latency_seconds,
+                             text, self.document_type, status='error')
+                yield entry.custom_id, None, f"{result.type}: {detail}"
+    
     def _get_system_prompt(self) -> str:
         """
         Get the system prompt with formatting instructions for Claude.
@@ -209,19 +568,20 @@ Now format the transcript:"""
             Dictionary containing model information
         """
         return {
-            "model": self.model,
+            "model": self.model or "routed by transcript size (see routing.py)",
             "provider": "Anthropic",
-            "description": "Claude Sonnet 4.5 - Latest advanced language model for text formatting"
+            "description": "Model chosen per transcript by the routing policy"
         }
 
 
-def format_with_claude(transcript_text: str, progress_callback=None) -> str:
+def format_with_claude(transcript_text: str, progress_callback=None, mode: str = 'rewrite') -> str:
     """
     Convenience function to format a transcript using Claude AI.
     
     Args:
         transcript_text: The raw transcript text to format
         progress_callback: Optional callback function for progress updates
+        mode: ``rewrite``, ``edits`` or ``structured`` (see ClaudeFormatter)
         
     Returns:
         Formatted transcript text in markdown format
@@ -230,5 +590,5 @@ def format_with_claude(transcript_text: str, progress_callback=None) -> str:
         ValueError: If API key is not configured or transcript is empty
         anthropic.APIError: If the API request fails
     """
-    formatter = ClaudeFormatter()
+    formatter = ClaudeFormatter(mode=mode)
     return formatter.format_transcript(transcript_text, progress_callback)
\ No newline at end of file
@@ -0,0 +1,404 @@
+"""
+Intermediate document model for formatted transcripts.
+
+Claude returns formatted transcripts as lightly marked-up text: ``**bold**``
+speaker names and Scripture references, ``*italic*`` quotes, numbered
+section headers, ``♪`` lyric lines and divider rules. This module parses
+that text once into a compact tree of ``__slots__`` nodes which every
+exporter renders from, so no exporter has to re-parse the text itself.
+"""
+
+import re
+from typing import Iterator, List, Optional
+
+
+# Full Scripture reference such as "2 Timothy 3:1--5"
+SCRIPTURE_PATTERN = re.compile(
+    r'\b(?:Genesis|Exodus|Leviticus|Numbers|Deuteronomy|Joshua|Judges|Ruth|'
+    r'1 Samuel|2 Samuel|1 Kings|2 Kings|1 Chronicles|2 Chronicles|Ezra|'
+    r'Nehemiah|Esther|Job|Psalm|Psalms|Proverbs|Ecclesiastes|Song of Songs|'
+    r'Isaiah|Jeremiah|Lamentations|Ezekiel|Daniel|Hosea|Joel|Amos|Obadiah|'
+    r'Jonah|Micah|Nahum|Habakkuk|Zephaniah|Haggai|Zechariah|Malachi|Matthew|'
+    r'Mark|Luke|John|Acts|Romans|1 Corinthians|2 Corinthians|Galatians|'
+    r'Ephesians|Philippians|Colossians|1 Thessalonians|2 Thessalonians|'
+    r'1 Timothy|2 Timothy|Titus|Philemon|Hebrews|James|1 Peter|2 Peter|'
+    r'1 John|2 John|3 John|Jude|Revelation)\s+\d+:\d+(?:--?\d+)?\b'
+)
+
+_SCRIPTURE_BOOKS = (
+    'John', 'Timothy', 'Mark', 'Jeremiah', 'Hebrews',
+    'Luke', 'Acts', 'Jude', 'Matthew', 'Romans',
+    'Corinthians', 'Genesis', 'Exodus', 'Psalms'
+)
+_VERSE_PATTERN = re.compile(r'\d+:\d+|\d+--\d+')
+
+_INLINE_PATTERN = re.compile(
+    r'\*\*(.+?)\*\*|(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)'
+)
+_DIVIDER_PATTERN = re.compile(r'^(?:[_\-]{10,}|─{10,})')
+_HEADING_PATTERN = re.compile(r'^(\d+)\.\s+(.+)$')
+_SPEAKER_NAME = r"[A-Z][\w.'\-]*(?:\s+(?:[A-Z][\w.'\-]*|\(continued\))){0,4}"
+_SPEAKER_PATTERNS = (
+    re.compile(r'^\*\*(' + _SPEAKER_NAME + r'):\*\*\s*(.*)$'),
+    re.compile(r'^\*\*(' + _SPEAKER_NAME + r')\*\*:\s*(.*)$'),
+    re.compile(r'^(' + _SPEAKER_NAME + r'):(?:\s+(.*))?$'),
+)
+_MAX_SPEAKER_LENGTH = 50
+
+
+def is_scripture_reference(text: str) -> bool:
+    """
+    Check whether a bold span looks like a Scripture reference.
+
+    Args:
+        text: Text of the span, without markup
+
+    Returns:
+        True if the text has verse numbers or names a common book
+    """
+    if _VERSE_PATTERN.search(text):
+        return True
+    return any(book in text for book in _SCRIPTURE_BOOKS)
+
+
+class Span:
+    """A run of inline text with uniform formatting."""
+
+    __slots__ = ('text', 'bold', 'italic', 'scripture')
+
+    def __init__(self, text: str, bold: bool = False, italic: bool = False,
+                 scripture: bool = False):
+        self.text = text
+        self.bold = bold
+        self.italic = italic
+        self.scripture = scripture
+
+    def __repr__(self):
+        flags = ''.join(flag for flag, on in (
+            ('b', self.bold), ('i', self.italic), ('s', self.scripture)) if on)
+        return f"Span({self.text!r}{', ' + flags if flags else ''})"
+
+
+class Block:
+    """Base class for block-level nodes."""
+
+    __slots__ = ()
+    kind = 'block'
+
+    def __repr__(self):
+        names = [name for cls in reversed(type(self).__mro__)
+                 for name in getattr(cls, '__slots__', ())]
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in names)
+        return f"{type(self).__name__}({fields})"
+
+
+class _SpanBlock(Block):
+    """Block whose content is a list of inline spans."""
+
+    __slots__ = ('spans',)
+
+    def __init__(self, spans: List[Span]):
+        self.spans = spans
+
+    @property
+    def text(self) -> str:
+        """Plain text of the block without any markup."""
+        return ''.join(span.text for span in self.spans)
+
+
+class Title(_SpanBlock):
+    """Document title."""
+
+    __slots__ = ()
+    kind = 'title'
+
+
+class Heading(_SpanBlock):
+    """Numbered teaching section header, e.g. ``1. A Counterculture Mindset``."""
+
+    __slots__ = ('number',)
+    kind = 'heading'
+
+    def __init__(self, number: int, spans: List[Span]):
+        super().__init__(spans)
+        self.number = number
+
+
+class SpeakerTurn(_SpanBlock):
+    """A speaker label followed by what they said (possibly nothing)."""
+
+    __slots__ = ('speaker',)
+    kind = 'speaker'
+
+    def __init__(self, speaker: str, spans: List[Span]):
+        super().__init__(spans)
+        self.speaker = speaker
+
+    @property
+    def label(self) -> str:
+        """Speaker label including the trailing colon."""
+        return f"{self.speaker}:"
+
+
+class Paragraph(_SpanBlock):
+    """Regular body paragraph."""
+
+    __slots__ = ()
+    kind = 'paragraph'
+
+
+class LyricBlock(Block):
+    """Consecutive song lyric lines, each still carrying its ``♪`` markers."""
+
+    __slots__ = ('lines',)
+    kind = 'lyrics'
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+
+    def lyrics(self) -> Iterator[str]:
+        """Yield each lyric line with the ``♪`` markers removed."""
+        for line in self.lines:
+            yield line.strip('♪ ').strip()
+
+
+class Divider(Block):
+    """Horizontal divider rule."""
+
+    __slots__ = ('text',)
+    kind = 'divider'
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class Blank(Block):
+    """An empty line in the formatted text."""
+
+    __slots__ = ()
+    kind = 'blank'
+
+
+BLANK = Blank()
+
+
+class TranscriptDocument:
+    """Parsed formatted transcript: an ordered list of blocks."""
+
+    __slots__ = ('blocks',)
+
+    def __init__(self, blocks: Optional[List[Block]] = None):
+        self.blocks = blocks if blocks is not None else []
+
+    def __iter__(self):
+        return iter(self.blocks)
+
+    def __len__(self):
+        return len(self.blocks)
+
+    @property
+    def title(self) -> Optional[str]:
+        """Text of the first title block, if any."""
+        for block in self.blocks:
+            if block.kind == 'title':
+                return block.text
+        return None
+
+    def iter_kind(self, kind: str) -> Iterator[Block]:
+        """Yield the blocks of one kind, e.g. ``'speaker'``."""
+        return (block for block in self.blocks if block.kind == kind)
+
+
+def parse_inline(text: str) -> List[Span]:
+    """
+    Split a line into formatted spans.
+
+    ``**bold**`` and ``*italic*`` markers become span flags and are removed
+    from the text. Plain stretches are scanned for full Scripture references
+    so plain-text output (which has no markup) still carries them.
+
+    Args:
+        text: A single line of formatted text
+
+    Returns:
+        List of spans in reading order
+    """
+    spans = []
+    if '*' not in text:
+        _append_plain(spans, text)
+        return spans
+
+    last_pos = 0
+    for match in _INLINE_PATTERN.finditer(text):
+        if match.start() > last_pos:
+            _append_plain(spans, text[last_pos:match.start()].replace('*', ''))
+        bold_text, italic_text = match.group(1), match.group(2)
+        if bold_text is not None:
+            spans.append(Span(bold_text, bold=True,
+                              scripture=is_scripture_reference(bold_text)))
+        else:
+            spans.append(Span(italic_text, italic=True))
+        last_pos = match.end()
+
+    if last_pos < len(text):
+        _append_plain(spans, text[last_pos:].replace('*', ''))
+    return spans
+
+
+def _append_plain(spans: List[Span], text: str):
+    """Append unmarked text, splitting out Scripture references."""
+    if not text:
+        return
+    last_pos = 0
+    for match in SCRIPTURE_PATTERN.finditer(text):
+        if match.start() > last_pos:
+            spans.append(Span(text[last_pos:match.start()]))
+        spans.append(Span(match.group(0), scripture=True))
+        last_pos = match.end()
+    if last_pos < len(text):
+        spans.append(Span(text[last_pos:]))
+
+
+def _unwrap_bold(line: str) -> Optional[str]:
+    """Return the inner text if the whole line is one bold span."""
+    if len(line) > 4 and line.startswith('**') and line.endswith('**'):
+        inner = line[2:-2]
+        if '**' not in inner:
+            return inner
+    return None
+
+
+def _match_speaker(line: str):
+    """Return ``(speaker, rest)`` if the line opens with a speaker label."""
+    if ':' not in line:
+        return None
+    for pattern in _SPEAKER_PATTERNS:
+        match = pattern.match(line)
+        if match and len(match.group(1)) <= _MAX_SPEAKER_LENGTH:
+            return match.group(1), match.group(2) or ''
+    return None
+
+
+def _lyric_line(line: str) -> Optional[str]:
+    """Return the lyric line without italic markers, or None."""
+    if line.startswith('*') and not line.startswith('**') and line.endswith('*'):
+        line = line.strip('*').strip()
+    return line if line.startswith('♪') else None
+
+
+def parse_document(formatted_text: str, title_from_first_line: bool = False) -> TranscriptDocument:
+    """
+    Parse formatted transcript text into a document tree.
+
+    Args:
+        formatted_text: Formatted transcript text returned by Claude
+        title_from_first_line: Treat the first non-divider line as the title,
+            as the plain-text World Impact prompt puts it there unmarked.
+            Otherwise only fully bold lines before any body content are titles.
+
+    Returns:
+        The parsed TranscriptDocument
+    """
+    blocks = []
+    append = blocks.append
+    seen_title = False
+    seen_body = False
+
+    for raw_line in formatted_text.split('\n'):
+        line = raw_line.strip()
+
+        if not line:
+            append(BLANK)
+            continue
+
+        if _DIVIDER_PATTERN.match(line):
+            append(Divider(line))
+            continue
+
+        if title_from_first_line and not seen_title:
+            append(Title(parse_inline(line)))
+            seen_title = True
+            continue
+
+        lyric = _lyric_line(line)
+        if lyric is not None:
+            if blocks and blocks[-1].kind == 'lyrics':
+                blocks[-1].lines.append(lyric)
+            else:
+                append(LyricBlock([lyric]))
+            seen_body = True
+            continue
+
+        inner = _unwrap_bold(line)
+        heading = _HEADING_PATTERN.match(inner if inner is not None else line)
+        if heading:
+            append(Heading(int(heading.group(1)), parse_inline(heading.group(2))))
+            seen_body = True
+            continue
+
+        speaker = _match_speaker(line)
+        if speaker:
+            append(SpeakerTurn(speaker[0], parse_inline(speaker[1])))
+        elif inner is not None and not seen_body and not title_from_first_line:
+            append(Title(parse_inline(inner)))
+            seen_title = True
+            continue
+        else:
+            append(Paragraph(parse_inline(line)))
+        seen_body = True
+
+    return TranscriptDocument(blocks)
+
+
+def render_markup(document: TranscriptDocument) -> str:
+    """
+    Write a document back out as the markup Claude returns.
+
+    The inverse of ``parse_document()``: for documents built from structured
+    output, where something (a cache file, a preview) needs text.
+    """
+    lines = []
+    for block in document:
+        kind = block.kind
+        if kind == 'blank':
+            lines.append('')
+        elif kind == 'title':
+            lines.append(f"**{block.text}**")
+        elif kind == 'heading':
+            lines.append(f"**{block.number}. {block.text}**")
+        elif kind == 'speaker':
+            lines.append(f"**{block.label}** {_markup_spans(block.spans)}".rstrip())
+        elif kind == 'lyrics':
+            lines.extend(block.lines)
+        elif kind == 'divider':
+            lines.append(block.text)
+        else:
+            lines.append(_markup_spans(block.spans))
+    return '\n'.join(lines)
+
+
+def _markup_spans(spans: List[Span]) -> str:
+    out = []
+    for span in spans:
+        text = span.text
+        core = text.strip()
+        if not core or not (span.bold or span.scripture or span.italic):
+            out.append(text)
+            continue
+        # Markers hug the text; surrounding whitespace stays outside
+        marker = '**' if span.bold or span.scripture else '*'
+        out.append(f"{text[:len(text) - len(text.lstrip())]}{marker}{core}{marker}"
+                   f"{text[len(text.rstrip()):]}")
+    return ''.join(out)
+
+
+def ensure_document(formatted_text, title_from_first_line: bool = False) -> TranscriptDocument:
+    """
+    Parse formatted text unless it already is a TranscriptDocument.
+
+    Lets exporters accept either the raw Claude output or a document that
+    was parsed once and shared between several exporters.
+    """
+    if isinstance(formatted_text, TranscriptDocument):
+        return formatted_text
+    return parse_document(formatted_text, title_from_first_line)
@@ -0,0 +1,314 @@
+"""
+Edit-script formatting: Claude returns edits, not the whole transcript.
+
+In the default mode Claude retypes the entire transcript to add paragraph
+breaks and bold markers, so output tokens (and latency) grow with the
+transcript. In edit-script mode the transcript is cleaned and split into
+numbered sentences locally, Claude replies with a short list of edit
+operations against those numbers, and ``apply_edit_script()`` builds the
+formatted text from the original sentences. Output shrinks to a few tokens
+per paragraph.
+
+One operation per line; ``<i>`` is a sentence number::
+
+    T <i> <title>             title, placed before sentence i
+    H <i> <n> <heading>       numbered section heading before sentence i
+    P <i>                     new paragraph at sentence i
+    S <i> <speaker>           new paragraph at sentence i, labelled <speaker>:
+    R <i> <text> => <ref>     Scripture: replace <text> in sentence i with
+                              the bold reference <ref>
+    L <i> <j>                 sentences i..j are song lyrics, one line each
+    D <i> [<text>]            delete <text> from sentence i, or the whole sentence
+
+The result uses the same markup as full-rewrite output (title on the first
+line, ``**Speaker:**`` labels, ``**1. Heading**``, ``♪`` lyric lines), so
+``parse_document()`` and every exporter handle it unchanged.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from .document import _MAX_SPEAKER_LENGTH, is_scripture_reference
+
+
+EDIT_USER_PROMPT = "Write the edit script for this transcript:\n\n{transcript}"
+
+# An edit script with more deleted text than this is rejected as damaging
+MAX_DELETED_FRACTION = 0.2
+
+# Common encoding damage in exported transcripts
+_MOJIBAKE = (
+    ('â™ª', '♪'), ('â€™', "'"), ('â€˜', "'"), ('â€œ', '"'), ('â€\u201d', '--'),
+    ('â€\u201c', '-'), ('â€¦', '...'), ('â€\x9d', '"'), ('â€', '"'),
+)
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+|(?<=[.!?]["”\')])\s+')
+_ABBREVIATION = re.compile(r'(?:^|\s)(?:Dr|Mr|Mrs|Ms|St|Jr|Sr|Rev|Prof|vs|etc)\.$')
+_MUSIC_ONLY = re.compile(r'^[\s♪.]*$')
+_MUSIC_RUN = re.compile(r'\s*♪[♪\s]*')
+_OP_LINE = re.compile(r'^([A-Z])\s+(\d+)(?:\s+(.*))?$')
+_SPACES = re.compile(r'\s+')
+
+EDIT_SCRIPT_PROMPT = """You are an expert transcript formatter. The transcript below is split into numbered sentences: [0], [1], ... Do NOT rewrite it. Reply ONLY with an edit script, one operation per line, in sentence order:
+
+T <i> <title>            Title of the program, before sentence i (once, usually T 0)
+H <i> <n> <heading>      Numbered teaching section header before sentence i, e.g. H 42 1 A Counterculture Mindset
+P <i>                    Start a new paragraph at sentence i
+S <i> <speaker>          New paragraph at sentence i spoken by <speaker>, e.g. S 12 Male Announcer
+R <i> <text> => <ref>    Scripture reference in sentence i: <text> copied exactly from the sentence, <ref> normalized, e.g. R 30 1 John chapter 2, verse 18 => 1 John 2:18
+L <i> <j>                Sentences i through j are song lyrics, one line each
+D <i> <text>             Delete <text>, copied exactly, from sentence i (stutters, timestamps, leftover speaker labels, stray symbols)
+D <i>                    Delete the whole sentence
+
+RULES:
+- Speakers: use S whenever the speaker changes, with a proper name such as Dr. Billy Wilson, Billy or Announcer; use "Billy (continued)" when the same speaker resumes after an interruption. When the sentence already starts with a raw label such as "male announcer:", also delete that label with D.
+- Paragraphs: natural 3-6 sentence paragraphs; same-speaker sentences flow together.
+- Headings: when the speaker introduces teaching points ("The first is...", "The second thing...", "most importantly..."), add H with a short descriptive title before the sentence that starts the point.
+- Scripture: add R for every Bible reference, normalized like 2 Timothy 3:1-5 or Mark 13:13.
+- Lyrics: a leading ♪ marks a sentence that followed music. Mark sung lines with L; ♪ symbols are added to lyrics and removed elsewhere for you.
+- Cleanup: delete "..." at the start or end of the transcript, stutters ("we know the--") and timestamps.
+- Never paraphrase. No commentary, no code fences: edit script lines only."""
+
+
+class EditOp:
+    """One parsed edit-script operation."""
+
+    __slots__ = ('code', 'index', 'args', 'line_number')
+
+    def __init__(self, code: str, index: int, args: Tuple = (), line_number: int = 0):
+        self.code = code
+        self.index = index
+        self.args = args
+        self.line_number = line_number
+
+    def __repr__(self):
+        return f"EditOp({self.code} {self.index} {' '.join(map(str, self.args))})".replace(' )', ')')
+
+
+def fix_encoding(text: str) -> str:
+    """Repair UTF-8 text that was decoded as Windows-1252 (``â€™`` and friends)."""
+    if 'â' not in text:
+        return text
+    for broken, fixed in _MOJIBAKE:
+        text = text.replace(broken, fixed)
+    return text
+
+
+def prepare_source(text: str) -> List[str]:
+    """
+    Clean a raw transcript and split it into the sentences an edit script addresses.
+
+    Encoding damage is repaired and runs of music symbols become sentence
+    breaks; everything else is kept word for word.
+
+    Args:
+        text: The raw transcript text
+
+    Returns:
+        Sentences in reading order; one that followed music symbols starts
+        with ``♪``
+    """
+    sentences = []
+    for line in fix_encoding(text).splitlines():
+        # Music symbols separate songs from speech; each stretch between
+        # them starts a new sentence, marked with a leading ♪
+        for n, stretch in enumerate(_MUSIC_RUN.split(_SPACES.sub(' ', line).strip())):
+            merged = []
+            for piece in _SENTENCE_END.split(stretch):
+                # "Dr. Billy Wilson" is one sentence, not two
+                if merged and _ABBREVIATION.search(merged[-1]):
+                    merged[-1] += ' ' + piece
+                else:
+                    merged.append(piece)
+            merged = [piece for piece in merged if not _MUSIC_ONLY.match(piece)]
+            if merged and n:
+                merged[0] = '♪ ' + merged[0]
+            sentences.extend(merged)
+    return sentences
+
+
+def number_sentences(sentences: List[str]) -> str:
+    """The sentences as ``[i] text`` lines, for the prompt."""
+    return '\n'.join(f"[{i}] {sentence}" for i, sentence in enumerate(sentences))
+
+
+def parse_edit_script(script: str, sentence_count: int) -> List[EditOp]:
+    """
+    Parse an edit script returned by Claude.
+
+    Blank lines, ``#`` comments and code fences are ignored.
+
+    Args:
+        script: The edit script text
+        sentence_count: Number of sentences it addresses
+
+    Returns:
+        The operations in script order
+
+    Raises:
+        ValueError: Listing every malformed line or out-of-range sentence number
+    """
+    ops = []
+    problems = []
+    for line_number, raw in enumerate(script.splitlines(), 1):
+        line = raw.strip()
+        if not line or line.startswith('#') or line.startswith('```'):
+            continue
+        match = _OP_LINE.match(line)
+        if not match:
+            problems.append(f"line {line_number}: cannot parse {line!r}")
+            continue
+        code, index, rest = match.group(1), int(match.group(2)), (match.group(3) or '').strip()
+        problem = None
+        args = ()
+        if index >= sentence_count:
+            problem = f"sentence {index} does not exist"
+        elif code == 'P':
+            problem = f"unexpected text {rest!r}" if rest else None
+        elif code == 'T':
+            args = (rest,)
+            problem = None if rest else "title is empty"
+        elif code == 'H':
+            number, _, heading = rest.partition(' ')
+            args = (int(number) if number.isdigit() else 0, heading.strip())
+            problem = None if args[0] > 0 and args[1] else "heading needs a number and a title"
+        elif code == 'S':
+            speaker = rest.rstrip(':').strip()
+            args = (speaker,)
+            if not speaker or len(speaker) > _MAX_SPEAKER_LENGTH or '*' in speaker or ':' in speaker:
+                problem = f"bad speaker name {rest!r}"
+        elif code == 'R':
+            text, arrow, ref = rest.partition('=>')
+            args = (text.strip(), ref.strip())
+            if not arrow or not args[0] or not args[1]:
+                problem = "Scripture edit needs '<text> => <reference>'"
+            elif not is_scripture_reference(args[1]):
+                problem = f"{args[1]!r} is not a Scripture reference"
+        elif code == 'L':
+            last = int(rest) if rest.isdigit() else -1
+            args = (last,)
+            if not index <= last < sentence_count:
+                problem = f"bad lyric range {index}..{rest}"
+        elif code == 'D':
+            args = (rest,) if rest else ()
+        else:
+            problem = f"unknown operation {code!r}"
+        if problem:
+            problems.append(f"line {line_number}: {problem}")
+        else:
+            ops.append(EditOp(code, index, args, line_number))
+    if problems:
+        raise ValueError("Invalid edit script: " + '; '.join(problems))
+    return ops
+
+
+def _find(sentence: str, text: str) -> Optional[Tuple[int, int]]:
+    """Span of ``text`` in ``sentence``, ignoring case and runs of whitespace."""
+    start = sentence.find(text)
+    if start >= 0:
+        return start, start + len(text)
+    pattern = r'\s+'.join(re.escape(word) for word in text.split())
+    match = re.search(pattern, sentence, re.IGNORECASE) if pattern else None
+    return match.span() if match else None
+
+
+def apply_edit_script(sentences: List[str], ops: List[EditOp],
+                      strict: bool = False) -> Tuple[str, List[str]]:
+    """
+    Build formatted text from sentences and an edit script.
+
+    Args:
+        sentences: From ``prepare_source()``
+        ops: From ``parse_edit_script()``
+        strict: Raise instead of skipping edits whose text is not in the sentence
+
+    Returns:
+        ``(formatted text, skipped)``; ``skipped`` describes edits whose
+        text could not be found
+
+    Raises:
+        ValueError: If the script deletes more than MAX_DELETED_FRACTION of
+            the transcript, or (strict) an edit's text is not found
+    """
+    sentences = list(sentences)
+    deleted = [False] * len(sentences)
+    breaks = {}      # sentence -> speaker label ('' for a plain paragraph break)
+    before = {}      # sentence -> title / heading lines placed before it
+    lyrics = set()
+    skipped = []
+    total_chars = sum(len(sentence) for sentence in sentences) or 1
+    deleted_chars = 0
+
+    for op in ops:
+        i = op.index
+        if op.code == 'T':
+            before.setdefault(i, []).append(('title', op.args[0]))
+        elif op.code == 'H':
+            before.setdefault(i, []).append(('heading', f"**{op.args[0]}. {op.args[1]}**"))
+        elif op.code == 'P':
+            breaks.setdefault(i, '')
+        elif op.code == 'S':
+            breaks[i] = op.args[0]
+        elif op.code == 'L':
+            lyrics.update(range(i, op.args[0] + 1))
+        elif op.code == 'D' and not op.args:
+            if not deleted[i]:
+                deleted[i] = True
+                deleted_chars += len(sentences[i])
+        else:
+            found = _find(sentences[i], op.args[0])
+            if found is None:
+                skipped.append(f"line {op.line_number}: {op.args[0]!r} is not in sentence {i}")
+                continue
+            start, end = found
+            if op.code == 'D':
+                deleted_chars += end - start
+                sentences[i] = (sentences[i][:start].rstrip() + ' ' + sentences[i][end:].lstrip()).strip()
+            else:
+                sentences[i] = f"{sentences[i][:start]}**{op.args[1]}**{sentences[i][end:]}"
+
+    if strict and skipped:
+        raise ValueError("Edit script does not match the transcript: " + '; '.join(skipped))
+    if deleted_chars / total_chars > MAX_DELETED_FRACTION:
+        raise ValueError(f"Edit script deletes {deleted_chars / total_chars:.0%} of the transcript")
+
+    blocks = []
+    paragraph = []
+    song = []
+    speaker = None
+
+    def flush():
+        if paragraph:
+            blocks.append(' '.join(paragraph))
+            paragraph.clear()
+        if song:
+            blocks.append('\n'.join(song))
+            song.clear()
+
+    for i, sentence in enumerate(sentences):
+        if i in before:
+            flush()
+            for kind, line in before[i]:
+                # The title goes first: exporters read it from the first line
+                if kind == 'title':
+                    blocks.insert(0, line)
+                else:
+                    blocks.append(line)
+        if i in breaks or (i in lyrics) != bool(song):
+            flush()
+        if i in breaks:
+            # A label on a deleted sentence moves to the next one kept
+            speaker = breaks[i] or None
+        if deleted[i] or not sentence:
+            continue
+        if i in lyrics:
+            song.append(f"♪ {sentence.strip('♪ ')} ♪")
+            continue
+        sentence = sentence.strip('♪ ').strip()
+        if not sentence:
+            continue
+        if speaker and not paragraph:
+            sentence = f"**{speaker}:** {sentence}"
+            speaker = None
+        paragraph.append(sentence)
+    flush()
+    return '\n\n'.join(blocks), skipped
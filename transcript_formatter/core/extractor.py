@@ -0,0 +1,261 @@
+"""
+Text extraction for uploaded transcripts.
+
+``.docx`` files are read by streaming ``word/document.xml`` straight out of
+the zip archive with an iterative XML parser. Paragraph text is yielded as
+soon as each ``<w:p>`` closes and parsed elements are discarded, so memory
+stays flat and the python-docx object graph is never built.
+``iter_docx_formatted`` does the same but keeps run bold/italic and
+centered alignment, for displaying documents.
+"""
+
+import os
+import zipfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Tuple, Union
+from xml.etree.ElementTree import ParseError, iterparse
+
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_P = _W + 'p'
+_T = _W + 't'
+_TAB = _W + 'tab'
+_BREAKS = (_W + 'br', _W + 'cr')
+_BODY = _W + 'body'
+_R = _W + 'r'
+_RPR = _W + 'rPr'
+_PPR = _W + 'pPr'
+_BOLD = _W + 'b'
+_ITALIC = _W + 'i'
+_JC = _W + 'jc'
+_VAL = _W + 'val'
+_OFF = ('0', 'false', 'off')
+
+DOCUMENT_PART = 'word/document.xml'
+
+# Encodings tried in order for plain-text uploads
+TEXT_ENCODINGS = ('utf-8-sig', 'cp1252', 'latin-1')
+
+Source = Union[str, os.PathLike, BinaryIO]
+
+
+class DocxParagraph:
+    """A paragraph read by ``iter_docx_formatted``: its runs and alignment."""
+
+    __slots__ = ('runs', 'centered')
+
+    def __init__(self, runs: List[Tuple[str, bool, bool]], centered: bool = False):
+        self.runs = runs
+        self.centered = centered
+
+    @property
+    def text(self) -> str:
+        return ''.join(text for text, _, _ in self.runs)
+
+
+def iter_docx_paragraphs(source: Source) -> Iterator[str]:
+    """
+    Stream paragraph text out of a Word document.
+
+    Args:
+        source: Path to a .docx file or a seekable binary file object
+
+    Yields:
+        The text of each paragraph in document order, including empty ones
+
+    Raises:
+        ValueError: If the source is not a readable Word document
+    """
+    with _document_part(source) as part:
+        try:
+            yield from _iter_paragraphs(part)
+        except ParseError as e:
+            raise ValueError(f"Corrupt Word document: {e}") from e
+
+
+def iter_docx_formatted(source: Source) -> Iterator[DocxParagraph]:
+    """
+    Stream paragraphs with run formatting out of a Word document.
+
+    Bold and italic are read from each run's own properties and centering
+    from the paragraph's, as python-docx's ``run.bold`` and
+    ``paragraph.alignment`` report them (style inheritance is not resolved).
+
+    Args:
+        source: Path to a .docx file or a seekable binary file object
+
+    Yields:
+        A DocxParagraph for each paragraph in document order
+
+    Raises:
+        ValueError: If the source is not a readable Word document
+    """
+    with _document_part(source) as part:
+        try:
+            yield from _iter_formatted(part)
+        except ParseError as e:
+            raise ValueError(f"Corrupt Word document: {e}") from e
+
+
+@contextmanager
+def _document_part(source: Source):
+    """Open word/document.xml inside a .docx archive."""
+    try:
+        archive = zipfile.ZipFile(source)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise ValueError(f"Not a valid Word document: {e}") from e
+
+    with archive:
+        try:
+            part = archive.open(DOCUMENT_PART)
+        except KeyError as e:
+            raise ValueError(f"Not a valid Word document: missing {DOCUMENT_PART}") from e
+        with part:
+            yield part
+
+
+def _iter_paragraphs(xml_stream) -> Iterator[str]:
+    """Walk document.xml events, keeping only the open paragraphs in memory."""
+    # One buffer per open <w:p>; nested paragraphs (text boxes) get their own
+    open_paragraphs = []
+    body = None
+    depth = 0
+    body_depth = -1
+
+    for event, elem in iterparse(xml_stream, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            depth += 1
+            if tag == _P:
+                open_paragraphs.append([])
+            elif tag == _BODY:
+                body, body_depth = elem, depth
+            continue
+
+        depth -= 1
+        if open_paragraphs:
+            if tag == _T:
+                if elem.text:
+                    open_paragraphs[-1].append(elem.text)
+            elif tag == _TAB:
+                open_paragraphs[-1].append('\t')
+            elif tag in _BREAKS:
+                open_paragraphs[-1].append('\n')
+            elif tag == _P:
+                yield ''.join(open_paragraphs.pop())
+
+        # Drop finished top-level blocks so the tree never grows
+        if body is not None and depth == body_depth:
+            elem.clear()
+            body.remove(elem)
+
+
+def _iter_formatted(xml_stream) -> Iterator[DocxParagraph]:
+    """Like _iter_paragraphs, but collect each finished run with its formatting."""
+    open_paragraphs = []
+    body = None
+    depth = 0
+    body_depth = -1
+
+    for event, elem in iterparse(xml_stream, events=('start', 'end')):
+        tag = elem.tag
+        if event == 'start':
+            depth += 1
+            if tag == _P:
+                open_paragraphs.append([])
+            elif tag == _BODY:
+                body, body_depth = elem, depth
+            continue
+
+        depth -= 1
+        if open_paragraphs:
+            if tag == _R:
+                text = _run_text(elem)
+                if text:
+                    props = elem.find(_RPR)
+                    open_paragraphs[-1].append(
+                        (text, _flag(props, _BOLD), _flag(props, _ITALIC)))
+            elif tag == _P:
+                jc = elem.find(f'{_PPR}/{_JC}')
+                centered = jc is not None and jc.get(_VAL) == 'center'
+                yield DocxParagraph(open_paragraphs.pop(), centered)
+
+        if body is not None and depth == body_depth:
+            elem.clear()
+            body.remove(elem)
+
+
+def _run_text(run) -> str:
+    """Text of a run's own children (nested text-box paragraphs are separate)."""
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == _T:
+            parts.append(child.text or '')
+        elif tag == _TAB:
+            parts.append('\t')
+        elif tag in _BREAKS:
+            parts.append('\n')
+    return ''.join(parts)
+
+
+def _flag(props, tag) -> bool:
+    """Whether a run property toggle such as <w:b/> is switched on."""
+    if props is None:
+        return False
+    elem = props.find(tag)
+    return elem is not None and elem.get(_VAL, 'true').lower() not in _OFF
+
+
+def extract_docx_text(source: Source, skip_empty: bool = False) -> str:
+    """
+    Extract a Word document's text, one paragraph per line.
+
+    Args:
+        source: Path to a .docx file or a seekable binary file object
+        skip_empty: Leave out paragraphs that are only whitespace
+
+    Returns:
+        The document text joined with newlines
+    """
+    paragraphs = iter_docx_paragraphs(source)
+    if skip_empty:
+        paragraphs = (text for text in paragraphs if text.strip())
+    return '\n'.join(paragraphs)
+
+
+def decode_text(data: bytes) -> str:
+    """Decode a plain-text upload, falling back through TEXT_ENCODINGS."""
+    for encoding in TEXT_ENCODINGS[:-1]:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    return data.decode(TEXT_ENCODINGS[-1])
+
+
+def extract_text(source: Source, filename: str = None) -> str:
+    """
+    Extract transcript text from a .txt or .docx upload.
+
+    Args:
+        source: Path or binary file object holding the upload
+        filename: Original filename, used to pick the format when
+            ``source`` is a file object
+
+    Returns:
+        The transcript text
+
+    Raises:
+        ValueError: If a .docx upload is not a valid Word document
+    """
+    name = filename or (os.fspath(source) if isinstance(source, (str, os.PathLike)) else '')
+    if str(name).lower().endswith('.docx'):
+        return extract_docx_text(source)
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return decode_text(f.read())
+    data = source.read()
+    return decode_text(data) if isinstance(data, bytes) else data
+
@@ -0,0 +1,86 @@
+"""
+Formatted text saved next to the documents rendered from it.
+
+Claude's formatted text is what costs time and money; the documents are
+cheap renderings of it. Keeping the full text (gzip-compressed, with the
+options it was rendered with) beside each export means a new template,
+style or output format only re-runs the exporters, through
+``transcript-format render`` or the web app's ``/reexport/<id>``.
+"""
+
+import gzip
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+from .document import TranscriptDocument, render_markup
+
+
+FORMATTED_SUFFIX = '.formatted.json.gz'
+
+
+def formatted_path_for(output_base) -> str:
+    """Where the formatted text for ``output_base`` (a path without extension) is kept."""
+    output_base = Path(output_base)
+    return str(output_base.with_name(output_base.name + FORMATTED_SUFFIX))
+
+
+def save_formatted(output_base, formatted_text, **options) -> str:
+    """
+    Save formatted text beside the documents exported from it.
+
+    Args:
+        output_base: Output path without extension, as given to ``export_formats``
+        formatted_text: Formatted transcript text or a TranscriptDocument
+        **options: JSON-serialisable render settings to reuse on re-export,
+            e.g. ``title``, ``document_type`` or ``title_from_first_line``
+
+    Returns:
+        Path of the saved file
+    """
+    if isinstance(formatted_text, TranscriptDocument):
+        formatted_text = render_markup(formatted_text)
+    path = formatted_path_for(output_base)
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with gzip.open(os.fdopen(fd, 'wb'), 'wt', encoding='utf-8') as f:
+            json.dump({'formatted_text': formatted_text, 'options': options,
+                       'saved': time.time()}, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return path
+
+
+def load_formatted(path) -> Tuple[str, dict]:
+    """
+    Read formatted text saved by ``save_formatted``, or a plain formatted text file.
+
+    Plain files (e.g. the batch pipeline's ``.formatted.txt`` cache, or
+    hand-edited markdown) come back with no options.
+
+    Returns:
+        Tuple of the formatted text and its saved render options
+
+    Raises:
+        ValueError: If a saved file is corrupt
+        OSError: If the file cannot be read
+    """
+    path = os.fspath(path)
+    if not path.endswith('.gz'):
+        with open(path, encoding='utf-8') as f:
+            return f.read(), {}
+    with open(path, 'rb') as raw:
+        try:
+            with gzip.open(raw, 'rt', encoding='utf-8') as f:
+                stored = json.load(f)
+            return stored['formatted_text'], stored.get('options') or {}
+        # A bad gzip stream is an OSError
+        except (EOFError, OSError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Not a saved formatted transcript: {path} ({e})") from None
@@ -0,0 +1,209 @@
+"""
+Incremental re-formatting of edited transcripts.
+
+Producers often fix a few words in a raw transcript and upload it again.
+The transcript is split with ``split_stable``, whose content-defined
+boundaries leave the chunks away from an edit unchanged, and each chunk's
+formatted text is cached under a hash of the chunk and everything else that
+shapes Claude's output (model, prompts, position). Only chunks missing
+from the cache are sent to Claude, so a small correction costs one or two
+chunk requests instead of the whole transcript.
+
+The cache also remembers which chunks made up the last version of each
+episode (an id, or the file name), both to report what changed and to
+keep those chunks when unreferenced ones are pruned.
+
+The web app uses it when $TRANSCRIPT_CHUNK_CACHE names the cache file; the
+CLI with ``format --incremental``.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .chunking import merge_formatted_chunks, split_stable
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENV = 'TRANSCRIPT_CHUNK_CACHE'
+# Used by ``transcript-format format --incremental`` when the variable is not set
+DEFAULT_CACHE_PATH = 'chunk_cache.sqlite3'
+# Smaller than the routing policy's chunks: an edit re-sends about one of these
+INCREMENTAL_CHUNK_CHARS = 4000
+# Chunks no episode refers to any more are kept this long, then pruned
+PRUNE_AFTER_SECONDS = 30 * 24 * 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    key TEXT PRIMARY KEY,
+    formatted TEXT NOT NULL,
+    created REAL NOT NULL,
+    used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS episode_chunks (
+    episode TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (episode, position)
+);
+CREATE INDEX IF NOT EXISTS episode_chunks_key ON episode_chunks (key);
+"""
+
+
+def cache_path_if_enabled() -> Optional[str]:
+    """Cache location from $TRANSCRIPT_CHUNK_CACHE; None when it is not set."""
+    return os.environ.get(CACHE_ENV) or None
+
+
+def chunk_key(chunk: str, model: str, system_prompt: str, prompt_template: str,
+              first: bool, whole: bool = False) -> str:
+    """
+    Cache key for one chunk's formatted text.
+
+    The first chunk carries the program title, so a chunk formats
+    differently there and is cached separately. A transcript that is a
+    single chunk is sent without the "part i of N" note and may get closing
+    remarks, so it is cached apart from the same text as the first part of
+    a longer version.
+    """
+    position = 'whole' if whole else 'first' if first else 'rest'
+    digest = hashlib.sha256()
+    for part in (model, system_prompt, prompt_template, position, chunk):
+        digest.update(part.encode('utf-8') + b'\0')
+    return digest.hexdigest()
+
+
+class ChunkCache:
+    """
+    SQLite store of formatted chunks and each episode's latest chunk list.
+
+    Args:
+        path: Database file; created on first use
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Web workers and the CLI may share the cache
+        self.conn = sqlite3.connect(self.path, timeout=10)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, str]:
+        """Formatted text of the cached keys among ``keys``."""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(unique), 500):
+            batch = unique[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT key, formatted FROM chunks WHERE key IN ({','.join('?' * len(batch))})", batch)
+            found.update(rows)
+        if found:
+            with self.conn:
+                self.conn.executemany('UPDATE chunks SET used = ? WHERE key = ?',
+                                      [(time.time(), key) for key in found])
+        return found
+
+    def put(self, key: str, formatted: str):
+        """Store one chunk's formatted text."""
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO chunks (key, formatted, created, used) VALUES (?, ?, ?, ?)',
+                (key, formatted, now, now))
+
+    def previous(self, episode: str) -> List[str]:
+        """Chunk keys of the episode's last formatted version, in order."""
+        return [key for (key,) in self.conn.execute(
+            'SELECT key FROM episode_chunks WHERE episode = ? ORDER BY position', (episode,))]
+
+    def remember(self, episode: str, keys: Sequence[str]):
+        """Record the episode's current chunks and prune long-unreferenced ones."""
+        with self.conn:
+            self.conn.execute('DELETE FROM episode_chunks WHERE episode = ?', (episode,))
+            self.conn.executemany(
+                'INSERT INTO episode_chunks (episode, position, key) VALUES (?, ?, ?)',
+                [(episode, position, key) for position, key in enumerate(keys)])
+            self.conn.execute(
+                'DELETE FROM chunks WHERE used < ? AND key NOT IN (SELECT key FROM episode_chunks)',
+                (time.time() - PRUNE_AFTER_SECONDS,))
+
+
+def format_incremental(formatter, cache: ChunkCache, episode: str, transcript_text: str,
+                       chunk_chars: int = INCREMENTAL_CHUNK_CHARS,
+                       progress_callback=None, cancel=None) -> Tuple[str, Dict[str, int]]:
+    """
+    Format a transcript, sending only the chunks not already cached.
+
+    Args:
+        formatter: A ``ChunkedFormatter``; its model, system prompt and
+            prompt template are part of each chunk's cache key
+        cache: Where formatted chunks are kept
+        episode: Identifies the transcript across versions (an id or file name)
+        transcript_text: The raw transcript text
+        chunk_chars: Average chunk length
+        progress_callback: Optional callback function for progress updates
+        cancel: Optional CancelToken; chunks already formatted when it
+            fires are still cached
+
+    Returns:
+        Tuple of the formatted transcript and counts: ``chunks`` in this
+        version, ``changed`` since the episode's previous version (all of
+        them for a new episode), ``cached`` chunks reused and ``sent`` to Claude
+
+    Raises:
+        RuntimeError: If any chunk could not be formatted; chunks that were
+            formatted are cached, so a retry only sends the rest
+        Cancelled: If ``cancel`` fired before every chunk was formatted
+    """
+    chunks = split_stable(transcript_text, chunk_chars)
+    keys = [chunk_key(chunk, formatter.model, formatter.system_prompt or '', formatter.prompt_template,
+                      i == 0, len(chunks) == 1)
+            for i, chunk in enumerate(chunks)]
+    previous = set(cache.previous(episode))
+    cached = cache.get_many(keys)
+    results = [cached.get(key) for key in keys]
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    stats = {
+        'chunks': len(chunks),
+        'changed': sum(1 for key in keys if key not in previous),
+        'cached': len(chunks) - len(pending),
+        'sent': len(pending),
+    }
+    if progress_callback:
+        if previous:
+            progress_callback(f"{stats['changed']} of {len(chunks)} parts changed since the last "
+                              f"version; sending {len(pending)} to Claude AI...")
+        else:
+            progress_callback(f"Sending {len(pending)} of {len(chunks)} parts to Claude AI...")
+
+    if pending:
+        results, errors = formatter.format_chunks(chunks, results, cancel=cancel)
+        for i in pending:
+            if results[i] is not None:
+                cache.put(keys[i], results[i])
+        if cancel is not None and None in results:
+            cancel.raise_if_cancelled()
+        if errors:
+            raise RuntimeError(f"Claude API error: {'; '.join(errors)}")
+
+    cache.remember(episode, keys)
+    logger.info(f"Formatted {episode}: {stats}")
+    return merge_formatted_chunks(results), stats
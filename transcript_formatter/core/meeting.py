@@ -0,0 +1,304 @@
+"""
+Map-reduce formatting of long meeting transcripts.
+
+A single meeting request has to write the header, summary, action items,
+decisions and the whole cleaned transcript, which for a multi-hour meeting
+is one slow request that can overrun the output limit. Instead:
+
+* map: each chunk is cleaned up and its participants, action items,
+  decisions and next steps extracted, all chunks in parallel
+  (``ChunkedFormatter``);
+* reduce: one small request turns the chunk notes (never the transcript)
+  into the header, executive summary and deduplicated lists.
+
+Map requests are a fixed size and run concurrently and the reduce input
+grows only with the number of items, so latency stays about flat as
+meetings get longer. The result has the same sections as the single-call
+meeting prompt.
+"""
+
+import re
+import time
+from typing import Dict, List, Optional
+
+from ..usage import record_usage
+from .chunked_formatter import ChunkedFormatter
+from .chunking import split_transcript
+
+
+# Shared with the single-call meeting prompt
+CLEANUP_RULES = """<language_cleanup_rules>
+
+When formatting this transcript, clean up the spoken language by:
+
+REMOVE:
+- Filler words: "uh", "um", "like" (when used as filler), "you know", "I mean", "so" (at sentence starts), "right?" (when seeking agreement)
+- Verbal pauses: "hmm", "mmm", "give me one second"
+- False starts: incomplete phrases that get rephrased (e.g., "we will... we need to" → "we need to")
+- Repetitive phrases: "at least" when used multiple times unnecessarily
+- Trailing ellipses ("...") unless indicating an actual meaningful pause
+
+KEEP:
+- Technical terms and product names exactly as spoken
+- All substantive content and meaning
+- Natural conversational flow where it aids clarity
+- Important context and qualifications
+
+STYLE:
+- Convert spoken fragments into complete, clear sentences
+- Maintain the speaker's intent and meaning
+- Keep the professional but conversational tone
+- Preserve important clarifications and examples
+
+Example transformation:
+BEFORE: "Uh, so yeah, at least... we will, uh, need to make sure that, you know, we have access to..."
+AFTER: "We need to make sure we have access to..."
+
+</language_cleanup_rules>"""
+
+MAP_SYSTEM_PROMPT = f"""You are a professional meeting transcript formatter. You receive one part of a longer meeting transcript. Clean it up and extract what was agreed in it. Output clean text WITHOUT any asterisks, underscores, or markdown symbols.
+
+{CLEANUP_RULES}
+
+Reply with exactly these sections, each starting with its marker line; leave a section empty when it has nothing:
+
+=== TRANSCRIPT ===
+Speaker Name: [Their complete statement, cleaned up according to the language rules above]
+
+(Include EVERYTHING every speaker says in this part, in order, grouping consecutive statements by the same speaker. Do not summarize or skip anything.)
+
+=== SUMMARY ===
+One or two sentences on what this part covered.
+
+=== PARTICIPANTS ===
+- Name
+
+=== ACTION ITEMS ===
+- [ ] Action item description - Owner: [Name] - Due: [Date if mentioned]
+
+=== DECISIONS ===
+- Decision description
+
+=== NEXT STEPS ===
+- Agreed next step or follow-up meeting"""
+
+MAP_USER_PROMPT = "Format this part of the meeting transcript:\n\n{transcript}"
+
+REDUCE_SYSTEM_PROMPT = """You combine notes taken from consecutive parts of one meeting into its summary. Output clean text WITHOUT any asterisks, underscores, or markdown symbols.
+
+Reply with exactly these sections, each starting with its marker line; leave a section empty when it has nothing:
+
+=== HEADER ===
+Meeting Title (if identifiable)
+Date: [if mentioned]
+Participants: [everyone listed in the notes]
+
+=== SUMMARY ===
+A 2-3 sentence executive summary of the meeting's main purpose and outcomes.
+
+=== ACTION ITEMS ===
+- [ ] Action item description - Owner: [Name] - Due: [Date if mentioned]
+(Merge items that describe the same task; keep the most specific owner and due date.)
+
+=== DECISIONS ===
+- Decision 1: [Description]
+(Merge duplicates; when a later part reverses a decision, keep only the final one.)
+
+=== NEXT STEPS ===
+Agreed next steps and follow-up meetings."""
+
+REDUCE_MAX_TOKENS = 4096
+# Map requests run concurrently up to this many, so latency stays flat
+MAX_MAP_WORKERS = 16
+
+_SECTION = re.compile(r'^\s*=+\s*([A-Z][A-Z ]*?)\s*=+\s*$', re.MULTILINE)
+_PART_TAG = re.compile(r'\s*\(part \d+\)$')
+_ITEM_PREFIX = re.compile(r'^\s*(?:[-*•]\s*)?(?:\[\s*\]\s*)?(?:\d+[.)]\s+)?')
+
+
+def parse_sections(text: str) -> Dict[str, str]:
+    """
+    Split ``=== NAME ===`` sectioned output into a name -> body mapping.
+
+    Text before the first marker is kept under ``''``.
+    """
+    sections = {}
+    matches = list(_SECTION.finditer(text))
+    sections[''] = text[:matches[0].start()].strip() if matches else text.strip()
+    for match, following in zip(matches, matches[1:] + [None]):
+        end = following.start() if following else len(text)
+        sections[match.group(1)] = text[match.end():end].strip()
+    return sections
+
+
+def list_items(body: str) -> List[str]:
+    """The items of a list section, without bullets, checkboxes or numbers."""
+    items = []
+    for line in body.splitlines():
+        item = _ITEM_PREFIX.sub('', line, count=1).strip()
+        if item and not (item.startswith('(') and item.endswith(')')):
+            items.append(item)
+    return items
+
+
+def _dedupe(items: List[str]) -> List[str]:
+    """
+    Drop repeats that differ only in case, spacing, final punctuation or
+    ``(part N)`` tag; the first mention is kept.
+    """
+    seen, kept = set(), []
+    for item in items:
+        key = ' '.join(_PART_TAG.sub('', item).lower().rstrip('.').split())
+        if key not in seen:
+            seen.add(key)
+            kept.append(item)
+    return kept
+
+
+class ChunkNotes:
+    """What the map step extracted from one chunk."""
+
+    __slots__ = ('transcript', 'summary', 'participants', 'action_items', 'decisions', 'next_steps')
+
+    def __init__(self, transcript: str, summary: str = '', participants=(), action_items=(),
+                 decisions=(), next_steps=()):
+        self.transcript = transcript
+        self.summary = summary
+        self.participants = list(participants)
+        self.action_items = list(action_items)
+        self.decisions = list(decisions)
+        self.next_steps = list(next_steps)
+
+    @classmethod
+    def parse(cls, text: str) -> 'ChunkNotes':
+        """
+        Read a map response; without section markers it is all transcript.
+        """
+        sections = parse_sections(text)
+        if 'TRANSCRIPT' not in sections:
+            return cls(text.strip())
+        return cls(sections['TRANSCRIPT'], sections.get('SUMMARY', ''),
+                   list_items(sections.get('PARTICIPANTS', '')),
+                   list_items(sections.get('ACTION ITEMS', '')),
+                   list_items(sections.get('DECISIONS', '')),
+                   list_items(sections.get('NEXT STEPS', '')))
+
+
+def reduce_prompt(notes: List[ChunkNotes]) -> str:
+    """
+    The reduce request: per-part summaries and the items found, never the transcript.
+
+    Items repeated across parts are sent once, tagged with the part that
+    first mentioned them, so the request stays small however long the
+    meeting ran.
+    """
+    lines = [f"Part {i} of {len(notes)}: {part.summary or '(no summary)'}"
+             for i, part in enumerate(notes, 1)]
+    for label, attribute in (('Action items', 'action_items'), ('Decisions', 'decisions'),
+                             ('Next steps', 'next_steps')):
+        tagged = [f"{item} (part {i})" for i, part in enumerate(notes, 1)
+                  for item in getattr(part, attribute)]
+        items = _dedupe(tagged)
+        if items:
+            lines.append(f"\n{label}:")
+            lines.extend(f"- {item}" for item in items)
+    participants = _dedupe([name for part in notes for name in part.participants])
+    lines.append(f"\nParticipants: {', '.join(participants) or '(not identified)'}")
+    return "Combine these meeting notes:\n\n" + '\n'.join(lines)
+
+
+def assemble(summary_sections: Dict[str, str], notes: List[ChunkNotes]) -> str:
+    """
+    The finished meeting document in the single-call prompt's section order.
+
+    Sections the reduce step left out fall back to the chunk notes merged
+    locally, so a terse reduce response still yields a complete document.
+    """
+    def merged(name, attribute):
+        items = list_items(summary_sections.get(name, ''))
+        return items or _dedupe([item for part in notes for item in getattr(part, attribute)])
+
+    participants = _dedupe([name for part in notes for name in part.participants])
+    header = summary_sections.get('HEADER') or (
+        f"Participants: {', '.join(participants)}" if participants else '')
+    summary = summary_sections.get('SUMMARY') or ' '.join(part.summary for part in notes if part.summary)
+    action_items = merged('ACTION ITEMS', 'action_items')
+    decisions = merged('DECISIONS', 'decisions')
+    next_steps = summary_sections.get('NEXT STEPS') or '\n'.join(
+        f"- {step}" for step in _dedupe([step for part in notes for step in part.next_steps]))
+
+    parts = [header] if header else []
+    if summary:
+        parts += ['EXECUTIVE SUMMARY', summary]
+    if action_items:
+        parts += ['ACTION ITEMS', '\n'.join(f"- [ ] {item}" for item in action_items)]
+    if decisions:
+        parts += ['DECISIONS MADE', '\n'.join(
+            f"- {item}" if item.lower().startswith('decision') else f"- Decision {i}: {item}"
+            for i, item in enumerate(decisions, 1))]
+    parts += ['FULL TRANSCRIPT', '\n\n'.join(part.transcript for part in notes if part.transcript)]
+    if next_steps:
+        parts += ['NEXT STEPS', next_steps]
+    return '\n\n'.join(parts)
+
+
+def format_meeting(client, model: str, transcript_text: str, chunk_chars: int,
+                   max_tokens: int = 8192, entry_point: str = 'web',
+                   progress_callback=None, ledger_path: Optional[str] = None,
+                   cancel=None) -> str:
+    """
+    Format a long meeting transcript by map-reduce.
+
+    Args:
+        client: An ``anthropic.Anthropic`` client
+        model: Model for the map and reduce requests
+        transcript_text: The raw meeting transcript
+        chunk_chars: Map chunk size, from the routing policy
+        max_tokens: Output limit per map request
+        entry_point: Usage-ledger tag for where calls come from
+        progress_callback: Optional callback function for progress updates
+        ledger_path: Usage ledger file; defaults to ``usage.default_ledger_path()``
+        cancel: Optional CancelToken, checked before each map and the reduce request
+
+    Returns:
+        The formatted meeting document text
+
+    Raises:
+        RuntimeError: If a map or the reduce request fails
+        Cancelled: If ``cancel`` fired
+    """
+    chunks = split_transcript(transcript_text, chunk_chars)
+    if progress_callback:
+        progress_callback(f"Cleaning up {len(chunks)} parts of the meeting in parallel...")
+    mapper = ChunkedFormatter(client, model, MAP_USER_PROMPT, max_tokens=max_tokens,
+                              system_prompt=MAP_SYSTEM_PROMPT, temperature=0.1,
+                              max_workers=min(len(chunks), MAX_MAP_WORKERS),
+                              entry_point=entry_point, document_type='meeting',
+                              ledger_path=ledger_path)
+    results, errors = mapper.format_chunks(chunks, cancel=cancel)
+    if cancel is not None:
+        cancel.raise_if_cancelled()
+    if errors:
+        raise RuntimeError(f"Claude API error: {'; '.join(errors)}")
+    notes = [ChunkNotes.parse(result) for result in results]
+
+    if progress_callback:
+        progress_callback("Summarizing action items and decisions...")
+    prompt = reduce_prompt(notes)
+    started = time.perf_counter()
+    try:
+        response = client.messages.create(
+            model=model,
+            max_tokens=REDUCE_MAX_TOKENS,
+            temperature=0.1,
+            system=REDUCE_SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": prompt}],
+        )
+    except Exception as e:
+        record_usage(entry_point, model, None, time.perf_counter() - started, prompt,
+                     'meeting', status='error', path=ledger_path)
+        raise RuntimeError(f"Claude API error: {str(e)}") from e
+    record_usage(entry_point, model, response.usage, time.perf_counter() - started, prompt,
+                 'meeting', path=ledger_path)
+
+    return assemble(parse_sections(response.content[0].text), notes)
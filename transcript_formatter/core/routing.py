@@ -0,0 +1,175 @@
+"""
+Model routing: which model, output limit and chunking a transcript gets.
+
+Every entry point (CLI, batch and watch pipeline, web app, serverless
+handlers) calls ``choose_route()`` instead of hard-coding a model, so the
+policy lives in one place. Routes are tried in order and the first whose
+conditions match the job wins: short transcripts go to the fast model,
+ordinary ones to the stronger model in a single call, and very long ones are
+split into chunks formatted concurrently.
+
+A latency SLO (seconds) per entry point caps the estimated wall time: when
+a single call would overrun it, the transcript is chunked so that each
+chunk, formatted in parallel, fits the SLO.
+
+The policy below is the default. Point $TRANSCRIPT_ROUTING at a JSON file
+with the same keys to change it without a code change; top-level keys in
+the file replace the defaults.
+"""
+
+import json
+import os
+from typing import Optional
+
+
+ROUTING_ENV = 'TRANSCRIPT_ROUTING'
+
+HAIKU = 'claude-haiku-4-5-20251001'
+SONNET = 'claude-sonnet-4-5-20250929'
+
+# Formatting output is about as long as its input
+CHARS_PER_TOKEN = 4.0
+REQUEST_OVERHEAD_SECONDS = 2.0
+MIN_CHUNK_CHARS = 2000
+
+DEFAULT_POLICY = {
+    # Rough output speed of each model, for latency estimates
+    'models': {
+        HAIKU: {'tokens_per_second': 150},
+        SONNET: {'tokens_per_second': 70},
+    },
+    # Estimated seconds allowed per entry point; null means no limit
+    'slo_seconds': {
+        'web': 240,
+        'serverless': 45,
+        'cli': None,
+        'batch': None,
+        'watch': None,
+    },
+    # First match wins. Conditions: max_chars, document_type, entry_point.
+    'routes': [
+        # Meetings must keep every speaker's content; stay on the stronger model
+        {'name': 'meeting', 'document_type': 'meeting', 'max_chars': 60000,
+         'model': SONNET, 'max_tokens': 20480},
+        # Longer meetings are formatted by map-reduce (see meeting.py)
+        {'name': 'meeting_long', 'document_type': 'meeting', 'model': SONNET,
+         'max_tokens': 8192, 'chunk_chars': 16000},
+        {'name': 'short', 'max_chars': 8000, 'model': HAIKU, 'max_tokens': 4096},
+        {'name': 'standard', 'max_chars': 60000, 'model': SONNET, 'max_tokens': 20480},
+        {'name': 'long', 'model': SONNET, 'max_tokens': 8192, 'chunk_chars': 24000},
+    ],
+}
+
+_policy = None
+
+
+class Route:
+    """
+    The model, output limit and chunk size chosen for one transcript.
+
+    ``estimated_seconds`` is for one request: the whole transcript, or one
+    chunk when chunks are formatted in parallel.
+    """
+
+    __slots__ = ('name', 'model', 'max_tokens', 'chunk_chars', 'estimated_seconds')
+
+    def __init__(self, name: str, model: str, max_tokens: int,
+                 chunk_chars: Optional[int] = None, estimated_seconds: float = 0.0):
+        self.name = name
+        self.model = model
+        self.max_tokens = max_tokens
+        self.chunk_chars = chunk_chars
+        self.estimated_seconds = estimated_seconds
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"Route({self.to_dict()})"
+
+
+def load_policy(path: Optional[str] = None) -> dict:
+    """
+    The routing policy: the defaults, overridden by a JSON file.
+
+    Args:
+        path: Policy file; defaults to $TRANSCRIPT_ROUTING when set
+
+    Raises:
+        ValueError: If the file is not valid JSON or a route has no model
+    """
+    policy = dict(DEFAULT_POLICY)
+    path = path or os.environ.get(ROUTING_ENV)
+    if path:
+        try:
+            with open(path, encoding='utf-8') as f:
+                policy.update(json.load(f))
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot read routing policy {path}: {e}")
+    for route in policy['routes']:
+        if not route.get('model') or not route.get('max_tokens'):
+            raise ValueError(f"Routing policy route needs a model and max_tokens: {route}")
+    return policy
+
+
+def get_policy() -> dict:
+    """The process-wide policy, loaded on first use."""
+    global _policy
+    if _policy is None:
+        _policy = load_policy()
+    return _policy
+
+
+def choose_route(text_chars: int, document_type: str = 'world_impact', entry_point: str = 'cli',
+                 slo_seconds: Optional[float] = None, policy: Optional[dict] = None) -> Route:
+    """
+    Pick the model, max_tokens and chunking for a transcript.
+
+    Args:
+        text_chars: Length of the raw transcript in characters
+        document_type: ``world_impact``, ``meeting``, ...
+        entry_point: ``cli``, ``web``, ``serverless``, ``batch`` or ``watch``
+        slo_seconds: Latency target; defaults to the policy's value for the
+            entry point
+        policy: Policy to use instead of ``get_policy()``
+
+    Returns:
+        The Route; ``chunk_chars`` is None for a single request
+
+    Raises:
+        ValueError: If no route matches
+    """
+    policy = policy or get_policy()
+    for rule in policy['routes']:
+        if rule.get('max_chars') is not None and text_chars > rule['max_chars']:
+            continue
+        if rule.get('document_type') not in (None, document_type):
+            continue
+        if rule.get('entry_point') not in (None, entry_point):
+            continue
+        break
+    else:
+        raise ValueError(f"No routing rule matches a {text_chars}-character {document_type} transcript")
+
+    if slo_seconds is None:
+        slo_seconds = policy.get('slo_seconds', {}).get(entry_point)
+    speed = policy['models'].get(rule['model'], {}).get('tokens_per_second', 60)
+
+    def seconds_for(chars):
+        tokens = min(chars / CHARS_PER_TOKEN, rule['max_tokens'])
+        return REQUEST_OVERHEAD_SECONDS + tokens / speed
+
+    # Cap chunks at what one request can write back
+    chunk_chars = rule.get('chunk_chars')
+    longest_output = int(rule['max_tokens'] * CHARS_PER_TOKEN)
+    if text_chars > longest_output:
+        chunk_chars = min(chunk_chars or longest_output, longest_output)
+    if slo_seconds and seconds_for(min(text_chars, chunk_chars or text_chars)) > slo_seconds:
+        fits = int((slo_seconds - REQUEST_OVERHEAD_SECONDS) * speed * CHARS_PER_TOKEN)
+        chunk_chars = max(fits, MIN_CHUNK_CHARS)
+    if chunk_chars and chunk_chars >= text_chars:
+        chunk_chars = None
+
+    estimate = seconds_for(min(text_chars, chunk_chars or text_chars))
+    return Route(rule.get('name', rule['model']), rule['model'], rule['max_tokens'],
+                 chunk_chars, round(estimate, 1))
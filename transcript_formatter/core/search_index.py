@@ -0,0 +1,455 @@
+"""
+Full-text search over an archive of formatted transcripts.
+
+Formatted ``.docx`` files are read with the streaming reader, turned back
+into the lightly marked-up text Claude produced and parsed into a
+TranscriptDocument, so speakers, numbered section headers and Scripture
+references are detected exactly as the exporters detect them. The results
+go into a local SQLite database: plain tables for speakers, headings and
+references, and an FTS5 table for the full text.
+
+Indexing is incremental: documents are only re-read when their size or
+modification time changes, and a freshly exported document can be added
+directly from the parsed tree without reading it back.
+"""
+
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .document import TranscriptDocument, ensure_document, parse_document
+from .extractor import iter_docx_formatted
+
+
+# Setting this enables indexing of newly exported documents (CLI and web)
+INDEX_ENV = 'TRANSCRIPT_INDEX'
+DEFAULT_INDEX_PATH = 'transcript_index.sqlite3'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    title TEXT
+);
+CREATE TABLE IF NOT EXISTS speakers (
+    doc_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    turns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS speakers_doc ON speakers (doc_id);
+CREATE INDEX IF NOT EXISTS speakers_name ON speakers (name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS scriptures (
+    doc_id INTEGER NOT NULL,
+    reference TEXT NOT NULL,
+    book TEXT NOT NULL,
+    chapter INTEGER
+);
+CREATE INDEX IF NOT EXISTS scriptures_doc ON scriptures (doc_id);
+CREATE INDEX IF NOT EXISTS scriptures_book ON scriptures (book COLLATE NOCASE, chapter);
+CREATE TABLE IF NOT EXISTS headings (
+    doc_id INTEGER NOT NULL,
+    number INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS headings_doc ON headings (doc_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, speakers, scriptures, headings, body,
+    tokenize = 'porter unicode61'
+);
+"""
+
+# "2 Timothy 3:1-5", "Psalm 23", "Song of Songs 2" -> book and chapter
+_REFERENCE = re.compile(
+    r'(?P<book>(?:[1-3]\s+)?[A-Z][a-z]+(?:\s+of\s+[A-Z][a-z]+)?)'
+    r'(?:\s+(?:chapter\s+)?(?P<chapter>\d+)(?:\s*[:,]\s*(?:verses?\s+)?(?P<verse>\d+))?)?'
+)
+_QUERY_TERM = re.compile(r'"([^"]*)"|(\S+)')
+_BODY_SNIPPET_COLUMN = 4
+
+
+def default_index_path() -> str:
+    """Index location from $TRANSCRIPT_INDEX, else ./transcript_index.sqlite3."""
+    return os.environ.get(INDEX_ENV) or DEFAULT_INDEX_PATH
+
+
+def index_if_enabled(path, document, title_from_first_line: bool = False) -> bool:
+    """
+    Add a freshly exported document to the index named by $TRANSCRIPT_INDEX.
+
+    Does nothing (and returns False) when the variable is not set.
+    """
+    index_path = os.environ.get(INDEX_ENV)
+    if not index_path:
+        return False
+    with TranscriptIndex(index_path) as index:
+        index.add(path, document, title_from_first_line)
+    return True
+
+
+def read_formatted_docx(path) -> TranscriptDocument:
+    """
+    Parse a formatted Word document back into a TranscriptDocument.
+
+    Runs are turned back into ``**bold**``/``*italic*`` markup, one line per
+    paragraph, and parsed like Claude's output.
+
+    Raises:
+        ValueError: If the file is not a readable Word document
+    """
+    lines = []
+    for paragraph in iter_docx_formatted(path):
+        parts = []
+        for text, bold, italic in _merge_runs(paragraph.runs):
+            if not text.strip():
+                parts.append(text)
+            elif bold:
+                parts.append(f"**{text}**")
+            elif italic:
+                parts.append(f"*{text}*")
+            else:
+                parts.append(text)
+        lines.append(''.join(parts).replace('\n', ' '))
+    return parse_document('\n'.join(lines))
+
+
+def _merge_runs(runs):
+    """Join neighbouring runs with the same formatting so markup stays balanced."""
+    merged = []
+    for text, bold, italic in runs:
+        if merged and merged[-1][1:] == (bold, italic):
+            merged[-1] = (merged[-1][0] + text, bold, italic)
+        else:
+            merged.append((text, bold, italic))
+    return merged
+
+
+def parse_reference(text: str):
+    """
+    Split a Scripture reference into ``(book, chapter, verse)``.
+
+    Chapter and verse are None when absent. Returns None if the text does
+    not start with a book name.
+    """
+    match = _REFERENCE.match(' '.join(text.split()))
+    if not match:
+        return None
+    chapter, verse = match.group('chapter'), match.group('verse')
+    return (match.group('book'),
+            int(chapter) if chapter else None,
+            int(verse) if verse else None)
+
+
+def document_metadata(document: TranscriptDocument) -> Dict[str, list]:
+    """
+    Collect the searchable fields of a parsed transcript.
+
+    Returns:
+        Dict with ``speakers`` ({name: turns}), ``scriptures`` (list of
+        reference strings, in order, de-duplicated), ``headings`` (list of
+        ``(number, text)``) and ``body`` (the full text)
+    """
+    speakers = {}
+    scriptures = {}
+    headings = []
+    body = []
+
+    for block in document:
+        kind = block.kind
+        if kind == 'blank':
+            continue
+        if kind == 'lyrics':
+            body.extend(block.lyrics())
+            continue
+        if kind == 'divider':
+            continue
+
+        if kind == 'speaker':
+            name = block.speaker.replace('(continued)', '').strip()
+            speakers[name] = speakers.get(name, 0) + 1
+            body.append(f"{block.label} {block.text}".strip())
+        else:
+            body.append(block.text)
+        if kind == 'heading':
+            headings.append((block.number, block.text.strip()))
+
+        for span in block.spans:
+            if span.scripture:
+                reference = ' '.join(span.text.strip(' .,;:()').split())
+                if reference:
+                    scriptures.setdefault(reference, None)
+
+    return {
+        'speakers': speakers,
+        'scriptures': list(scriptures),
+        'headings': headings,
+        'body': '\n'.join(body),
+    }
+
+
+class TranscriptIndex:
+    """
+    SQLite full-text index of formatted transcripts.
+
+    Args:
+        path: Database file; created with the schema on first use
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_index_path()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        # WAL lets the web app search while the CLI is indexing
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def add(self, path, document=None, title_from_first_line: bool = False):
+        """
+        Index (or re-index) one document.
+
+        Args:
+            path: Path of the formatted document
+            document: Already formatted text or TranscriptDocument for the file;
+                read from ``path`` (which must be a .docx) when omitted
+            title_from_first_line: Passed to the parser when given raw text
+        """
+        path = Path(path).resolve()
+        if document is None:
+            document = read_formatted_docx(path)
+        else:
+            document = ensure_document(document, title_from_first_line)
+        stat = path.stat()
+        with self.conn:
+            self._write(str(path), stat.st_mtime, stat.st_size, document)
+
+    def update(self, paths: Iterable, prune: bool = False) -> Dict[str, int]:
+        """
+        Bring the index up to date with .docx files on disk.
+
+        Args:
+            paths: Files and/or directories (searched recursively)
+            prune: Also drop indexed documents under these paths that no
+                longer exist
+
+        Returns:
+            Counts of ``added``, ``updated``, ``unchanged``, ``removed`` and
+            ``failed`` documents
+        """
+        counts = dict.fromkeys(('added', 'updated', 'unchanged', 'removed', 'failed'), 0)
+        known = {row['path']: (row['mtime'], row['size'])
+                 for row in self.conn.execute('SELECT path, mtime, size FROM documents')}
+        seen = set()
+        roots = [Path(p).resolve() for p in paths]
+
+        for docx_path in _iter_docx(roots):
+            key = str(docx_path)
+            seen.add(key)
+            try:
+                stat = docx_path.stat()
+                if known.get(key) == (stat.st_mtime, stat.st_size):
+                    counts['unchanged'] += 1
+                    continue
+                document = read_formatted_docx(docx_path)
+            except (ValueError, OSError):
+                counts['failed'] += 1
+                continue
+            with self.conn:
+                self._write(key, stat.st_mtime, stat.st_size, document)
+            counts['updated' if key in known else 'added'] += 1
+
+        if prune:
+            for key in known:
+                if key not in seen and any(_is_under(key, root) for root in roots):
+                    self.remove(key)
+                    counts['removed'] += 1
+        return counts
+
+    def remove(self, path):
+        """Drop a document from the index."""
+        row = self.conn.execute('SELECT id FROM documents WHERE path = ?',
+                                (str(Path(path).resolve()),)).fetchone()
+        if row:
+            with self.conn:
+                self._delete(row['id'])
+
+    def search(self, query: Optional[str] = None, speaker: Optional[str] = None,
+               scripture: Optional[str] = None, heading: Optional[str] = None,
+               limit: int = 20) -> List[dict]:
+        """
+        Find documents by text and/or structured fields.
+
+        Args:
+            query: Words or "quoted phrases" that must all appear (full text,
+                stemmed); best matches first
+            speaker: Speaker name, or part of one (case-insensitive)
+            scripture: Book, book and chapter or full reference, e.g.
+                ``"2 Timothy"``, ``"2 Timothy 3"`` or ``"2 Timothy 3:1"``
+            heading: Text appearing in a numbered section header
+            limit: Maximum number of results
+
+        Returns:
+            Dicts with ``path``, ``title``, ``speakers``, ``scriptures`` (the
+            matching references when filtering by Scripture, else all) and
+            ``snippet`` (highlighted with [brackets] when ``query`` is given)
+
+        Raises:
+            ValueError: If no criteria are given or the reference has no book
+        """
+        if not any((query, speaker, scripture, heading)):
+            raise ValueError("Give a query, speaker, scripture or heading to search for")
+
+        where, params = [], []
+        if query:
+            select = ("SELECT d.id, d.path, d.title, "
+                      f"snippet(documents_fts, {_BODY_SNIPPET_COLUMN}, '[', ']', ' ... ', 16) AS snippet "
+                      "FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid")
+            where.append('documents_fts MATCH ?')
+            params.append(fts_query(query))
+            order = 'ORDER BY bm25(documents_fts)'
+        else:
+            select = "SELECT d.id, d.path, d.title, NULL AS snippet FROM documents d"
+            order = 'ORDER BY d.path'
+
+        if speaker:
+            where.append("d.id IN (SELECT doc_id FROM speakers WHERE name LIKE ?)")
+            params.append(f"%{speaker}%")
+
+        scripture_filter = None
+        if scripture:
+            scripture_filter = self._scripture_filter(scripture)
+            where.append(f"d.id IN (SELECT doc_id FROM scriptures WHERE {scripture_filter[0]})")
+            params.extend(scripture_filter[1])
+
+        if heading:
+            where.append("d.id IN (SELECT doc_id FROM headings WHERE text LIKE ?)")
+            params.append(f"%{heading}%")
+
+        sql = f"{select} WHERE {' AND '.join(where)} {order} LIMIT ?"
+        rows = self.conn.execute(sql, params + [limit]).fetchall()
+
+        results = []
+        for row in rows:
+            speakers = [r['name'] for r in self.conn.execute(
+                'SELECT name FROM speakers WHERE doc_id = ? ORDER BY turns DESC', (row['id'],))]
+            ref_sql = 'SELECT reference FROM scriptures WHERE doc_id = ?'
+            ref_params = [row['id']]
+            if scripture_filter:
+                ref_sql += f' AND {scripture_filter[0]}'
+                ref_params += scripture_filter[1]
+            references = [r['reference'] for r in self.conn.execute(ref_sql, ref_params)]
+            results.append({
+                'path': row['path'],
+                'title': row['title'],
+                'speakers': speakers,
+                'scriptures': references,
+                'snippet': row['snippet'],
+            })
+        return results
+
+    @staticmethod
+    def _scripture_filter(scripture):
+        """SQL condition on the scriptures table for a reference like "2 Timothy 3"."""
+        # Accept "2 timothy 3" as typed; only "of" (Song of Songs) stays lower case
+        typed = re.sub(r'\b(?!of\b)[a-z]', lambda m: m.group(0).upper(), scripture.strip())
+        parsed = parse_reference(typed)
+        if not parsed:
+            raise ValueError(f"Not a Scripture reference: {scripture!r}")
+        book, chapter, verse = parsed
+        condition, params = 'book = ? COLLATE NOCASE', [book]
+        if chapter is not None:
+            condition += ' AND chapter = ?'
+            params.append(chapter)
+        if verse is not None:
+            # Matches "3:1", "3:1-5" and "3:1--5" but not "3:10"
+            condition += " AND (reference LIKE ? OR reference LIKE ?)"
+            params += [f"% {chapter}:{verse}", f"% {chapter}:{verse}-%"]
+        return condition, params
+
+    def _write(self, path, mtime, size, document):
+        """Replace a document's rows; runs inside the caller's transaction."""
+        row = self.conn.execute('SELECT id FROM documents WHERE path = ?', (path,)).fetchone()
+        if row:
+            self._delete(row['id'])
+
+        meta = document_metadata(document)
+        title = document.title or Path(path).stem.replace('_', ' ')
+        doc_id = self.conn.execute(
+            'INSERT INTO documents (path, mtime, size, title) VALUES (?, ?, ?, ?)',
+            (path, mtime, size, title)).lastrowid
+
+        self.conn.executemany(
+            'INSERT INTO speakers (doc_id, name, turns) VALUES (?, ?, ?)',
+            [(doc_id, name, turns) for name, turns in meta['speakers'].items()])
+        references = []
+        for reference in meta['scriptures']:
+            parsed = parse_reference(reference)
+            if parsed:
+                references.append((doc_id, reference, parsed[0], parsed[1]))
+        self.conn.executemany(
+            'INSERT INTO scriptures (doc_id, reference, book, chapter) VALUES (?, ?, ?, ?)',
+            references)
+        self.conn.executemany(
+            'INSERT INTO headings (doc_id, number, text) VALUES (?, ?, ?)',
+            [(doc_id, number, text) for number, text in meta['headings']])
+        self.conn.execute(
+            'INSERT INTO documents_fts (rowid, title, speakers, scriptures, headings, body) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (doc_id, title, '\n'.join(meta['speakers']), '\n'.join(meta['scriptures']),
+             '\n'.join(text for _, text in meta['headings']), meta['body']))
+
+    def _delete(self, doc_id):
+        for table in ('speakers', 'scriptures', 'headings'):
+            self.conn.execute(f'DELETE FROM {table} WHERE doc_id = ?', (doc_id,))
+        self.conn.execute('DELETE FROM documents_fts WHERE rowid = ?', (doc_id,))
+        self.conn.execute('DELETE FROM documents WHERE id = ?', (doc_id,))
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn user input into a safe FTS5 query.
+
+    Every word or "quoted phrase" becomes a quoted FTS5 phrase, so all must
+    match and punctuation such as ``3:16`` cannot break the query syntax.
+    """
+    terms = []
+    for phrase, word in _QUERY_TERM.findall(text):
+        term = (phrase or word).strip()
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"')
+    if not terms:
+        raise ValueError("Empty search query")
+    return ' '.join(terms)
+
+
+def _iter_docx(roots):
+    """Yield .docx files under the given files/directories, skipping Word lock files."""
+    for root in roots:
+        if root.is_file():
+            if root.suffix.lower() == '.docx':
+                yield root
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.lower().endswith('.docx') and not filename.startswith('~$'):
+                    yield Path(dirpath) / filename
+
+
+def _is_under(path, root):
+    path = Path(path)
+    return path == root or root in path.parents
@@ -0,0 +1,213 @@
+"""
+Structured output: Claude returns the document model itself.
+
+Instead of markdown that ``parse_document()`` has to reverse-engineer,
+Claude is made to call a tool whose input schema is the document: a title
+and a list of blocks (headings, speaker turns, paragraphs, lyric blocks)
+with inline spans. ``document_from_data()`` validates the tool input and
+builds the TranscriptDocument the exporters render, so malformed output is
+rejected in milliseconds, before any DOCX is built.
+"""
+
+from .document import (
+    BLANK, _MAX_SPEAKER_LENGTH, Heading, LyricBlock, Paragraph, Span, SpeakerTurn,
+    Title, TranscriptDocument, is_scripture_reference,
+)
+
+
+TOOL_NAME = 'emit_transcript'
+
+_SPANS_SCHEMA = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'text': {'type': 'string'},
+            'style': {'type': 'string', 'enum': ['bold', 'italic', 'scripture']},
+        },
+        'required': ['text'],
+    },
+}
+
+TRANSCRIPT_TOOL = {
+    'name': TOOL_NAME,
+    'description': 'Return the formatted transcript as structured data.',
+    'input_schema': {
+        'type': 'object',
+        'properties': {
+            'title': {'type': 'string'},
+            'blocks': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'properties': {
+                        'type': {'type': 'string', 'enum': ['heading', 'speaker', 'paragraph', 'lyrics']},
+                        'number': {'type': 'integer', 'description': 'heading: section number'},
+                        'text': {'type': 'string', 'description': 'heading: section title'},
+                        'speaker': {'type': 'string', 'description': 'speaker: name without colon'},
+                        'spans': dict(_SPANS_SCHEMA, description='speaker, paragraph: content'),
+                        'lines': {'type': 'array', 'items': {'type': 'string'},
+                                  'description': 'lyrics: one sung line each, without ♪'},
+                    },
+                    'required': ['type'],
+                },
+            },
+        },
+        'required': ['title', 'blocks'],
+    },
+}
+
+STRUCTURED_INSTRUCTIONS = f"""
+
+OUTPUT FORMAT (this replaces any markup instructions above):
+Do not write the transcript as text. Call the {TOOL_NAME} tool once with the whole formatted transcript:
+- title: the program title
+- blocks, in order: "speaker" turns (speaker name plus spans), "paragraph" blocks (spans), numbered "heading" blocks (number and text) and "lyrics" blocks (lines)
+- spans carry inline formatting: style "scripture" for Bible references, "bold" for organizations and websites, "italic" for quotes, show names and song titles; plain text has no style
+- no asterisks and no ♪ symbols anywhere in the text"""
+
+# Problems listed in one validation error
+_MAX_PROBLEMS = 10
+
+
+def document_from_data(data) -> TranscriptDocument:
+    """
+    Validate the tool input and build the document from it.
+
+    Blocks are separated by blank blocks, as ``parse_document()`` produces
+    for text with blank lines between paragraphs, and lyric lines get their
+    ``♪`` markers, so exporters see exactly what they would for parsed text.
+
+    Args:
+        data: The ``input`` of Claude's tool call
+
+    Returns:
+        The TranscriptDocument
+
+    Raises:
+        ValueError: Listing the first problems found, by JSON path
+    """
+    problems = []
+
+    def problem(path, message):
+        problems.append(f"{path}: {message}")
+
+    def text_field(value, path):
+        if not isinstance(value, str) or not value.strip():
+            problem(path, "must be a non-empty string")
+            return ''
+        return value.strip()
+
+    def spans_field(value, path, required):
+        if not isinstance(value, list) or (required and not value):
+            problem(path, "must be a non-empty list" if required else "must be a list")
+            return []
+        spans = []
+        for i, item in enumerate(value):
+            if not isinstance(item, dict) or not isinstance(item.get('text'), str):
+                problem(f"{path}[{i}]", "must be an object with a text string")
+                continue
+            style = item.get('style')
+            if style not in (None, 'bold', 'italic', 'scripture'):
+                problem(f"{path}[{i}].style", f"unknown style {style!r}")
+                continue
+            if '*' in item['text'] or '♪' in item['text']:
+                problem(f"{path}[{i}].text", "contains markup")
+                continue
+            if style == 'scripture' and not is_scripture_reference(item['text']):
+                # The same test parse_document() applies to bold spans in text
+                problem(f"{path}[{i}].text", f"is not a Scripture reference: {item['text'][:60]!r}")
+                continue
+            # Parsed text marks Scripture bold too; keep the spans identical
+            spans.append(Span(item['text'], bold=style in ('bold', 'scripture'),
+                              italic=style == 'italic', scripture=style == 'scripture'))
+        return spans
+
+    if not isinstance(data, dict):
+        raise ValueError(f"Structured output must be an object, not {type(data).__name__}")
+    title = text_field(data.get('title'), 'title')
+    blocks = [Title([Span(title)])]
+    raw_blocks = data.get('blocks')
+    if not isinstance(raw_blocks, list) or not raw_blocks:
+        problem('blocks', "must be a non-empty list")
+        raw_blocks = []
+
+    for i, raw in enumerate(raw_blocks):
+        path = f"blocks[{i}]"
+        kind = raw.get('type') if isinstance(raw, dict) else None
+        if kind == 'heading':
+            number = raw.get('number')
+            if not isinstance(number, int) or isinstance(number, bool) or number < 1:
+                problem(f"{path}.number", "must be a positive integer")
+            block = Heading(number, [Span(text_field(raw.get('text'), f"{path}.text"))])
+        elif kind == 'speaker':
+            speaker = text_field(raw.get('speaker'), f"{path}.speaker").rstrip(':')
+            if len(speaker) > _MAX_SPEAKER_LENGTH or ':' in speaker:
+                problem(f"{path}.speaker", f"is not a speaker name: {speaker[:60]!r}")
+            block = SpeakerTurn(speaker, spans_field(raw.get('spans', []), f"{path}.spans", False))
+        elif kind == 'paragraph':
+            block = Paragraph(spans_field(raw.get('spans'), f"{path}.spans", True))
+        elif kind == 'lyrics':
+            lines = raw.get('lines')
+            if not isinstance(lines, list) or not lines:
+                problem(f"{path}.lines", "must be a non-empty list")
+                lines = []
+            block = LyricBlock([f"♪ {text_field(line, f'{path}.lines[{n}]').strip('♪ ')} ♪"
+                                for n, line in enumerate(lines)])
+        else:
+            problem(f"{path}.type", f"unknown block type {kind!r}")
+            continue
+        blocks.extend((BLANK, block))
+        if len(problems) >= _MAX_PROBLEMS:
+            break
+
+    if problems:
+        raise ValueError("Invalid structured output: " + '; '.join(problems[:_MAX_PROBLEMS]))
+    return TranscriptDocument(blocks)
+
+
+def request_structured(client, model: str, max_tokens: int, system_prompt: str,
+                       user_message: str, temperature: float = 0.1):
+    """
+    Ask Claude for a transcript through the tool.
+
+    Args:
+        client: An ``anthropic.Anthropic`` client
+        model: Model name
+        max_tokens: Output limit for the request
+        system_prompt: The formatting instructions; STRUCTURED_INSTRUCTIONS
+            are appended
+        user_message: The user turn, with the transcript
+
+    Returns:
+        The final Message; pass it to ``document_from_message()``
+
+    Raises:
+        anthropic.APIError: If the request fails
+    """
+    with client.messages.stream(
+        model=model,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        system=system_prompt + STRUCTURED_INSTRUCTIONS,
+        tools=[TRANSCRIPT_TOOL],
+        tool_choice={'type': 'tool', 'name': TOOL_NAME},
+        messages=[{'role': 'user', 'content': user_message}],
+    ) as stream:
+        return stream.get_final_message()
+
+
+def document_from_message(message) -> TranscriptDocument:
+    """
+    The validated document from Claude's tool call.
+
+    Raises:
+        ValueError: If Claude did not call the tool, ran out of tokens or
+            returned an invalid document
+    """
+    if message.stop_reason == 'max_tokens':
+        raise ValueError("Structured output was cut off by the output token limit")
+    for block in message.content:
+        if block.type == 'tool_use' and block.name == TOOL_NAME:
+            return document_from_data(block.input)
+    raise ValueError(f"Claude did not call the {TOOL_NAME} tool")
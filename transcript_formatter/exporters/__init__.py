@@ -1,5 +1,20 @@
 """Exporters for various document formats."""
 
-from .word_exporter import WordExporter
+from .multi_exporter import EXPORTERS, export_formats, get_exporter
 
-__all__ = ['WordExporter']
\ No newline at end of file
+__all__ = [
+    'WordExporter', 'PdfExporter', 'HtmlExporter', 'MarkdownExporter',
+    'TextExporter', 'EXPORTERS', 'export_formats', 'get_exporter',
+]
+
+# Exporter classes load on first access so python-docx is only imported
+# when a Word document is actually written
+_LAZY = {class_name: module_name for module_name, class_name in EXPORTERS.values()}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        from importlib import import_module
+        module = import_module(f'.{_LAZY[name]}', __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
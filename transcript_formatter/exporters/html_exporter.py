@@ -0,0 +1,73 @@
+from html import escape
+
+from ..core.document import ensure_document
+
+
+_STYLE = """body { font-family: Calibri, Arial, sans-serif; font-size: 11pt; line-height: 1.15;
+       max-width: 7.5in; margin: 1in auto; color: #000; }
+h1 { font-family: Arial, sans-serif; font-size: 20pt; text-align: center; }
+h2 { font-size: 14pt; margin-top: 12pt; }
+p { margin: 0 0 6pt; }
+.scripture { color: #0563C1; font-weight: bold; }
+.quote { color: #595959; }
+.lyrics p { margin: 0; font-style: italic; color: #595959; }
+hr { border: 0; border-bottom: 0.75pt solid #000; }"""
+
+
+class HtmlExporter:
+    """Standalone HTML export styled like the Word output"""
+
+    extension = 'html'
+
+    def export(self, formatted_text, output_path):
+        """Export formatted markdown (or an already parsed document) to HTML"""
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(self.render(ensure_document(formatted_text)))
+        return output_path
+
+    def render(self, document):
+        """Render a document as a complete HTML page"""
+        body = []
+        for block in document:
+            kind = block.kind
+            if kind == 'blank':
+                continue
+            if kind == 'title':
+                body.append(f"<h1>{self._spans(block.spans)}</h1>")
+            elif kind == 'heading':
+                body.append(f"<h2>{block.number}. {self._spans(block.spans)}</h2>")
+            elif kind == 'speaker':
+                label = f"<strong>{escape(block.label)}</strong>"
+                text = self._spans(block.spans)
+                body.append(f"<p>{label} {text}</p>" if text else f"<p>{label}</p>")
+            elif kind == 'lyrics':
+                lines = ''.join(f"<p>{escape(line)}</p>" for line in block.lines)
+                body.append(f'<div class="lyrics">{lines}</div>')
+            elif kind == 'divider':
+                body.append('<hr>')
+            else:
+                body.append(f"<p>{self._spans(block.spans)}</p>")
+
+        title = escape(document.title or 'Transcript')
+        return (
+            '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+            f'<title>{title}</title>\n<style>\n{_STYLE}\n</style>\n</head>\n<body>\n'
+            + '\n'.join(body)
+            + '\n</body>\n</html>\n'
+        )
+
+    def _spans(self, spans):
+        """Render inline spans as escaped HTML"""
+        out = []
+        for span in spans:
+            text = escape(span.text, quote=False)
+            if span.scripture:
+                text = f'<strong class="scripture">{text}</strong>'
+            elif span.bold:
+                text = f"<strong>{text}</strong>"
+            elif span.italic:
+                # Long quotes in gray
+                css = ' class="quote"' if len(span.text) > 50 else ''
+                text = f"<em{css}>{text}</em>"
+            out.append(text)
+        return ''.join(out)
@@ -0,0 +1,54 @@
+from ..core.document import ensure_document
+
+
+class MarkdownExporter:
+    """Markdown export with normalized markup"""
+
+    extension = 'md'
+
+    def export(self, formatted_text, output_path):
+        """Export formatted markdown (or an already parsed document) to a .md file"""
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(self.render(ensure_document(formatted_text)))
+        return output_path
+
+    def render(self, document):
+        """Render a document as Markdown, one blank line between blocks"""
+        parts = []
+        for block in document:
+            kind = block.kind
+            if kind == 'blank':
+                continue
+            if kind == 'title':
+                parts.append(f"# {self._spans(block.spans)}")
+            elif kind == 'heading':
+                parts.append(f"## {block.number}. {self._spans(block.spans)}")
+            elif kind == 'speaker':
+                parts.append(f"**{block.label}** {self._spans(block.spans)}".rstrip())
+            elif kind == 'lyrics':
+                # Trailing double space keeps lyric lines on separate lines
+                parts.append('  \n'.join(f"*{line}*" for line in block.lines))
+            elif kind == 'divider':
+                parts.append('---')
+            else:
+                parts.append(self._spans(block.spans))
+        return '\n\n'.join(parts) + '\n'
+
+    def _spans(self, spans):
+        """Render inline spans with ** and * markers"""
+        out = []
+        for span in spans:
+            text = span.text
+            if not text.strip():
+                out.append(text)
+                continue
+            # Keep surrounding whitespace outside the markers
+            lead = text[:len(text) - len(text.lstrip())]
+            trail = text[len(text.rstrip()):]
+            core = text.strip()
+            if span.bold or span.scripture:
+                core = f"**{core}**"
+            elif span.italic:
+                core = f"*{core}*"
+            out.append(f"{lead}{core}{trail}")
+        return ''.join(out)
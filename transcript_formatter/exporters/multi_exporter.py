@@ -0,0 +1,81 @@
+"""
+Render one formatting result to several output formats.
+
+The formatted text is parsed into a TranscriptDocument once and the
+exporters render from that shared tree concurrently, so asking for more
+formats never means another Claude call or another parse.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from ..core.document import ensure_document
+
+
+# Format name -> (module, class). Exporters are imported on first use, so
+# listing the formats (e.g. for CLI choices) does not load python-docx.
+EXPORTERS = {
+    'docx': ('word_exporter', 'WordExporter'),
+    'pdf': ('pdf_exporter', 'PdfExporter'),
+    'html': ('html_exporter', 'HtmlExporter'),
+    'md': ('markdown_exporter', 'MarkdownExporter'),
+    'txt': ('text_exporter', 'TextExporter'),
+}
+
+
+def get_exporter(fmt: str):
+    """
+    Return the exporter class for a format name.
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    try:
+        module_name, class_name = EXPORTERS[fmt.lower()]
+    except KeyError:
+        raise ValueError(f"Unsupported format: {fmt}. Choose from: {', '.join(EXPORTERS)}") from None
+    return getattr(import_module(f'.{module_name}', __package__), class_name)
+
+
+def export_formats(formatted_text, output_base, formats: Iterable[str],
+                   max_workers: Optional[int] = None,
+                   title_from_first_line: bool = False) -> Dict[str, str]:
+    """
+    Export formatted text to several formats in parallel.
+
+    Args:
+        formatted_text: Formatted transcript text or a parsed TranscriptDocument
+        output_base: Output path without extension; each format adds its own
+        formats: Format names, keys of EXPORTERS (e.g. ``['docx', 'pdf']``)
+        max_workers: Thread pool size, defaults to one per format
+        title_from_first_line: Passed to the parser when given raw text
+
+    Returns:
+        Mapping of format name to the written output path
+
+    Raises:
+        ValueError: If a format is not supported
+    """
+    formats = list(dict.fromkeys(fmt.lower() for fmt in formats))
+    unknown = [fmt for fmt in formats if fmt not in EXPORTERS]
+    if unknown:
+        raise ValueError(
+            f"Unsupported format(s): {', '.join(unknown)}. "
+            f"Choose from: {', '.join(EXPORTERS)}"
+        )
+
+    document = ensure_document(formatted_text, title_from_first_line)
+    output_base = Path(output_base)
+    exporters = {fmt: get_exporter(fmt) for fmt in formats}
+
+    def render(fmt):
+        output_path = str(output_base.with_name(f"{output_base.name}.{fmt}"))
+        return fmt, exporters[fmt]().export(document, output_path)
+
+    if len(formats) == 1:
+        return dict([render(formats[0])])
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(formats)) as pool:
+        return dict(pool.map(render, formats))
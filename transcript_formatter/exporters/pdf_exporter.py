@@ -0,0 +1,246 @@
+"""
+Pure-Python PDF exporter.
+
+Writes PDF 1.4 directly using the standard Helvetica fonts, so no PDF
+library (or LibreOffice) is needed. Layout mirrors the Word exporter:
+centered title, bold numbered headings, bold speaker labels, blue
+Scripture references and gray italic lyrics.
+"""
+
+import re
+import zlib
+
+from ..core.document import ensure_document
+
+
+# Helvetica advance widths (1/1000 em) for ASCII 32-126
+_HELVETICA_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+)
+_DEFAULT_WIDTH = 556
+_BOLD_FACTOR = 1.06
+
+# Font resource name -> base font
+_FONTS = {
+    'F1': 'Helvetica',
+    'F2': 'Helvetica-Bold',
+    'F3': 'Helvetica-Oblique',
+    'F4': 'Helvetica-BoldOblique',
+}
+
+# Characters outside WinAnsiEncoding that show up in transcripts
+_SUBSTITUTIONS = str.maketrans({'─': '-', '♪': None})
+
+_BLACK = (0, 0, 0)
+_BLUE = (0.02, 0.388, 0.757)   # RGB(5, 99, 193)
+_GRAY = (0.349, 0.349, 0.349)  # RGB(89, 89, 89)
+
+_WORD_PATTERN = re.compile(r'\S+\s*|\s+')
+
+
+def _font_for(bold, italic):
+    return ('F4' if italic else 'F2') if bold else ('F3' if italic else 'F1')
+
+
+def _text_width(text, font, size):
+    """Width of text in points for one of the Helvetica faces"""
+    total = 0
+    for ch in text:
+        code = ord(ch) - 32
+        total += _HELVETICA_WIDTHS[code] if 0 <= code < 95 else _DEFAULT_WIDTH
+    if font in ('F2', 'F4'):
+        total *= _BOLD_FACTOR
+    return total * size / 1000.0
+
+
+def _pdf_string(text):
+    """Encode text as a WinAnsi PDF literal string"""
+    data = text.translate(_SUBSTITUTIONS).encode('cp1252', 'replace')
+    data = data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+    return b'(' + data + b')'
+
+
+class PdfExporter:
+    """Letter-size PDF export with 1 inch margins"""
+
+    extension = 'pdf'
+
+    PAGE_WIDTH = 612
+    PAGE_HEIGHT = 792
+    MARGIN = 72
+    FONT_SIZE = 11
+    LINE_SPACING = 1.15
+
+    def __init__(self):
+        """Initialize an empty page list"""
+        self._pages = []
+        self._ops = None
+        self._y = 0.0
+
+    def export(self, formatted_text, output_path):
+        """Export formatted markdown (or an already parsed document) to PDF"""
+        data = self.render(ensure_document(formatted_text))
+        with open(output_path, 'wb') as f:
+            f.write(data)
+        return output_path
+
+    def render(self, document):
+        """Render a document to PDF bytes"""
+        self._pages = []
+        self._new_page()
+
+        for block in document:
+            kind = block.kind
+            if kind == 'blank':
+                continue
+            if kind == 'title':
+                runs = [(span.text, 'F2', _BLACK) for span in block.spans]
+                self._paragraph(runs, 20, space_after=12, center=True)
+            elif kind == 'heading':
+                runs = [(f"{block.number}. {block.text}", 'F2', _BLACK)]
+                self._paragraph(runs, 14, space_before=12, space_after=6)
+            elif kind == 'speaker':
+                runs = [(block.label + ' ', 'F2', _BLACK)] + self._runs(block.spans)
+                self._paragraph(runs, self.FONT_SIZE, space_after=6)
+            elif kind == 'lyrics':
+                for lyric in block.lyrics():
+                    if lyric:
+                        self._paragraph([(lyric, 'F3', _GRAY)], self.FONT_SIZE)
+                self._y -= 6
+            elif kind == 'divider':
+                self._rule()
+            else:
+                self._paragraph(self._runs(block.spans), self.FONT_SIZE, space_after=6)
+
+        return self._serialize(document.title)
+
+    def _runs(self, spans):
+        """Convert inline spans to (text, font, color) runs"""
+        runs = []
+        for span in spans:
+            if span.bold and span.scripture:
+                color = _BLUE
+            elif span.italic and len(span.text) > 50:
+                color = _GRAY
+            else:
+                color = _BLACK
+            runs.append((span.text, _font_for(span.bold, span.italic), color))
+        return runs
+
+    def _new_page(self):
+        self._ops = []
+        self._pages.append(self._ops)
+        self._y = self.PAGE_HEIGHT - self.MARGIN
+
+    def _paragraph(self, runs, size, space_before=0, space_after=0, center=False):
+        """Word-wrap runs into lines and place them, breaking pages as needed"""
+        leading = size * self.LINE_SPACING
+        width = self.PAGE_WIDTH - 2 * self.MARGIN
+        self._y -= space_before
+
+        for line in self._wrap(runs, size, width):
+            if self._y - leading < self.MARGIN:
+                self._new_page()
+            self._y -= leading
+            x = self.MARGIN
+            if center:
+                x += (width - sum(_text_width(t, f, size) for t, f, _ in line)) / 2
+            self._draw_line(line, x, self._y + (leading - size), size)
+
+        self._y -= space_after
+
+    def _wrap(self, runs, size, width):
+        """Greedy word wrap; returns lines of (text, font, color) pieces"""
+        lines, line, line_width = [], [], 0.0
+        for text, font, color in runs:
+            for word in _WORD_PATTERN.findall(text):
+                word_width = _text_width(word.rstrip(), font, size)
+                if line and line_width + word_width > width:
+                    lines.append(line)
+                    line, line_width = [], 0.0
+                    word = word.lstrip()
+                    if not word:
+                        continue
+                if line and line[-1][1] == font and line[-1][2] == color:
+                    line[-1] = (line[-1][0] + word, font, color)
+                else:
+                    line.append((word, font, color))
+                line_width += _text_width(word, font, size)
+        if line:
+            lines.append(line)
+        return lines
+
+    def _draw_line(self, pieces, x, y, size):
+        ops = [b'BT', b'%.2f %.2f Td' % (x, y)]
+        color = None
+        for text, font, piece_color in pieces:
+            if piece_color != color:
+                ops.append(b'%.3f %.3f %.3f rg' % piece_color)
+                color = piece_color
+            ops.append(b'/%s %d Tf %s Tj' % (font.encode(), size, _pdf_string(text)))
+        ops.append(b'ET')
+        self._ops.extend(ops)
+
+    def _rule(self):
+        """Horizontal 0.75pt divider line"""
+        if self._y - 12 < self.MARGIN:
+            self._new_page()
+        self._y -= 6
+        self._ops.append(b'0.75 w %d %.2f m %d %.2f l S' % (
+            self.MARGIN, self._y, self.PAGE_WIDTH - self.MARGIN, self._y))
+        self._y -= 6
+
+    def _serialize(self, title):
+        """Assemble catalog, fonts, pages and xref table into PDF bytes"""
+        objects = []
+
+        def add(body):
+            objects.append(body)
+            return len(objects)
+
+        catalog = add(None)
+        pages = add(None)
+        font_refs = b' '.join(
+            b'/%s %d 0 R' % (name.encode(), add(
+                b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>'
+                % base.encode()))
+            for name, base in _FONTS.items()
+        )
+        resources = b'<< /Font << ' + font_refs + b' >> >>'
+
+        page_refs = []
+        total = len(self._pages)
+        for number, ops in enumerate(self._pages, 1):
+            footer = (b'BT 0 g /F1 9 Tf %.2f %d Td %s Tj ET' % (
+                self.PAGE_WIDTH / 2 - 12, self.MARGIN // 2,
+                _pdf_string(f"{number} / {total}")))
+            stream = zlib.compress(b'\n'.join(ops + [footer]))
+            content = add(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream'
+                          % (len(stream), stream))
+            page_refs.append(add(
+                b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] '
+                b'/Resources %s /Contents %d 0 R >>'
+                % (pages, self.PAGE_WIDTH, self.PAGE_HEIGHT, resources, content)))
+
+        objects[catalog - 1] = b'<< /Type /Catalog /Pages %d 0 R >>' % pages
+        objects[pages - 1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % ref for ref in page_refs), len(page_refs))
+        info = add(b'<< /Title %s /Producer (transcript-formatter) >>'
+                   % _pdf_string(title or 'Transcript'))
+
+        out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(len(out))
+            out += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+        xref = len(out)
+        out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+        out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+        out += (b'trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                % (len(objects) + 1, catalog, info, xref))
+        return bytes(out)
@@ -0,0 +1,32 @@
+from ..core.document import ensure_document
+
+
+class TextExporter:
+    """Plain text export with all markup removed"""
+
+    extension = 'txt'
+
+    def export(self, formatted_text, output_path):
+        """Export formatted markdown (or an already parsed document) to plain text"""
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(self.render(ensure_document(formatted_text)))
+        return output_path
+
+    def render(self, document):
+        """Render a document as plain text, one block per line"""
+        lines = []
+        for block in document:
+            kind = block.kind
+            if kind == 'blank':
+                lines.append('')
+            elif kind == 'lyrics':
+                lines.extend(block.lines)
+            elif kind == 'divider':
+                lines.append('-' * 80)
+            elif kind == 'heading':
+                lines.append(f"{block.number}. {block.text}")
+            elif kind == 'speaker':
+                lines.append(f"{block.label} {block.text}".rstrip())
+            else:
+                lines.append(block.text)
+        return '\n'.join(lines).strip('\n') + '\n'
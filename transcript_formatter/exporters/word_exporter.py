@@ -3,7 +3,9 @@ from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
-import re
+
+from ..core.document import ensure_document, is_scripture_reference
+
 
 class WordExporter:
     def __init__(self):
@@ -64,156 +66,88 @@ class WordExporter:
         return p
     
     def export(self, formatted_text, output_path):
-        """Export formatted markdown to Word document"""
-        
-        lines = formatted_text.split('\n')
-        i = 0
+        """Export formatted markdown (or an already parsed document) to Word"""
+        document = ensure_document(formatted_text)
         
-        while i < len(lines):
-            line = lines[i].strip()
-            
-            # Skip empty lines but maintain spacing
-            if not line:
-                self.doc.add_paragraph()
-                i += 1
-                continue
-            
-            # Detect divider lines (optional)
-            if re.match(r'^[_\-]{10,}', line):
-                self._add_horizontal_line()
-                i += 1
-                continue
-            
-            # Title - first bold text (centered)
-            if line.startswith('**') and line.endswith('**') and len(self.doc.paragraphs) < 5:
-                title = line.strip('*')
-                p = self.doc.add_paragraph()
-                p.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                
-                run = p.add_run(title)
-                run.font.name = 'Arial'
-                run.font.size = Pt(20)
-                run.bold = True
-                
-                p.paragraph_format.space_after = Pt(12)
-                i += 1
-                continue
-            
-            # Numbered teaching headers (1. Title, 2. Title, etc.)
-            if re.match(r'\*\*\d+\.\s+[^*]+\*\*', line):
-                header_text = line.strip('*')
-                p = self.doc.add_heading(header_text, level=1)
-                i += 1
-                continue
-            
-            # Song lyrics
-            if line.startswith('♪'):
-                lyric_text = line.rstrip('♪').strip()
-                p = self.doc.add_paragraph()
-                
-                # Standalone music notes
-                if lyric_text == '♪♪♪' or lyric_text == '♪ ♪ ♪':
-                    p.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                    run = p.add_run(lyric_text)
-                else:
-                    # Regular lyrics - left aligned, italic, gray
-                    p.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-                    run = p.add_run(lyric_text)
-                    run.italic = True
-                    run.font.color.rgb = RGBColor(89, 89, 89)
-                
-                p.paragraph_format.space_after = Pt(0)
-                i += 1
-                continue
-            
-            # Regular paragraph with inline formatting
-            p = self.doc.add_paragraph()
-            self._add_formatted_text(p, line)
-            i += 1
+        for block in document:
+            getattr(self, f'_add_{block.kind}')(block)
         
         self.doc.save(output_path)
         return output_path
     
-    def _add_formatted_text(self, paragraph, text):
-        """Add text with proper formatting - NO asterisks in output"""
-        
-        # Find all bold sections
-        bold_pattern = r'\*\*(.+?)\*\*'
-        bold_matches = list(re.finditer(bold_pattern, text))
-        
-        # Find all italic sections
-        italic_pattern = r'(?<!\*)\*(?!\*)(.+?)(?<!\*)\*(?!\*)'
-        italic_matches = list(re.finditer(italic_pattern, text))
-        
-        # Build formatting regions
-        regions = []
-        for match in bold_matches:
-            regions.append({
-                'type': 'bold',
-                'start': match.start(),
-                'end': match.end(),
-                'content': match.group(1)
-            })
-        
-        for match in italic_matches:
-            # Skip if inside bold
-            inside_bold = any(
-                r['start'] < match.start() < r['end'] 
-                for r in regions if r['type'] == 'bold'
-            )
-            if not inside_bold:
-                regions.append({
-                    'type': 'italic',
-                    'start': match.start(),
-                    'end': match.end(),
-                    'content': match.group(1)
-                })
-        
-        regions.sort(key=lambda x: x['start'])
+    def _add_blank(self, block):
+        """Skip empty lines but maintain spacing"""
+        self.doc.add_paragraph()
+    
+    def _add_divider(self, block):
+        self._add_horizontal_line()
+    
+    def _add_title(self, block):
+        """Title - first bold text (centered)"""
+        p = self.doc.add_paragraph()
+        p.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
         
-        # Build paragraph
-        last_pos = 0
+        run = p.add_run(block.text)
+        run.font.name = 'Arial'
+        run.font.size = Pt(20)
+        run.bold = True
         
-        for region in regions:
-            # Add text before formatted region
-            if region['start'] > last_pos:
-                before_text = text[last_pos:region['start']].replace('*', '')
-                if before_text:
-                    paragraph.add_run(before_text)
+        p.paragraph_format.space_after = Pt(12)
+    
+    def _add_heading(self, block):
+        """Numbered teaching headers (1. Title, 2. Title, etc.)"""
+        self.doc.add_heading(f"{block.number}. {block.text}", level=1)
+    
+    def _add_lyrics(self, block):
+        """Song lyrics, one paragraph per line"""
+        for line in block.lines:
+            lyric_text = line.rstrip('♪').strip()
+            p = self.doc.add_paragraph()
+            
+            # Standalone music notes
+            if not lyric_text or lyric_text == '♪ ♪ ♪':
+                p.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+                p.add_run(line)
+            else:
+                # Regular lyrics - left aligned, italic, gray
+                p.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
+                run = p.add_run(lyric_text)
+                run.italic = True
+                run.font.color.rgb = RGBColor(89, 89, 89)
             
-            # Add formatted content
-            run = paragraph.add_run(region['content'])
+            p.paragraph_format.space_after = Pt(0)
+    
+    def _add_speaker(self, block):
+        """Bold speaker label followed by their words"""
+        p = self.doc.add_paragraph()
+        p.add_run(block.label).bold = True
+        if block.spans:
+            p.add_run(' ')
+            self._add_spans(p, block.spans)
+    
+    def _add_paragraph(self, block):
+        """Regular paragraph with inline formatting"""
+        p = self.doc.add_paragraph()
+        self._add_spans(p, block.spans)
+    
+    def _add_spans(self, paragraph, spans):
+        """Add inline spans with proper formatting - NO asterisks in output"""
+        for span in spans:
+            run = paragraph.add_run(span.text)
             
-            if region['type'] == 'bold':
+            if span.bold:
                 run.bold = True
                 # Scripture references in blue
-                if self._is_scripture_reference(region['content']):
+                if span.scripture:
                     run.font.color.rgb = RGBColor(5, 99, 193)
             
-            elif region['type'] == 'italic':
+            elif span.italic:
                 run.italic = True
                 # Long quotes in gray
-                if len(region['content']) > 50:
+                if len(span.text) > 50:
                     run.font.color.rgb = RGBColor(89, 89, 89)
-            
-            last_pos = region['end']
-        
-        # Add remaining text
-        if last_pos < len(text):
-            remaining = text[last_pos:].replace('*', '')
-            if remaining:
-                paragraph.add_run(remaining)
     
     def _is_scripture_reference(self, text):
         """Check if text is a scripture reference"""
-        # Has verse numbers
-        if re.search(r'\d+:\d+', text) or re.search(r'\d+--\d+', text):
-            return True
-        
-        # Common book names
-        books = [
-            'John', 'Timothy', 'Mark', 'Jeremiah', 'Hebrews',
-            'Luke', 'Acts', 'Jude', 'Matthew', 'Romans',
-            'Corinthians', 'Genesis', 'Exodus', 'Psalms'
-        ]
-        return any(book in text for book in books)
\ No newline at end of file
+        return is_scripture_reference(text)
+
@@ -0,0 +1,86 @@
+"""
+Append-only JSON Lines record of per-file processing state.
+
+Each line is one update ``{"key": ..., <fields>}``; loading replays the lines
+so the last value of every field wins. Appending a short line per update
+is cheap and safe to interrupt: at worst the final, partial line of a crashed
+run is ignored on the next load.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterator, Optional, Tuple
+
+
+def file_hash(path) -> str:
+    """SHA-256 of a file's contents, used to tell whether an input changed."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Persistent ``key -> fields`` state backed by a JSONL file.
+
+    Args:
+        path: The manifest file; created (with its directory) on first update
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._records: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._torn = False
+        self._load()
+
+    def _load(self):
+        try:
+            f = open(self.path, encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                self._torn = not line.endswith('\n')
+                try:
+                    entry = json.loads(line)
+                    key = entry.pop('key')
+                except (ValueError, KeyError, AttributeError):
+                    # Torn write from an interrupted run
+                    continue
+                self._records.setdefault(key, {}).update(entry)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._records
+
+    def __len__(self):
+        return len(self._records)
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        with self._lock:
+            return iter([(key, dict(record)) for key, record in self._records.items()])
+
+    def get(self, key: str) -> Optional[dict]:
+        """Current fields for a key, or None."""
+        with self._lock:
+            record = self._records.get(key)
+            return dict(record) if record is not None else None
+
+    def update(self, key: str, **fields) -> dict:
+        """Merge fields into a key's record and append the change to the file."""
+        line = json.dumps(dict(key=key, **fields), ensure_ascii=False)
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                # Never append onto the partial last line of a crashed run
+                f.write(('\n' if self._torn else '') + line + '\n')
+            self._torn = False
+            record = self._records.setdefault(key, {})
+            record.update(fields)
+            return dict(record)
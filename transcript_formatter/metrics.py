@@ -0,0 +1,216 @@
+"""
+Per-stage timing spans and Prometheus-style metrics.
+
+Wrap each stage of a request in ``span()``; its duration is logged as one
+JSON line (logger ``transcript_formatter.metrics``) and recorded in a
+histogram that ``render_prometheus()`` serves in the Prometheus text
+exposition format::
+
+    with span('generate', document_type='meeting') as s:
+        for text in stream:
+            s.mark('first_token')   # time to first token, recorded once
+            ...
+
+Metrics live in the process that recorded them; with several gunicorn
+workers each one reports its own counts, which Prometheus sums per label.
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# Stages range from milliseconds (parsing) to minutes (generation)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0, 60.0, 120.0, 300.0)
+
+STAGE_METRIC = 'transcript_stage_seconds'
+FAILURE_METRIC = 'transcript_stage_failures_total'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# document_type comes from the upload form; other values are counted as
+# "other" so clients cannot create unbounded label sets
+DOCUMENT_TYPES = ('world_impact', 'meeting')
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}   # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple[str, ...]):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            pairs = list(zip(self.label_names, labels))
+            for bound, count in zip(self.buckets, values):
+                yield f"{self.name}_bucket{_labels(pairs + [('le', f'{bound:g}')])} {count}"
+            yield f"{self.name}_bucket{_labels(pairs + [('le', '+Inf')])} {values[-1]}"
+            yield f"{self.name}_sum{_labels(pairs)} {values[-2]:.6f}"
+            yield f"{self.name}_count{_labels(pairs)} {values[-1]}"
+
+
+class Counter:
+    """Monotonic counter keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._series: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            series = sorted(self._series.items())
+        for labels, value in series:
+            yield f"{self.name}{_labels(list(zip(self.label_names, labels)))} {value:g}"
+
+
+class Gauge:
+    """
+    Current values read when metrics are rendered.
+
+    Args:
+        name: Metric name
+        help_text: HELP line
+        read: Returns the value to report, called on every render
+    """
+
+    def __init__(self, name: str, help_text: str, read):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {self.read():g}"
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+STAGE_SECONDS = Histogram(STAGE_METRIC, 'Time spent in each processing stage.',
+                          ('stage', 'document_type'))
+STAGE_FAILURES = Counter(FAILURE_METRIC, 'Processing stages that raised an error.',
+                         ('stage', 'document_type'))
+
+
+class Span:
+    """A running stage; see ``span()``."""
+
+    def __init__(self, stage: str, document_type: str, fields: dict):
+        self.stage = stage
+        self.document_type = document_type
+        self.fields = fields
+        self.started = time.perf_counter()
+        self._marked = set()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def mark(self, stage: str):
+        """Record the time from the span's start to now as ``stage``, once."""
+        if stage in self._marked:
+            return
+        self._marked.add(stage)
+        record(stage, self.elapsed(), self.document_type, **self.fields)
+
+
+def document_type_label(document_type: Optional[str]) -> str:
+    """The histogram label for a document type: ``unknown``, ``other`` or one of DOCUMENT_TYPES."""
+    if document_type is None:
+        return 'unknown'
+    return document_type if document_type in DOCUMENT_TYPES else 'other'
+
+
+def record(stage: str, seconds: float, document_type: str = 'unknown',
+           status: str = 'ok', **fields):
+    """Log one stage duration and add it to the metrics."""
+    labels = (stage, document_type)
+    STAGE_SECONDS.observe(seconds, labels)
+    if status != 'ok':
+        STAGE_FAILURES.inc(labels)
+    entry = dict(event='stage', stage=stage, document_type=document_type,
+                 seconds=round(seconds, 4), status=status, **fields)
+    logger.info(json.dumps(entry, default=str))
+
+
+@contextmanager
+def span(stage: str, document_type: Optional[str] = None, **fields) -> Iterator[Span]:
+    """
+    Time a processing stage.
+
+    Args:
+        stage: Stage name, e.g. ``extract``, ``generate`` or ``save``
+        document_type: Histogram label; ``unknown`` when not given and
+            ``other`` when not one of DOCUMENT_TYPES
+        **fields: Extra values for the structured log line (not metric labels)
+
+    Yields:
+        The running Span, for ``mark()``-ing milestones such as the first token
+    """
+    current = Span(stage, document_type_label(document_type), fields)
+    try:
+        yield current
+    except BaseException as e:
+        record(stage, current.elapsed(), current.document_type, status='error',
+               error=type(e).__name__, **fields)
+        raise
+    record(stage, current.elapsed(), current.document_type, **fields)
+
+
+# Metrics other modules add with register()
+_registered = []
+
+
+def register(metric):
+    """Serve a metric (anything with ``render()``) alongside the stage metrics."""
+    _registered.append(metric)
+    return metric
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = list(STAGE_SECONDS.render()) + list(STAGE_FAILURES.render())
+    for metric in _registered:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
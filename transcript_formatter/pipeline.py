@@ -0,0 +1,292 @@
+"""
+Staged, resumable processing of one transcript file.
+
+A file goes through three stages: ``extracted`` (raw text read), ``formatted``
+(Claude's output saved to a cache file) and ``exported`` (documents
+written). Each stage is recorded in a Manifest together with the input's
+content hash, output paths and per-stage timings. When resuming, a file
+whose hash is unchanged restarts at the first missing stage, and formatted
+text already in the cache is reused instead of calling Claude again.
+
+``run_message_batch`` feeds many files through the Message Batches API
+instead: the ``formatted`` stage is preceded by ``submitted`` (with the
+batch id), so an interrupted overnight run resumes polling the same batch
+rather than paying for it twice.
+"""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .core.chunking import merge_formatted_chunks
+from .manifest import Manifest, file_hash
+
+
+def process_file(input_path, output_base, formats: Iterable[str], formatter,
+                 manifest: Manifest, cache_dir, key: Optional[str] = None,
+                 resume: bool = True, log: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    Format and export one transcript, recording each stage in the manifest.
+
+    Args:
+        input_path: Raw transcript (.txt or .docx)
+        output_base: Output path without extension; each format adds its own
+        formats: Export formats
+        formatter: Object with ``format_transcript(text)`` (a ClaudeFormatter)
+        manifest: Where stages are recorded
+        cache_dir: Folder for cached formatted text
+        key: Manifest key; defaults to the absolute input path
+        resume: Reuse completed stages when the input hash is unchanged
+        log: Optional callable for progress messages
+
+    Returns:
+        The file's manifest record; ``resumed`` is True when nothing had to
+        be redone
+
+    Raises:
+        Exception: Whatever the failing stage raised, after recording it
+    """
+    from .core.extractor import extract_text
+    from .exporters import export_formats
+
+    input_path = Path(input_path)
+    key = key or str(input_path.resolve())
+    formats = list(dict.fromkeys(fmt.lower() for fmt in formats))
+    log = log or (lambda message: None)
+
+    input_hash = file_hash(input_path)
+    record = manifest.get(key) or {}
+    if not resume or record.get('input_hash') != input_hash:
+        record = {}
+
+    outputs = record.get('outputs') or {}
+    missing = [fmt for fmt in formats if not os.path.exists(outputs.get(fmt, ''))]
+    if record.get('stage') == 'exported' and not missing:
+        return dict(record, resumed=True)
+
+    timings = dict(record.get('timings') or {})
+    stage = 'extracted'
+    try:
+        formatted_text = _read_cache(record.get('formatted_path'))
+        if formatted_text is None:
+            started = time.perf_counter()
+            raw_text = extract_text(input_path)
+            timings['extract'] = round(time.perf_counter() - started, 3)
+            manifest.update(key, input_hash=input_hash, stage='extracted', error=None,
+                            timings=timings, updated=time.time())
+
+            stage = 'formatted'
+            started = time.perf_counter()
+            formatted_text = formatter.format_transcript(raw_text)
+            timings['format'] = round(time.perf_counter() - started, 3)
+            formatted_path = _write_cache(cache_dir, input_path, input_hash, formatted_text)
+            manifest.update(key, stage='formatted', formatted_path=formatted_path,
+                            timings=timings, updated=time.time())
+        else:
+            log(f"Reusing formatted text for {input_path.name}")
+            missing = formats if record.get('stage') != 'exported' else missing
+
+        stage = 'exported'
+        started = time.perf_counter()
+        outputs = dict(outputs)
+        outputs.update(export_formats(formatted_text, output_base, missing))
+        timings['export'] = round(time.perf_counter() - started, 3)
+        _index_if_enabled(outputs, missing, formatted_text, log)
+        return dict(manifest.update(key, input_hash=input_hash, stage='exported', error=None,
+                                    outputs=outputs, timings=timings, updated=time.time()),
+                    resumed=False)
+    except Exception as e:
+        manifest.update(key, input_hash=input_hash, error=f"{stage}: {e}", updated=time.time())
+        raise
+
+
+# The API accepts up to 100,000 requests per batch; smaller batches finish sooner
+MAX_BATCH_REQUESTS = 10000
+
+
+class _Formatted:
+    """Formatter stand-in that returns text Claude already produced in a batch."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def format_transcript(self, transcript_text: str) -> str:
+        return self.text
+
+
+def run_message_batch(input_paths: Iterable, output_dir, formats: Iterable[str], formatter,
+                      manifest: Manifest, cache_dir, resume: bool = True, workers: int = 2,
+                      poll_interval: float = 30.0, max_poll_interval: float = 600.0,
+                      log: Optional[Callable[[str], None]] = None
+                      ) -> List[Tuple[Path, Optional[dict], Optional[Exception], float]]:
+    """
+    Format transcripts through Message Batches and export them as results arrive.
+
+    All requests are submitted up front (identical inputs once), then each
+    batch is polled with backoff. Its results file is streamed and every
+    transcript is handed to the export pool as soon as all of its chunks
+    are in, while later batches are still being waited on.
+
+    Args:
+        input_paths: Raw transcripts; manifest keys are their absolute paths
+        output_dir: Outputs are ``<output_dir>/<stem>_formatted.<ext>``
+        formats: Export formats
+        formatter: A ClaudeFormatter
+        manifest: Where stages and batch ids are recorded
+        cache_dir: Folder for cached formatted text
+        resume: Skip exported files and re-poll batches already submitted
+        workers: Exports run at the same time
+        poll_interval: Seconds before the second status check of a batch
+        max_poll_interval: Longest wait between status checks
+        log: Optional callable for progress messages
+
+    Returns:
+        ``(input_path, record, error, seconds)`` per file; ``record`` is None
+        when ``error`` is set and has ``resumed`` True for skipped files
+    """
+    from .core.extractor import extract_text
+
+    log = log or (lambda message: None)
+    formats = list(dict.fromkeys(fmt.lower() for fmt in formats))
+    output_dir = Path(output_dir)
+    started = time.perf_counter()
+    outcomes = []
+
+    def export(input_path, text):
+        try:
+            record = process_file(input_path, output_dir / f"{input_path.stem}_formatted", formats,
+                                  _Formatted(text), manifest, cache_dir, resume=resume, log=log)
+        except Exception as e:
+            return input_path, None, e, time.perf_counter() - started
+        return input_path, record, None, time.perf_counter() - started
+
+    groups: Dict[str, List[Path]] = {}       # content hash prefix -> files with that content
+    digests: Dict[Path, str] = {}
+    requests: Dict[str, List[dict]] = {}     # prefix -> its requests, one per chunk
+    submitted: Dict[str, str] = {}           # prefix -> batch id from an earlier run
+    futures = []
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    with pool:
+        for input_path in map(Path, input_paths):
+            key = str(input_path.resolve())
+            digest = digests[input_path] = file_hash(input_path)
+            record = manifest.get(key) or {}
+            if resume and record.get('input_hash') == digest and record.get('stage') in ('formatted', 'exported'):
+                # Formatted text is cached; process_file exports whatever is missing
+                cached = _read_cache(record.get('formatted_path'))
+                if cached is not None:
+                    futures.append(pool.submit(export, input_path, cached))
+                    continue
+            prefix = digest[:16]
+            if prefix not in requests:
+                try:
+                    requests[prefix] = formatter.batch_requests(prefix, extract_text(input_path))
+                except (OSError, ValueError) as e:
+                    manifest.update(key, input_hash=digest, error=f"extracted: {e}", updated=time.time())
+                    outcomes.append((input_path, None, e, time.perf_counter() - started))
+                    continue
+            groups.setdefault(prefix, []).append(input_path)
+            if resume and record.get('input_hash') == digest and record.get('batch_id'):
+                submitted[prefix] = record['batch_id']
+
+        # Submit everything not already in a batch, never splitting a transcript
+        batches: Dict[str, List[str]] = {}
+        for batch_id in submitted.values():
+            batches.setdefault(batch_id, [])
+        for prefix, batch_id in submitted.items():
+            batches[batch_id].append(prefix)
+        todo = [prefix for prefix in requests if prefix not in submitted]
+        while todo:
+            group, count = [], 0
+            while todo and (not group or count + len(requests[todo[0]]) <= MAX_BATCH_REQUESTS):
+                count += len(requests[todo[0]])
+                group.append(todo.pop(0))
+            batch_id = formatter.submit_batch([request for prefix in group for request in requests[prefix]])
+            log(f"Submitted batch {batch_id}: {count} requests for "
+                f"{sum(len(groups[prefix]) for prefix in group)} transcripts")
+            for prefix in group:
+                for input_path in groups[prefix]:
+                    manifest.update(str(input_path.resolve()), input_hash=digests[input_path],
+                                    stage='submitted', batch_id=batch_id, error=None,
+                                    updated=time.time())
+            batches[batch_id] = group
+
+        for batch_id, prefixes in batches.items():
+            batch_started = time.perf_counter()
+            batch = formatter.wait_for_batch(batch_id, poll_interval, max_poll_interval, log)
+            turnaround = _batch_seconds(batch, time.perf_counter() - batch_started)
+            texts = {request['custom_id']: request['params']['messages'][0]['content']
+                     for prefix in prefixes for request in requests[prefix]}
+            parts: Dict[str, Dict[int, str]] = {prefix: {} for prefix in prefixes}
+            failed: Dict[str, str] = {}
+            for custom_id, text, error in formatter.iter_batch_results(batch_id, turnaround, texts):
+                prefix, _, index = custom_id.rpartition('-')
+                if prefix not in parts or prefix in failed:
+                    continue
+                if error:
+                    failed[prefix] = error
+                    continue
+                parts[prefix][int(index)] = text
+                if len(parts[prefix]) == len(requests[prefix]):
+                    merged = merge_formatted_chunks(parts[prefix][i] for i in sorted(parts[prefix]))
+                    for input_path in groups[prefix]:
+                        futures.append(pool.submit(export, input_path, merged))
+
+            for prefix in prefixes:
+                if prefix not in failed and len(parts[prefix]) == len(requests[prefix]):
+                    continue
+                error = RuntimeError(f"batch {batch_id}: {failed.get(prefix, 'results missing')}")
+                for input_path in groups[prefix]:
+                    # Forget the batch so the next --resume submits the file again
+                    manifest.update(str(input_path.resolve()), batch_id=None,
+                                    error=f"formatted: {error}", updated=time.time())
+                    outcomes.append((input_path, None, error, time.perf_counter() - started))
+
+    outcomes.extend(future.result() for future in futures)
+    return outcomes
+
+
+def _batch_seconds(batch, waited: float) -> float:
+    """Batch turnaround from its timestamps, or how long we waited for it."""
+    created, ended = getattr(batch, 'created_at', None), getattr(batch, 'ended_at', None)
+    try:
+        return (ended - created).total_seconds()
+    except (TypeError, AttributeError):
+        return waited
+
+
+def _read_cache(path) -> Optional[str]:
+    if not path:
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_cache(cache_dir, input_path: Path, input_hash: str, text: str) -> str:
+    """Atomically save formatted text; the name ties it to the input's content."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{input_path.stem}-{input_hash[:16]}.formatted.txt")
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _index_if_enabled(outputs: Dict[str, str], exported: Iterable[str], formatted_text: str, log):
+    """Index a new DOCX; a broken index must not fail the file."""
+    if 'docx' not in exported:
+        return
+    import sqlite3
+    from .core.search_index import index_if_enabled
+    try:
+        index_if_enabled(outputs['docx'], formatted_text)
+    except (sqlite3.Error, OSError) as e:
+        log(f"Warning: could not update the search index: {e}")
@@ -0,0 +1,140 @@
+"""
+Profile one transcript through the whole pipeline.
+
+``Profiler`` runs cProfile across extraction, formatting and export and
+writes two files: a ``.prof`` stats dump (open it with ``python -m pstats``
+or snakeviz) and a ``.prof.txt`` summary of the top-N hotspots. The summary
+also splits wall time into CPU time and waiting time, and reports the part
+of the wait spent blocked on sockets (the Claude API) as network wait, so a
+slow transcript can be blamed on the API or on our own code at a glance.
+
+Only one profile can run at a time per process: cProfile hooks are global
+on recent Pythons, and two overlapping profiles would mix their numbers.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+from typing import Optional
+
+
+DEFAULT_TOP = 25
+
+# Built-in calls that block on the network: socket and TLS I/O, DNS and the
+# select/poll loops httpx waits in
+_NETWORK_CALLS = re.compile(
+    r"'_socket\.socket'|'_ssl\._SSLSocket'|_socket\.getaddrinfo|select\.select|'select\.e?poll'"
+)
+
+_active = threading.Lock()
+
+
+class Profiler:
+    """
+    cProfile session with a wall/CPU/network breakdown.
+
+    Use as a context manager, or call ``start()`` and ``stop()``. The files
+    are written when the session stops, including when it stops because of
+    an exception, so failing transcripts can be profiled too.
+
+    Args:
+        output_path: Where the ``.prof`` file goes; the summary is written
+            next to it with ``.txt`` appended. None keeps the results in
+            memory only.
+        top: Functions listed in each section of the summary
+    """
+
+    def __init__(self, output_path=None, top: int = DEFAULT_TOP):
+        self.output_path = os.fspath(output_path) if output_path else None
+        self.top = top
+        self.report: Optional[dict] = None
+        self._profile = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    @property
+    def running(self) -> bool:
+        return self._profile is not None
+
+    def start(self):
+        """
+        Begin profiling the calling thread.
+
+        Raises:
+            RuntimeError: If another profile is already running
+        """
+        if not _active.acquire(blocking=False):
+            raise RuntimeError("Another profile is already running; try again when it finishes")
+        self._profile = cProfile.Profile()
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        self._profile.enable()
+
+    def stop(self) -> dict:
+        """
+        Stop profiling, write the files and return the report.
+
+        Returns:
+            Dict with ``wall_seconds``, ``cpu_seconds``, ``wait_seconds``,
+            ``network_seconds``, ``summary`` (the text written to the summary
+            file) and ``prof_path`` / ``summary_path`` when files were written
+        """
+        profile = self._profile
+        profile.disable()
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        self._profile = None
+        _active.release()
+
+        stats = pstats.Stats(profile)
+        network = sum(tottime for (filename, _, name), (_, _, tottime, _, _) in stats.stats.items()
+                      if filename == '~' and _NETWORK_CALLS.search(name))
+        report = {
+            'wall_seconds': round(wall, 3),
+            'cpu_seconds': round(cpu, 3),
+            'wait_seconds': round(max(wall - cpu, 0.0), 3),
+            'network_seconds': round(min(network, wall), 3),
+        }
+        report['summary'] = self._summary(profile, report)
+
+        if self.output_path:
+            directory = os.path.dirname(self.output_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            profile.dump_stats(self.output_path)
+            summary_path = self.output_path + '.txt'
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                f.write(report['summary'])
+            report['prof_path'] = self.output_path
+            report['summary_path'] = summary_path
+
+        self.report = report
+        return report
+
+    def discard(self):
+        """Stop profiling without writing anything."""
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile = None
+            _active.release()
+
+    def _summary(self, profile, report: dict) -> str:
+        out = io.StringIO()
+        out.write(f"Wall time:    {report['wall_seconds']:.3f}s\n")
+        out.write(f"CPU time:     {report['cpu_seconds']:.3f}s\n")
+        out.write(f"Waiting:      {report['wait_seconds']:.3f}s "
+                  f"(network {report['network_seconds']:.3f}s)\n")
+        for title, key in (('own time', 'tottime'), ('cumulative time', 'cumulative')):
+            out.write(f"\nTop {self.top} functions by {title}:\n")
+            pstats.Stats(profile, stream=out).strip_dirs().sort_stats(key).print_stats(self.top)
+        return out.getvalue()
@@ -0,0 +1,231 @@
+"""
+Token, cost and latency ledger for Claude calls.
+
+Every formatting request records its input, output and prompt-cache token
+counts, its latency and the size of the transcript it formatted, tagged
+with the entry point (``cli``, ``web``, ``serverless``, ``batch``,
+``watch``) and the document type. Rows go into a local SQLite database so
+``transcript-format usage`` can report daily totals, p95 latency and tokens
+per KB of transcript, which is where prompt regressions show up first.
+
+Recording never fails a request: a ledger that cannot be written is logged
+and skipped.
+"""
+
+import logging
+import math
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Ledger location; set to "off" to stop recording
+LEDGER_ENV = 'TRANSCRIPT_USAGE_LEDGER'
+DEFAULT_LEDGER_PATH = 'usage_ledger.sqlite3'
+
+# USD per million tokens: input, output, cache write, cache read
+PRICES = {
+    'claude-sonnet-4-5': (3.00, 15.00, 3.75, 0.30),
+    'claude-haiku-4-5': (1.00, 5.00, 1.25, 0.10),
+    'claude-opus-4-1': (15.00, 75.00, 18.75, 1.50),
+    'claude-3-5-haiku': (0.80, 4.00, 1.00, 0.08),
+    'claude-3-haiku': (0.25, 1.25, 0.30, 0.03),
+}
+# Message Batches requests are billed at half price
+BATCH_COST_FACTOR = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    entry_point TEXT NOT NULL,
+    document_type TEXT NOT NULL,
+    model TEXT NOT NULL,
+    status TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cache_write_tokens INTEGER NOT NULL,
+    cache_read_tokens INTEGER NOT NULL,
+    latency_seconds REAL NOT NULL,
+    transcript_bytes INTEGER NOT NULL,
+    cost_usd REAL
+);
+CREATE INDEX IF NOT EXISTS calls_day ON calls (day);
+"""
+
+
+def default_ledger_path() -> Optional[str]:
+    """Ledger location from $TRANSCRIPT_USAGE_LEDGER, else ./usage_ledger.sqlite3; None when off."""
+    path = os.environ.get(LEDGER_ENV) or DEFAULT_LEDGER_PATH
+    return None if path.lower() == 'off' else path
+
+
+def price_for(model: str):
+    """Per-million-token prices for a model (dated snapshots included), or None."""
+    for prefix, prices in PRICES.items():
+        if model.startswith(prefix):
+            return prices
+    return None
+
+
+def record_usage(entry_point: str, model: str, usage, latency_seconds: float,
+                 transcript_text: str = '', document_type: str = 'world_impact',
+                 status: str = 'ok', path: Optional[str] = None,
+                 cost_factor: float = 1.0) -> bool:
+    """
+    Append one Claude call to the ledger.
+
+    Args:
+        entry_point: Where the call came from, e.g. ``cli`` or ``web``
+        model: Model name sent to the API
+        usage: The response's ``usage`` object; None when the call failed
+            before one was returned
+        latency_seconds: Wall time of the call
+        transcript_text: The transcript text sent, for tokens-per-KB figures
+        document_type: ``world_impact``, ``meeting``, ...
+        status: ``ok``, ``error`` or ``cancelled`` (usage is what the call
+            had used when it was cut off)
+        path: Ledger file; defaults to ``default_ledger_path()``
+        cost_factor: Discount applied to list prices (BATCH_COST_FACTOR for batches)
+
+    Returns:
+        True if the row was written
+    """
+    path = path or default_ledger_path()
+    if not path:
+        return False
+    try:
+        with UsageLedger(path) as ledger:
+            ledger.add(entry_point, model, usage, latency_seconds,
+                       len(transcript_text.encode('utf-8')), document_type, status, cost_factor)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Could not record token usage in {path}: {e}")
+        return False
+    return True
+
+
+class UsageLedger:
+    """
+    SQLite store of per-call usage.
+
+    Args:
+        path: Database file; created on first use
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Formatting threads and worker processes may write at the same time
+        self.conn = sqlite3.connect(self.path, timeout=10)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def add(self, entry_point: str, model: str, usage, latency_seconds: float,
+            transcript_bytes: int, document_type: str = 'world_impact', status: str = 'ok',
+            cost_factor: float = 1.0):
+        """Record one call; token counts missing from ``usage`` count as zero."""
+        tokens = [getattr(usage, name, None) or 0 for name in (
+            'input_tokens', 'output_tokens',
+            'cache_creation_input_tokens', 'cache_read_input_tokens')]
+        prices = price_for(model)
+        cost = None
+        if prices:
+            cost = cost_factor * sum(count * price for count, price in zip(tokens, prices)) / 1_000_000
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO calls (ts, day, entry_point, document_type, model, status, '
+                'input_tokens, output_tokens, cache_write_tokens, cache_read_tokens, '
+                'latency_seconds, transcript_bytes, cost_usd) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (now, time.strftime('%Y-%m-%d', time.localtime(now)), entry_point,
+                 document_type or 'unknown', model, status, *tokens,
+                 latency_seconds, transcript_bytes, cost))
+
+    def report(self, days: int = 30, by: str = 'day') -> List[Dict]:
+        """
+        Summarise recent calls.
+
+        Args:
+            days: How many days back to include (today counts as one)
+            by: Grouping column: ``day``, ``entry_point``, ``document_type``
+                or ``model``
+
+        Returns:
+            One dict per group with ``calls``, ``errors``, ``cancelled``, token
+            totals of completed calls, ``cancelled_input_tokens`` and
+            ``cancelled_output_tokens``, ``cost_usd`` (cancelled calls
+            included), ``p50_latency``, ``p95_latency`` and input/output
+            tokens per KB of transcript (completed calls only)
+
+        Raises:
+            ValueError: For an unknown grouping
+        """
+        if by not in ('day', 'entry_point', 'document_type', 'model'):
+            raise ValueError(f"Cannot group usage by {by!r}")
+        since = time.strftime('%Y-%m-%d', time.localtime(time.time() - (days - 1) * 86400))
+        rows = self.conn.execute(
+            f'SELECT {by}, status, input_tokens, output_tokens, cache_write_tokens, '
+            'cache_read_tokens, latency_seconds, transcript_bytes, cost_usd '
+            'FROM calls WHERE day >= ? ORDER BY 1', (since,))
+
+        groups: Dict[str, dict] = {}
+        for key, status, inp, out, cache_write, cache_read, latency, size, cost in rows:
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = dict(
+                    group=key, calls=0, errors=0, cancelled=0, input_tokens=0, output_tokens=0,
+                    cache_write_tokens=0, cache_read_tokens=0, cancelled_input_tokens=0,
+                    cancelled_output_tokens=0, cost_usd=0.0, transcript_bytes=0, latencies=[])
+            group['calls'] += 1
+            if status == 'cancelled':
+                # Tokens spent count, but apart: a cut-off call says nothing
+                # about latency or tokens per KB
+                group['cancelled'] += 1
+                group['cancelled_input_tokens'] += inp + cache_write + cache_read
+                group['cancelled_output_tokens'] += out
+                group['cost_usd'] += cost or 0.0
+                continue
+            if status != 'ok':
+                group['errors'] += 1
+                continue
+            # The API's input_tokens excludes cached prompt tokens; count them all
+            group['input_tokens'] += inp + cache_write + cache_read
+            group['output_tokens'] += out
+            group['cache_write_tokens'] += cache_write
+            group['cache_read_tokens'] += cache_read
+            group['cost_usd'] += cost or 0.0
+            group['transcript_bytes'] += size
+            group['latencies'].append(latency)
+
+        for group in groups.values():
+            latencies = sorted(group.pop('latencies'))
+            group['p50_latency'] = _percentile(latencies, 50)
+            group['p95_latency'] = _percentile(latencies, 95)
+            kilobytes = group['transcript_bytes'] / 1024
+            group['input_per_kb'] = group['input_tokens'] / kilobytes if kilobytes else None
+            group['output_per_kb'] = group['output_tokens'] / kilobytes if kilobytes else None
+            group['cost_usd'] = round(group['cost_usd'], 4)
+        return list(groups.values())
+
+
+def _percentile(ordered: List[float], percent: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return None
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
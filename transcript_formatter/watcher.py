@@ -0,0 +1,289 @@
+"""
+Watch a folder and format raw transcripts as they arrive.
+
+New files are noticed through inotify on Linux (via ctypes, no extra
+dependency) or by polling the folder elsewhere. A file is only picked up
+once its size and modification time have stopped changing for a settle
+period, so transcripts still being copied in are not read half-written.
+Ready files are formatted on a bounded worker pool.
+
+Every file's progress is recorded in a JSONL manifest kept in the output
+folder, keyed by file name and content hash (see ``pipeline.py``), so a
+restarted watcher skips everything it already formatted, picks up new or
+changed files and reuses formatted text cached before a crash.
+"""
+
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from .manifest import Manifest, file_hash
+
+
+DEFAULT_PATTERNS = ('*.txt',)
+SETTLE_SECONDS = 2.0
+POLL_INTERVAL = 2.0
+STATE_FILE = '.transcript-watch.jsonl'
+CACHE_DIR = '.cache'
+
+# Names that partial downloads and editors use while a file is being written
+_TEMP_SUFFIXES = ('.tmp', '.part', '.partial', '.crdownload', '.swp')
+
+
+class _Inotify:
+    """Minimal non-recursive inotify watch on one directory (Linux only)."""
+
+    IN_MODIFY = 0x002
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f'inotify_add_watch failed for {directory}')
+
+    def read(self, timeout: float):
+        """Names of files with events, waiting up to ``timeout`` seconds."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        names = []
+        offset = 0
+        header = self._EVENT.size
+        while offset + header <= len(data):
+            _, _, _, length = self._EVENT.unpack_from(data, offset)
+            name = data[offset + header:offset + header + length].rstrip(b'\0')
+            offset += header + length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """
+    Format transcripts dropped into a folder.
+
+    Args:
+        directory: Folder to watch (not recursive)
+        output_dir: Where formatted files go; defaults to ``<directory>/formatted``
+        formats: Export formats for each transcript
+        patterns: Glob patterns of files to pick up
+        workers: Transcripts formatted at the same time
+        settle: Seconds a file must stay unchanged before it is read
+        poll_interval: Seconds between folder scans when polling
+        use_inotify: Use inotify where available; polling otherwise
+        process: ``process(input_path, output_base) -> {format: path}``;
+            defaults to formatting with Claude and exporting ``formats``
+        log: Callable for progress messages
+
+    Raises:
+        ValueError: If ``output_dir`` is the watched folder, where the
+            watcher would pick up its own outputs as new transcripts
+    """
+
+    def __init__(self, directory, output_dir=None, formats: Iterable[str] = ('docx',),
+                 patterns: Iterable[str] = DEFAULT_PATTERNS, workers: int = 2,
+                 settle: float = SETTLE_SECONDS, poll_interval: float = POLL_INTERVAL,
+                 use_inotify: bool = True,
+                 process: Optional[Callable[[Path, Path], Dict[str, str]]] = None,
+                 log: Callable[[str], None] = print):
+        self.directory = Path(directory).resolve()
+        self.output_dir = Path(output_dir).resolve() if output_dir else self.directory / 'formatted'
+        # Subfolders are not watched, so only the folder itself is off limits
+        if self.output_dir == self.directory:
+            raise ValueError(f"The output folder cannot be the watched folder {self.directory}; "
+                             f"its formatted files would be formatted again")
+        self.formats = tuple(formats)
+        self.patterns = tuple(patterns)
+        self.workers = workers
+        self.settle = settle
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.process = process or self._format_and_export
+        self.log = log
+        # Create the Claude client up front so a missing API key fails at startup
+        self._formatter = None if process else self._make_formatter()
+        self.manifest = Manifest(self.output_dir / STATE_FILE)
+
+        self._pending = {}     # name -> (size, mtime_ns, unchanged since)
+        self._ready = deque()
+        self._running = {}     # future -> (name, input_hash, (size, mtime_ns), started)
+        self._seen = {}        # name -> (size, mtime_ns) last handled, for polling
+
+    def run(self, once: bool = False):
+        """
+        Watch until interrupted.
+
+        Args:
+            once: Format what is already in the folder, then return
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        inotify = None
+        if self.use_inotify and not once:
+            try:
+                inotify = _Inotify(self.directory)
+            except (OSError, AttributeError) as e:
+                self.log(f"inotify unavailable ({e}); polling every {self.poll_interval:g}s")
+
+        self._scan()
+        self.log(f"Watching {self.directory} -> {self.output_dir} "
+                 f"({'inotify' if inotify else 'polling'}, {self.workers} workers)")
+
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while True:
+                self._check_pending()
+                self._start_ready(pool)
+                self._collect_finished()
+                if once and not (self._pending or self._ready or self._running):
+                    return
+
+                # Wake up soon enough to re-check settling files and finished work
+                timeout = self.poll_interval
+                if self._pending:
+                    timeout = min(timeout, self.settle / 2)
+                if self._running:
+                    timeout = min(timeout, 0.5)
+                timeout = max(timeout, 0.05)
+                if inotify:
+                    for name in inotify.read(timeout):
+                        self._notice(name)
+                else:
+                    time.sleep(timeout)
+                    self._scan()
+        finally:
+            if self._running:
+                self.log(f"Stopping; waiting for {len(self._running)} transcript(s) in progress")
+            pool.shutdown(wait=True)
+            self._collect_finished()
+            if inotify:
+                inotify.close()
+
+    def _wanted(self, name: str) -> bool:
+        if name.startswith(('.', '~')) or name.lower().endswith(_TEMP_SUFFIXES):
+            return False
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
+
+    def _scan(self):
+        """Notice new or changed files by listing the folder (polling and startup)."""
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not self._wanted(entry.name) or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if self._seen.get(entry.name) != (stat.st_size, stat.st_mtime_ns):
+                    self._notice(entry.name)
+
+    def _notice(self, name: str):
+        """Start (or restart) the settle timer for a file."""
+        if not self._wanted(name):
+            return
+        try:
+            stat = (self.directory / name).stat()
+        except FileNotFoundError:
+            self._pending.pop(name, None)
+            return
+        current = (stat.st_size, stat.st_mtime_ns)
+        previous = self._pending.get(name)
+        if previous is None or previous[:2] != current:
+            self._pending[name] = current + (time.monotonic(),)
+
+    def _check_pending(self):
+        """Move files that stopped changing for ``settle`` seconds to the ready queue."""
+        now = time.monotonic()
+        for name, (size, mtime_ns, since) in list(self._pending.items()):
+            try:
+                stat = (self.directory / name).stat()
+            except FileNotFoundError:
+                del self._pending[name]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                self._pending[name] = (stat.st_size, stat.st_mtime_ns, now)
+            elif now - since >= self.settle:
+                del self._pending[name]
+                self._seen[name] = (size, mtime_ns)
+                if name not in self._ready and name not in self._running_names():
+                    self._ready.append(name)
+
+    def _running_names(self):
+        return {name for name, _, _, _ in self._running.values()}
+
+    def _start_ready(self, pool):
+        """Submit ready files while the pool has a free worker."""
+        while self._ready and len(self._running) < self.workers:
+            name = self._ready.popleft()
+            path = self.directory / name
+            try:
+                stat = path.stat()
+                record = self.manifest.get(name) or {}
+                done = record.get('status') == 'done'
+                # Unchanged size and mtime: skip without re-reading the file
+                if done and [record.get('size'), record.get('mtime_ns')] == [stat.st_size, stat.st_mtime_ns]:
+                    continue
+                digest = file_hash(path)
+            except FileNotFoundError:
+                continue
+            if done and record.get('input_hash') == digest:
+                continue
+
+            self.log(f"{time.strftime('%H:%M:%S')} Formatting {name}")
+            output_base = self.output_dir / f"{path.stem}_formatted"
+            future = pool.submit(self.process, path, output_base)
+            self._running[future] = (name, digest, (stat.st_size, stat.st_mtime_ns), time.monotonic())
+
+    def _collect_finished(self):
+        for future in [f for f in self._running if f.done()]:
+            name, digest, (size, mtime_ns), started = self._running.pop(future)
+            elapsed = round(time.monotonic() - started, 1)
+            try:
+                outputs = future.result()
+            except Exception as e:
+                self.manifest.update(name, input_hash=digest, size=size, mtime_ns=mtime_ns,
+                                     status='failed', error=str(e), finished=time.time())
+                self.log(f"{time.strftime('%H:%M:%S')} Failed {name}: {e}")
+                continue
+            self.manifest.update(name, input_hash=digest, size=size, mtime_ns=mtime_ns,
+                                 status='done', error=None, outputs=outputs,
+                                 seconds=elapsed, finished=time.time())
+            self.log(f"{time.strftime('%H:%M:%S')} Formatted {name} in {elapsed}s -> "
+                     f"{', '.join(os.path.basename(p) for p in outputs.values())}")
+
+    @staticmethod
+    def _make_formatter():
+        from .core.claude_formatter import ClaudeFormatter
+        return ClaudeFormatter(entry_point='watch')
+
+    def _format_and_export(self, input_path: Path, output_base: Path) -> Dict[str, str]:
+        """Default processing: the staged pipeline, sharing one Claude client."""
+        from .pipeline import process_file
+
+        record = process_file(input_path, output_base, self.formats, self._formatter,
+                              self.manifest, self.output_dir / CACHE_DIR, key=input_path.name,
+                              log=self.log)
+        return record['outputs']
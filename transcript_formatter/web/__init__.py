@@ -0,0 +1,5 @@
+"""Request-handling helpers shared by the web and serverless entry points."""
+
+from .multipart import MultipartError, RequestTooLarge, UploadedFile, parse_multipart
+
+__all__ = ['MultipartError', 'RequestTooLarge', 'UploadedFile', 'parse_multipart']
\ No newline at end of file
@@ -0,0 +1,193 @@
+"""
+Admission control for formatting requests.
+
+Each formatting job holds its upload in memory and streams Claude output
+for minutes, so the web app bounds three things per worker process: jobs in
+flight, bytes of transcript being processed, and estimated Claude tokens
+(input plus output) outstanding. A request that would exceed a limit is
+rejected at once with HTTP 503 and a ``Retry-After`` estimate, rather than
+piling up until the gunicorn timeout; clients (and a load balancer) can
+retry or go elsewhere.
+
+``Retry-After`` comes from measured throughput: the controller keeps a
+moving average of bytes formatted per second per job, estimates when each
+running job will finish, and reports the time until enough of them have
+finished for the new job to fit.
+
+Limits are per worker process and come from the environment:
+ADMISSION_MAX_JOBS, ADMISSION_MAX_BYTES and ADMISSION_MAX_TOKENS (0 turns a
+limit off). ``stats()`` is served as Prometheus gauges and as JSON for
+autoscalers.
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Optional
+
+
+# Jobs running plus those waiting for a formatting slot (see scheduler.py)
+MAX_JOBS = int(os.environ.get('ADMISSION_MAX_JOBS', 12))
+MAX_BYTES = int(os.environ.get('ADMISSION_MAX_BYTES', 4 * 1024 * 1024))
+MAX_TOKENS = int(os.environ.get('ADMISSION_MAX_TOKENS', 1_000_000))
+
+# Formatting output is about as long as its input
+CHARS_PER_TOKEN = 4.0
+# Starting throughput estimate until jobs have been measured (~70 tokens/s)
+DEFAULT_BYTES_PER_SECOND = 280.0
+# Weight of the latest job in the moving average
+THROUGHPUT_SMOOTHING = 0.2
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 600
+
+
+def estimated_tokens(size: int) -> int:
+    """Claude tokens a transcript of ``size`` bytes is expected to use, input and output."""
+    return int(2 * size / CHARS_PER_TOKEN)
+
+
+class Rejected(Exception):
+    """The job does not fit right now; retry after ``retry_after`` seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({reason}); retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """An admitted job; release it (or leave its ``with`` block) when done."""
+
+    __slots__ = ('controller', 'size', 'tokens', 'started', 'released')
+
+    def __init__(self, controller: 'AdmissionController', size: int, tokens: int):
+        self.controller = controller
+        self.size = size
+        self.tokens = tokens
+        self.started = time.monotonic()
+        self.released = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Failed and cancelled jobs end early; their duration says nothing about throughput
+        self.controller.release(self, measure=exc_type is None)
+
+    def release(self):
+        self.controller.release(self)
+
+
+class AdmissionController:
+    """
+    Admit formatting jobs while they fit under the limits.
+
+    A job arriving when nothing is in flight is always admitted, however
+    large, so oversized transcripts are slow rather than impossible.
+
+    Args:
+        max_jobs: Jobs in flight; 0 for no limit
+        max_bytes: Transcript bytes in flight; 0 for no limit
+        max_tokens: Estimated tokens in flight; 0 for no limit
+    """
+
+    def __init__(self, max_jobs: int = MAX_JOBS, max_bytes: int = MAX_BYTES,
+                 max_tokens: int = MAX_TOKENS):
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self.max_tokens = max_tokens
+        self.bytes_per_second = DEFAULT_BYTES_PER_SECOND
+        self._tickets = set()
+        self._rejected = 0
+        self._completed = 0
+        self._lock = threading.Lock()
+
+    def admit(self, size: int, tokens: Optional[int] = None) -> Ticket:
+        """
+        Reserve room for a job.
+
+        Args:
+            size: Transcript size in bytes
+            tokens: Estimated Claude tokens; from ``estimated_tokens(size)`` by default
+
+        Returns:
+            The Ticket to release when the job ends
+
+        Raises:
+            Rejected: If the job does not fit now
+        """
+        tokens = estimated_tokens(size) if tokens is None else tokens
+        with self._lock:
+            self._check(size, tokens)
+            ticket = Ticket(self, size, tokens)
+            self._tickets.add(ticket)
+            return ticket
+
+    def check(self, size: int, tokens: Optional[int] = None):
+        """Raise Rejected if a job of this size would not be admitted now; reserves nothing."""
+        tokens = estimated_tokens(size) if tokens is None else tokens
+        with self._lock:
+            self._check(size, tokens)
+
+    def release(self, ticket: Ticket, measure: bool = True):
+        """
+        End a job and, if ``measure``, fold its duration into the throughput estimate.
+        """
+        with self._lock:
+            if ticket.released:
+                return
+            ticket.released = True
+            self._tickets.discard(ticket)
+            self._completed += 1
+            elapsed = time.monotonic() - ticket.started
+            if measure and ticket.size and elapsed > 0:
+                self.bytes_per_second += THROUGHPUT_SMOOTHING * (
+                    ticket.size / elapsed - self.bytes_per_second)
+
+    def stats(self) -> dict:
+        """Current load and limits, for metrics and autoscalers."""
+        with self._lock:
+            return {
+                'in_flight': len(self._tickets),
+                'queued_bytes': sum(ticket.size for ticket in self._tickets),
+                'estimated_tokens': sum(ticket.tokens for ticket in self._tickets),
+                'max_jobs': self.max_jobs,
+                'max_bytes': self.max_bytes,
+                'max_tokens': self.max_tokens,
+                'bytes_per_second': round(self.bytes_per_second, 1),
+                'completed': self._completed,
+                'rejected': self._rejected,
+            }
+
+    def _check(self, size, tokens):
+        """Raise Rejected unless the job fits; call with the lock held."""
+        if not self._tickets:
+            return
+        reason = self._over_limit(self._tickets, size, tokens)
+        if reason is None:
+            return
+        self._rejected += 1
+
+        # Wait for running jobs to finish, soonest first, until the job fits
+        now = time.monotonic()
+        running = sorted(self._tickets, key=lambda t: t.started + t.size / self.bytes_per_second)
+        wait = 0.0
+        for i, ticket in enumerate(running):
+            wait = max(ticket.started + ticket.size / self.bytes_per_second - now, 0.0)
+            if self._over_limit(running[i + 1:], size, tokens) is None:
+                break
+        retry_after = min(max(math.ceil(wait), MIN_RETRY_AFTER), MAX_RETRY_AFTER)
+        raise Rejected(reason, retry_after)
+
+    def _over_limit(self, tickets, size, tokens) -> Optional[str]:
+        """Which limit adding the job to ``tickets`` would break, if any."""
+        if not tickets:
+            return None
+        if self.max_jobs and len(tickets) + 1 > self.max_jobs:
+            return f"{len(tickets)} jobs in progress"
+        if self.max_bytes and sum(t.size for t in tickets) + size > self.max_bytes:
+            return "too much transcript text in progress"
+        if self.max_tokens and sum(t.tokens for t in tickets) + tokens > self.max_tokens:
+            return "token budget in use"
+        return None
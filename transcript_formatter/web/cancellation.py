@@ -0,0 +1,185 @@
+"""
+Cancelling uploads whose client has gone or asked to stop.
+
+Each upload being formatted is tracked under a job id (one the client
+chose, so it can cancel before the response arrives, or a generated one)
+with a CancelToken that the formatting code checks and that closes the
+Claude stream in progress (see ``core/cancellation.py``). A watcher thread
+per job cancels the token when
+
+* the client disconnects: the request body has been read by then, so a
+  connection that turns readable with nothing to read has been closed by
+  the peer (a closed tab, an aborted ``fetch``); or
+* ``cancel(job_id)`` is called, from ``POST /api/jobs/<id>/cancel``. The
+  job may be running in another gunicorn worker, so jobs are also marked
+  by a ``<id>.running`` file under ``directory`` and a cancel request for
+  one this worker does not hold leaves a ``<id>.cancel`` file that the
+  owning worker's watcher picks up within ``poll_interval`` seconds.
+
+Cancelled jobs leave their admission ticket and scheduler slot at once.
+"""
+
+import logging
+import os
+import re
+import select
+import socket
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from ..core.cancellation import CancelToken
+
+
+logger = logging.getLogger(__name__)
+
+CANCEL_DIR = os.environ.get('CANCEL_DIR', os.path.join(tempfile.gettempdir(), 'transcript-cancel'))
+# Seconds between checks for a closed connection or a cancel request from another worker
+POLL_SECONDS = 1.0
+
+_JOB_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def valid_job_id(job_id: str) -> bool:
+    """True for ids safe to use as file names: 1-64 letters, digits, '-' or '_'."""
+    return bool(job_id) and bool(_JOB_ID.match(job_id))
+
+
+def request_socket(environ: dict) -> Optional[socket.socket]:
+    """The client connection of a WSGI request, where the server exposes it."""
+    return environ.get('gunicorn.socket') or environ.get('werkzeug.socket')
+
+
+def client_disconnected(sock: socket.socket) -> bool:
+    """
+    True once the peer has closed the connection.
+
+    Only meaningful after the request body has been read: a readable socket
+    is then either closed (reads return nothing) or carrying the client's
+    next pipelined request, which is left in place.
+    """
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        if not readable:
+            return False
+        return sock.recv(1, socket.MSG_PEEK) == b''
+    except BlockingIOError:
+        return False
+    except (OSError, ValueError):
+        # Reset by the peer, or already closed
+        return True
+
+
+class JobAlreadyRunning(ValueError):
+    """A job with this id is already running in this worker."""
+
+
+class ActiveJobs:
+    """
+    Cancel tokens of the uploads this worker is formatting, by job id.
+
+    Args:
+        directory: Where running and cancel markers go; share it between
+            the workers a cancel request may reach
+        poll_interval: Seconds between a job's disconnect and marker checks
+    """
+
+    def __init__(self, directory: Optional[str] = None, poll_interval: float = POLL_SECONDS):
+        self.directory = os.fspath(directory or CANCEL_DIR)
+        self.poll_interval = poll_interval
+        self._tokens: Dict[str, CancelToken] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(self, job_id: str, sock: Optional[socket.socket] = None) -> Iterator[CancelToken]:
+        """
+        Register a job for the ``with`` block and watch for its cancellation.
+
+        Args:
+            job_id: From ``valid_job_id()``-checked input or generated
+            sock: The client connection to watch; None to only honour cancel requests
+
+        Yields:
+            The job's CancelToken
+
+        Raises:
+            JobAlreadyRunning: If a job with this id is already running in this worker
+        """
+        token = CancelToken()
+        with self._lock:
+            if job_id in self._tokens:
+                raise JobAlreadyRunning(f"Job {job_id} is already running")
+            self._tokens[job_id] = token
+        running, cancel_marker = self._marker(job_id, 'running'), self._marker(job_id, 'cancel')
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            _remove(cancel_marker)
+            open(running, 'w').close()
+        except OSError as e:
+            # Local cancellation still works
+            logger.warning(f"Could not mark job {job_id} as running: {e}")
+
+        done = threading.Event()
+
+        def watch():
+            while not done.wait(self.poll_interval):
+                if sock is not None and client_disconnected(sock):
+                    token.cancel('client disconnected')
+                elif os.path.exists(cancel_marker):
+                    token.cancel('cancelled by request')
+                if token.cancelled:
+                    logger.info(f"Job {job_id}: {token.reason}")
+                    return
+
+        watcher = threading.Thread(target=watch, name=f'cancel-watch-{job_id}', daemon=True)
+        watcher.start()
+        try:
+            yield token
+        finally:
+            done.set()
+            with self._lock:
+                del self._tokens[job_id]
+            _remove(running)
+            _remove(cancel_marker)
+
+    def cancel(self, job_id: str, reason: str = 'cancelled by request') -> Optional[str]:
+        """
+        Cancel a running job.
+
+        Returns:
+            ``'cancelled'`` if it was running in this worker, ``'requested'``
+            if another worker is running it and will stop it shortly, or
+            None if no such job is running
+        """
+        with self._lock:
+            token = self._tokens.get(job_id)
+        if token is not None:
+            token.cancel(reason)
+            return 'cancelled'
+        if not os.path.exists(self._marker(job_id, 'running')):
+            return None
+        try:
+            open(self._marker(job_id, 'cancel'), 'w').close()
+        except OSError as e:
+            logger.warning(f"Could not request cancellation of job {job_id}: {e}")
+            return None
+        return 'requested'
+
+    def __contains__(self, job_id):
+        with self._lock:
+            return job_id in self._tokens
+
+    def __len__(self):
+        with self._lock:
+            return len(self._tokens)
+
+    def _marker(self, job_id, kind):
+        return os.path.join(self.directory, f"{job_id}.{kind}")
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
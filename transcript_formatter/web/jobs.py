@@ -0,0 +1,122 @@
+"""
+Resumable formatting jobs for time-limited (serverless) handlers.
+
+When a transcript cannot be formatted inside one invocation's time budget,
+the handler stores a Job with its chunks and whatever results it already
+has, and the client polls ``/api/jobs/<id>``. Every poll formats more
+chunks within that invocation's budget until the job is complete. A chunk
+that fails ``MAX_CHUNK_ATTEMPTS`` times fails the job, so clients stop
+polling instead of retrying until the job expires.
+
+Jobs are JSON files under ``JOB_DIR`` (default: the system temp dir).
+Point ``JOB_DIR`` at shared storage when several instances serve requests.
+"""
+
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from typing import List, Optional
+
+
+JOB_DIR = os.environ.get('JOB_DIR', os.path.join(tempfile.gettempdir(), 'transcript-jobs'))
+JOB_TTL_SECONDS = 24 * 60 * 60
+MAX_CHUNK_ATTEMPTS = int(os.environ.get('JOB_MAX_CHUNK_ATTEMPTS', 3))
+
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class Job:
+    """A transcript split into chunks, with the formatted result of each."""
+
+    __slots__ = ('id', 'filename', 'chunks', 'results', 'errors', 'created', 'failures')
+
+    def __init__(self, id: str, filename: str, chunks: List[str],
+                 results: Optional[List[Optional[str]]] = None,
+                 errors: Optional[List[str]] = None, created: Optional[float] = None,
+                 failures: Optional[List[int]] = None):
+        self.id = id
+        self.filename = filename
+        self.chunks = chunks
+        self.results = results if results is not None else [None] * len(chunks)
+        self.errors = errors or []
+        self.created = created or time.time()
+        # Failed attempts per chunk
+        self.failures = failures if failures is not None else [0] * len(chunks)
+
+    @classmethod
+    def create(cls, filename: str, chunks: List[str]) -> 'Job':
+        return cls(uuid.uuid4().hex, filename, chunks)
+
+    @property
+    def completed(self) -> int:
+        return sum(result is not None for result in self.results)
+
+    @property
+    def complete(self) -> bool:
+        return self.completed == len(self.chunks)
+
+    @property
+    def failed(self) -> bool:
+        """True once a chunk has failed MAX_CHUNK_ATTEMPTS times; the job will not finish."""
+        return not self.complete and any(count >= MAX_CHUNK_ATTEMPTS for count in self.failures)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def status(self):
+        """Progress summary for polling clients."""
+        return {
+            'job_id': self.id,
+            'status': 'complete' if self.complete else 'failed' if self.failed else 'pending',
+            'completed_chunks': self.completed,
+            'total_chunks': len(self.chunks),
+            'status_url': f'/api/jobs/{self.id}',
+            'errors': self.errors[-3:],
+        }
+
+
+class JobStore:
+    """Stores jobs as JSON files, one per job, written atomically."""
+
+    def __init__(self, root: str = JOB_DIR):
+        self.root = root
+
+    def _path(self, job_id: str) -> str:
+        if not _JOB_ID.match(job_id):
+            raise KeyError(job_id)
+        return os.path.join(self.root, f'{job_id}.json')
+
+    def save(self, job: Job):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(job.id)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(job.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    def load(self, job_id: str) -> Job:
+        """
+        Load a job.
+
+        Raises:
+            KeyError: If the job does not exist (or expired on this instance)
+        """
+        path = self._path(job_id)
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            raise KeyError(job_id) from None
+        if time.time() - data['created'] > JOB_TTL_SECONDS:
+            self.delete(job_id)
+            raise KeyError(job_id)
+        return Job(**data)
+
+    def delete(self, job_id: str):
+        try:
+            os.remove(self._path(job_id))
+        except (FileNotFoundError, KeyError):
+            pass
@@ -0,0 +1,251 @@
+"""
+Streaming multipart/form-data parser for the serverless handlers.
+
+Replaces ``cgi.FieldStorage`` (deprecated, removed in Python 3.13) in the
+``api/`` handlers. The request body is read in fixed-size chunks, the size
+limit is enforced while reading, and file parts are written to a spooled
+temporary file that only touches disk past ``spool_bytes``. Memory stays
+bounded no matter how large the upload is.
+"""
+
+import tempfile
+from typing import BinaryIO, Dict, Optional, Tuple
+
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024  # Same limit as web_app's MAX_CONTENT_LENGTH
+DEFAULT_SPOOL_BYTES = 1024 * 1024
+MAX_HEADER_BYTES = 16 * 1024
+MAX_FIELD_BYTES = 64 * 1024
+
+
+class MultipartError(ValueError):
+    """Malformed multipart request; maps to HTTP 400."""
+
+    status = 400
+
+
+class RequestTooLarge(MultipartError):
+    """Request body exceeds the configured limit; maps to HTTP 413."""
+
+    status = 413
+
+
+class UploadedFile:
+    """A file part; ``stream`` is rewound and ready to read."""
+
+    __slots__ = ('name', 'filename', 'content_type', 'stream', 'size')
+
+    def __init__(self, name: str, filename: str, content_type: str, stream: BinaryIO, size: int):
+        self.name = name
+        self.filename = filename
+        self.content_type = content_type
+        self.stream = stream
+        self.size = size
+
+    def close(self):
+        self.stream.close()
+
+
+def parse_options_header(value: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Split a header such as ``form-data; name="file"`` into value and options.
+
+    Args:
+        value: Raw header value
+
+    Returns:
+        Tuple of the lowercased main value and a dict of its parameters
+    """
+    parts = _split_semicolons(value)
+    main = parts[0].strip().lower() if parts else ''
+    options = {}
+    for part in parts[1:]:
+        key, sep, val = part.partition('=')
+        if not sep:
+            continue
+        val = val.strip()
+        if len(val) >= 2 and val[0] == val[-1] == '"':
+            val = val[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+        options[key.strip().lower()] = val
+    return main, options
+
+
+def _split_semicolons(value: str):
+    """Split on semicolons that are not inside quoted strings."""
+    parts, current, quoted, escaped = [], [], False, False
+    for ch in value:
+        if escaped:
+            escaped = False
+        elif ch == '\\' and quoted:
+            escaped = True
+        elif ch == '"':
+            quoted = not quoted
+        elif ch == ';' and not quoted:
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(ch)
+    parts.append(''.join(current))
+    return parts
+
+
+def parse_multipart(stream: BinaryIO, content_type: str, content_length: Optional[int] = None,
+                    max_bytes: int = DEFAULT_MAX_BYTES,
+                    spool_bytes: int = DEFAULT_SPOOL_BYTES):
+    """
+    Parse a multipart/form-data request body incrementally.
+
+    Args:
+        stream: Request body, e.g. ``BaseHTTPRequestHandler.rfile``
+        content_type: The request's Content-Type header (carries the boundary)
+        content_length: The request's Content-Length, if sent
+        max_bytes: Largest body accepted, checked before and during reading
+        spool_bytes: File parts larger than this are spooled to disk
+
+    Returns:
+        Tuple ``(fields, files)``: form fields as strings and file parts as
+        UploadedFile objects, both keyed by field name
+
+    Raises:
+        RequestTooLarge: If the body exceeds ``max_bytes``
+        MultipartError: If the body is not valid multipart/form-data
+    """
+    mimetype, options = parse_options_header(content_type or '')
+    boundary = options.get('boundary')
+    if mimetype != 'multipart/form-data' or not boundary:
+        raise MultipartError('Expected multipart/form-data with a boundary')
+    if content_length is not None and content_length > max_bytes:
+        raise RequestTooLarge(f'Upload exceeds the {max_bytes:,} byte limit')
+
+    parser = _StreamingParser(boundary.encode('latin-1'), spool_bytes)
+    remaining = content_length
+    total = 0
+    try:
+        while remaining is None or remaining > 0:
+            chunk = stream.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > max_bytes:
+                raise RequestTooLarge(f'Upload exceeds the {max_bytes:,} byte limit')
+            if remaining is not None:
+                remaining -= len(chunk)
+            parser.feed(chunk)
+            if parser.done:
+                break
+        if not parser.done:
+            raise MultipartError('Incomplete multipart body')
+    except Exception:
+        parser.discard()
+        raise
+    return parser.fields, parser.files
+
+
+class _StreamingParser:
+    """Boundary-scanning state machine fed with arbitrary-sized chunks."""
+
+    def __init__(self, boundary: bytes, spool_bytes: int):
+        # A leading CRLF lets the first boundary match like every other one
+        self.buffer = b'\r\n'
+        self.delimiter = b'\r\n--' + boundary
+        self.spool_bytes = spool_bytes
+        self.state = 'preamble'
+        self.done = False
+        self.fields = {}
+        self.files = {}
+        self._part = None
+
+    def feed(self, data: bytes):
+        self.buffer += data
+        while not self.done:
+            if self.state == 'preamble':
+                if not self._skip_to_delimiter():
+                    return
+            elif self.state == 'after_delimiter':
+                if len(self.buffer) < 2:
+                    return
+                marker, self.buffer = self.buffer[:2], self.buffer[2:]
+                if marker == b'--':
+                    self.done = True
+                elif marker == b'\r\n':
+                    self.state = 'headers'
+                else:
+                    raise MultipartError('Malformed multipart boundary')
+            elif self.state == 'headers':
+                end = self.buffer.find(b'\r\n\r\n')
+                if end < 0:
+                    if len(self.buffer) > MAX_HEADER_BYTES:
+                        raise MultipartError('Multipart part headers too large')
+                    return
+                self._start_part(self.buffer[:end])
+                self.buffer = self.buffer[end + 4:]
+                self.state = 'body'
+            elif self.state == 'body':
+                index = self.buffer.find(self.delimiter)
+                if index < 0:
+                    # Keep a tail that might be the start of a split delimiter
+                    keep = len(self.delimiter) - 1
+                    if len(self.buffer) > keep:
+                        self._write(self.buffer[:-keep])
+                        self.buffer = self.buffer[-keep:]
+                    return
+                self._write(self.buffer[:index])
+                self._finish_part()
+                self.buffer = self.buffer[index + len(self.delimiter):]
+                self.state = 'after_delimiter'
+
+    def _skip_to_delimiter(self) -> bool:
+        index = self.buffer.find(self.delimiter)
+        if index < 0:
+            self.buffer = self.buffer[-(len(self.delimiter) - 1):]
+            return False
+        self.buffer = self.buffer[index + len(self.delimiter):]
+        self.state = 'after_delimiter'
+        return True
+
+    def _start_part(self, raw_headers: bytes):
+        headers = {}
+        for line in raw_headers.decode('utf-8', 'replace').split('\r\n'):
+            key, sep, value = line.partition(':')
+            if sep:
+                headers[key.strip().lower()] = value.strip()
+        disposition, options = parse_options_header(headers.get('content-disposition', ''))
+        if disposition != 'form-data' or 'name' not in options:
+            raise MultipartError('Multipart part without a form-data name')
+
+        name = options['name']
+        if 'filename' in options:
+            stream = tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+            self._part = UploadedFile(name, options['filename'],
+                                      headers.get('content-type', 'application/octet-stream'),
+                                      stream, 0)
+        else:
+            self._part = [name, bytearray()]
+
+    def _write(self, data: bytes):
+        if not data:
+            return
+        part = self._part
+        if isinstance(part, UploadedFile):
+            part.stream.write(data)
+            part.size += len(data)
+        else:
+            if len(part[1]) + len(data) > MAX_FIELD_BYTES:
+                raise MultipartError(f'Form field {part[0]!r} is too large')
+            part[1] += data
+
+    def _finish_part(self):
+        part, self._part = self._part, None
+        if isinstance(part, UploadedFile):
+            part.stream.seek(0)
+            self.files[part.name] = part
+        else:
+            self.fields[part[0]] = part[1].decode('utf-8', 'replace')
+
+    def discard(self):
+        """Close any spooled files after a failed parse."""
+        for upload in self.files.values():
+            upload.close()
+        if isinstance(self._part, UploadedFile):
+            self._part.close()
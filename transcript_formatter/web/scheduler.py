@@ -0,0 +1,175 @@
+"""
+Shortest-job-first scheduling of formatting jobs, fair across clients.
+
+Admitted uploads (see ``admission.py``) wait here for one of a fixed number
+of formatting slots. When a slot frees, the waiting job with the lowest
+priority value runs next:
+
+* cost: the routing policy's estimated seconds for the transcript, which
+  reflects its length, model and document type, so a 10-second meeting
+  snippet overtakes a 3-minute sermon;
+* aging: every second spent waiting takes ``aging_rate`` seconds off a job's
+  cost, so long jobs are delayed, never starved;
+* fair share: a client already running its share of the slots (the slots
+  divided among the clients with work in the worker) only gets another
+  slot when no other client is waiting. Each client's recent service (the
+  estimated seconds of its jobs started lately, decaying with a half-life
+  of ``SERVICE_HALF_LIFE``) is added to its jobs' costs, so one client's
+  burst of small jobs takes turns with everyone else's.
+
+Like admission limits, slots are per worker process. The time a job waits
+for a slot is returned separately so it is reported apart from processing.
+A job whose CancelToken fires while it waits leaves the queue at once.
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from ..core.cancellation import CancelToken
+
+
+SLOTS = int(os.environ.get('SCHEDULER_SLOTS', 4))
+# Seconds of estimated cost forgiven per second of waiting
+AGING_RATE = float(os.environ.get('SCHEDULER_AGING_RATE', 1.0))
+# Seconds for a client's recent service to count half as much
+SERVICE_HALF_LIFE = 300.0
+
+
+class _Waiter:
+    __slots__ = ('client', 'cost', 'arrived', 'granted')
+
+    def __init__(self, client: str, cost: float):
+        self.client = client
+        self.cost = cost
+        self.arrived = time.monotonic()
+        self.granted = False
+
+
+class Scheduler:
+    """
+    Hand out formatting slots, cheapest job first, fairly across clients.
+
+    Args:
+        slots: Jobs formatted at the same time
+        aging_rate: Estimated seconds taken off a job's cost per second it waits
+    """
+
+    def __init__(self, slots: int = SLOTS, aging_rate: float = AGING_RATE):
+        if slots < 1:
+            raise ValueError("A scheduler needs at least one slot")
+        self.slots = slots
+        self.aging_rate = aging_rate
+        self._waiting = []
+        self._running: Dict[str, int] = {}
+        self._service: Dict[str, Tuple[float, float]] = {}   # client -> (seconds, as of)
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self, cost: float, client: str = '',
+             cancel: Optional[CancelToken] = None) -> Iterator[float]:
+        """
+        Wait for a formatting slot and hold it for the ``with`` block.
+
+        Args:
+            cost: Estimated seconds the job will take
+            client: Who the job is for (API key, client id or address)
+            cancel: Optional token; cancelling it while the job waits
+                removes the job from the queue
+
+        Yields:
+            Seconds spent waiting for the slot
+
+        Raises:
+            Cancelled: If ``cancel`` fired before a slot was granted
+        """
+        waiter = _Waiter(client, cost)
+        # Called from the cancelling thread, never with the lock held
+        unregister = cancel.on_cancel(self._wake) if cancel is not None else None
+        try:
+            with self._cond:
+                self._waiting.append(waiter)
+                try:
+                    self._dispatch()
+                    while not waiter.granted:
+                        if cancel is not None:
+                            cancel.raise_if_cancelled()
+                        self._cond.wait()
+                except BaseException:
+                    # Leaving the queue (cancelled, interrupted) must not leak a slot
+                    if waiter.granted:
+                        self._finish(client)
+                    else:
+                        self._waiting.remove(waiter)
+                    raise
+        finally:
+            if unregister is not None:
+                unregister()
+        waited = time.monotonic() - waiter.arrived
+        try:
+            yield waited
+        finally:
+            with self._cond:
+                self._finish(client)
+
+    def stats(self) -> dict:
+        """Slots in use and jobs waiting, overall and per client."""
+        with self._cond:
+            waiting_by_client: Dict[str, int] = {}
+            for waiter in self._waiting:
+                waiting_by_client[waiter.client] = waiting_by_client.get(waiter.client, 0) + 1
+            return {
+                'slots': self.slots,
+                'running': sum(self._running.values()),
+                'waiting': len(self._waiting),
+                'clients': len(set(self._running) | set(waiting_by_client)),
+                'oldest_wait_seconds': round(max(
+                    (time.monotonic() - w.arrived for w in self._waiting), default=0.0), 1),
+            }
+
+    def _wake(self):
+        """Let waiting jobs re-check their cancel tokens."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def _finish(self, client):
+        """Free a client's slot and start the next job; call with the lock held."""
+        self._running[client] -= 1
+        if not self._running[client]:
+            del self._running[client]
+            now = time.monotonic()
+            for other in list(self._service):
+                self._recent_service(other, now)
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant free slots to the best waiting jobs; call with the lock held."""
+        granted = False
+        while self._waiting and sum(self._running.values()) < self.slots:
+            now = time.monotonic()
+            clients = set(self._running) | {waiter.client for waiter in self._waiting}
+            share = max(1, math.ceil(self.slots / len(clients)))
+            waiter = min(self._waiting, key=lambda w: (
+                self._running.get(w.client, 0) >= share,
+                w.cost + self._recent_service(w.client, now) - self.aging_rate * (now - w.arrived),
+                w.arrived))
+            self._waiting.remove(waiter)
+            waiter.granted = True
+            self._running[waiter.client] = self._running.get(waiter.client, 0) + 1
+            self._service[waiter.client] = (self._recent_service(waiter.client, now) + waiter.cost, now)
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _recent_service(self, client, now) -> float:
+        """The client's decayed estimated seconds of jobs started; call with the lock held."""
+        seconds, as_of = self._service.get(client, (0.0, now))
+        decayed = seconds * 0.5 ** ((now - as_of) / SERVICE_HALF_LIFE)
+        if decayed < 0.01 and client not in self._running:
+            # Forget idle clients so the table does not grow with every address
+            self._service.pop(client, None)
+            return 0.0
+        return decayed
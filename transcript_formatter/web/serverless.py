@@ -0,0 +1,133 @@
+"""
+Formatting pipeline for the Vercel handlers in ``api/``.
+
+Full transcripts are split into chunks, formatted concurrently within the
+function's time budget and merged into one DOCX. Work that does not fit is
+stored as a resumable Job (see ``jobs.py``) that the client polls.
+"""
+
+import io
+import os
+import tempfile
+
+from ..core.chunked_formatter import ChunkedFormatter
+from ..core.chunking import merge_formatted_chunks, split_transcript
+from ..core.document import parse_document
+from ..core.routing import choose_route
+from ..usage import LEDGER_ENV, default_ledger_path
+from .jobs import Job
+
+
+CHUNK_CHARS = int(os.environ.get('CHUNK_CHARS', 8000))
+MAX_WORKERS = int(os.environ.get('CHUNK_WORKERS', 4))
+
+# Seconds of work allowed per invocation; keep below the function's maxDuration
+TIME_BUDGET = float(os.environ.get('FUNCTION_TIME_BUDGET', 50))
+# Reserved for building and sending the DOCX after formatting
+RESPONSE_RESERVE_SECONDS = 3.0
+
+# Only the temp directory is writable on serverless hosts
+USAGE_LEDGER = (default_ledger_path() if os.environ.get(LEDGER_ENV)
+                else os.path.join(tempfile.gettempdir(), 'transcript-usage.sqlite3'))
+
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+PROMPT = """You are a professional transcript editor. Transform this raw transcript into a well-formatted, readable document.
+
+Please follow these guidelines:
+1. Create clear paragraph breaks for better readability
+2. Add proper punctuation and capitalization
+3. Identify and format speaker names (if present) consistently
+4. Remove filler words and false starts while preserving meaning
+5. Organize the content into logical sections
+6. Clean up any formatting issues or artifacts
+
+Raw Transcript:
+{transcript}
+
+Return the formatted transcript ready for a professional document."""
+
+
+def make_formatter(api_key: str) -> ChunkedFormatter:
+    """
+    Create the chunked formatter used by the serverless handlers.
+
+    The model is routed by the largest chunk a job can have, so every
+    invocation working on a job uses the same one.
+    """
+    import anthropic
+
+    route = choose_route(CHUNK_CHARS, 'general', 'serverless')
+    client = anthropic.Anthropic(api_key=api_key)
+    return ChunkedFormatter(client, route.model, PROMPT, max_tokens=route.max_tokens,
+                            temperature=0.3, max_workers=MAX_WORKERS, ledger_path=USAGE_LEDGER)
+
+
+def start_job(text: str, filename: str, formatter: ChunkedFormatter) -> Job:
+    """Split a transcript into a new (unsaved) job whose chunks each fit the time budget."""
+    budget = TIME_BUDGET - RESPONSE_RESERVE_SECONDS
+    max_chars = min(CHUNK_CHARS, formatter.chunk_chars_for(budget))
+    return Job.create(filename, split_transcript(text, max_chars))
+
+
+def advance_job(job: Job, formatter: ChunkedFormatter, started: float) -> Job:
+    """
+    Format as many of the job's remaining chunks as fit in this invocation.
+
+    Args:
+        job: The job to advance; updated in place
+        formatter: Chunked formatter
+        started: ``time.monotonic()`` at the start of the invocation
+
+    Returns:
+        The same job; check ``job.failed`` for a chunk that will not format
+    """
+    if job.failed:
+        return job
+    deadline = started + TIME_BUDGET - RESPONSE_RESERVE_SECONDS
+    job.results, errors = formatter.format_chunks(job.chunks, job.results, deadline,
+                                                  failures=job.failures)
+    job.errors.extend(errors)
+    return job
+
+
+def build_docx(formatted_text: str) -> bytes:
+    """Render formatted text as a DOCX and return the file bytes."""
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading('Formatted Transcript', 0)
+
+    for block in parse_document(formatted_text):
+        if block.kind == 'blank':
+            continue
+        p = doc.add_paragraph()
+        if block.kind == 'speaker':
+            # Speaker line
+            p.add_run(block.label).bold = True
+            if block.spans:
+                p.add_run(' ')
+        elif block.kind == 'heading':
+            p.add_run(f"{block.number}. ")
+        if block.kind in ('lyrics', 'divider'):
+            p.add_run('\n'.join(block.lines) if block.kind == 'lyrics' else block.text)
+        else:
+            for span in block.spans:
+                run = p.add_run(span.text)
+                run.bold = span.bold
+                run.italic = span.italic
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def job_docx(job: Job) -> bytes:
+    """Merge a complete job's chunks into one DOCX."""
+    return build_docx(merge_formatted_chunks(job.results))
+
+
+def docx_filename(filename: str) -> str:
+    """Download name for the formatted version of an upload."""
+    stem = os.path.splitext(os.path.basename(filename or 'transcript'))[0]
+    return f"formatted_{stem}.docx"
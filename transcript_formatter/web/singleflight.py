@@ -0,0 +1,184 @@
+"""
+Single-flight coalescing of identical requests.
+
+When the same transcript is submitted twice with the same options while the
+first is still formatting (a double-clicked button, two staff uploading the
+same episode), the second request waits for the first and gets its result
+instead of starting another multi-minute Claude call.
+
+Two layers share one key (a hash of the content and options):
+
+* Within a process, callers of ``SingleFlight.run()`` with the same key
+  wait on the first caller's thread and share its result or its exception.
+* Across processes (gunicorn workers), the first caller holds an exclusive
+  ``flock`` on ``<key>.lock`` under ``directory`` while it works and writes
+  the result to ``<key>.json``. Another worker blocks on the lock, then
+  reads that result. The OS drops the lock when its holder exits, so a
+  worker that crashes or is killed mid-job cannot leave the key stuck; the
+  next caller finds no result and runs the job itself.
+
+Without ``fcntl`` (Windows) only the in-process layer applies.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+INFLIGHT_DIR = os.environ.get('INFLIGHT_DIR', os.path.join(tempfile.gettempdir(), 'transcript-inflight'))
+# A finished result is handed to callers that arrive this soon after it
+RESULT_TTL_SECONDS = 60
+# Lock files idle this long are removed
+LOCK_TTL_SECONDS = 24 * 60 * 60
+
+
+def flight_key(data: bytes, *options) -> str:
+    """Key for a request: SHA-256 of the content and its options."""
+    digest = hashlib.sha256(data)
+    for option in options:
+        digest.update(b'\0' + str(option).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Run a job once per key, however many callers ask for it concurrently.
+
+    Args:
+        directory: Where lock and result files go; share it between the
+            workers that should coalesce (the default is per host)
+        result_ttl: Seconds a finished result stays available to callers
+            that were waiting on another worker
+    """
+
+    def __init__(self, directory: Optional[str] = None, result_ttl: float = RESULT_TTL_SECONDS):
+        self.directory = os.fspath(directory or INFLIGHT_DIR)
+        self.result_ttl = result_ttl
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def run(self, key: str, job: Callable[[], dict],
+            valid: Optional[Callable[[dict], bool]] = None) -> Tuple[dict, bool]:
+        """
+        Run ``job`` unless an identical one is already running, then share its result.
+
+        Args:
+            key: From ``flight_key()``
+            job: Does the work; returns a JSON-serialisable dict
+            valid: Checks a result finished by another worker (e.g. that its
+                files still exist); an invalid result is recomputed
+
+        Returns:
+            ``(result, shared)``; ``shared`` is True when another caller did the work
+
+        Raises:
+            Whatever ``job`` raised, in every caller waiting on it in this process
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result, shared = self._run_locked(key, job, valid)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, shared
+
+    def _run_locked(self, key, job, valid):
+        if fcntl is None:
+            return job(), False
+
+        os.makedirs(self.directory, exist_ok=True)
+        lock_path = os.path.join(self.directory, f"{key}.lock")
+        with open(lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info(f"Waiting for another worker formatting the same upload ({key[:12]})")
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Keeps _purge() off a lock that is in use
+                os.utime(lock_path)
+                result = self._read_result(key)
+                if result is not None and (valid is None or valid(result)):
+                    return result, True
+                result = job()
+                self._write_result(key, result)
+                return result, False
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _result_path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read_result(self, key) -> Optional[dict]:
+        try:
+            with open(self._result_path(key), encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - stored.get('finished', 0) > self.result_ttl:
+            return None
+        return stored.get('result')
+
+    def _write_result(self, key, result):
+        path = self._result_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'finished': time.time(), 'result': result}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            # Only costs other workers a recomputation
+            logger.warning(f"Could not store shared result {path}: {e}")
+        self._purge()
+
+    def _purge(self):
+        """Remove expired results and long-idle lock files."""
+        now = time.time()
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            ttl = LOCK_TTL_SECONDS if name.endswith('.lock') else self.result_ttl
+            try:
+                if now - os.path.getmtime(path) > ttl:
+                    os.remove(path)
+            except OSError:
+                pass
@@ -3,15 +3,42 @@ Flask web application for the transcript formatter.
 Provides a modern HTML interface for uploading and formatting transcripts.
 """
 
+import hashlib
+import hmac
 import os
 import tempfile
+import time
 import traceback
 import logging
+import uuid
 from pathlib import Path
 from flask import Flask, render_template, request, send_file, flash, redirect, url_for, jsonify
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 
+from transcript_formatter.core.cancellation import Cancelled, collect_stream
+from transcript_formatter.core.chunked_formatter import ChunkedFormatter
+from transcript_formatter.core.chunking import merge_formatted_chunks, split_transcript
+from transcript_formatter.core.document import ensure_document, render_markup
+from transcript_formatter.core.routing import choose_route
+from transcript_formatter.core.extractor import extract_text
+from transcript_formatter.core.formatted_store import formatted_path_for, load_formatted, save_formatted
+from transcript_formatter.core.meeting import CLEANUP_RULES, format_meeting
+from transcript_formatter.core.incremental import ChunkCache, cache_path_if_enabled, format_incremental
+from transcript_formatter.core.structured import document_from_message, request_structured
+from transcript_formatter.core.search_index import TranscriptIndex, default_index_path, index_if_enabled
+from transcript_formatter.exporters import EXPORTERS, export_formats
+from transcript_formatter.metrics import (PROMETHEUS_CONTENT_TYPE, Counter, Gauge,
+                                          document_type_label, record, register,
+                                          render_prometheus, span)
+from transcript_formatter.profiling import Profiler
+from transcript_formatter.usage import record_usage
+from transcript_formatter.web.admission import AdmissionController, Rejected
+from transcript_formatter.web.cancellation import (ActiveJobs, JobAlreadyRunning, request_socket,
+                                                   valid_job_id)
+from transcript_formatter.web.scheduler import Scheduler
+from transcript_formatter.web.singleflight import SingleFlight, flight_key
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -76,48 +103,72 @@ def handle_404_error(e):
 
 UPLOAD_FOLDER = 'uploads'
 OUTPUT_FOLDER = 'outputs'
+PROFILE_FOLDER = os.path.join(OUTPUT_FOLDER, 'profiles')
 ALLOWED_EXTENSIONS = {'txt', 'docx'}
 
 # Create directories if they don't exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
+# Coalesces identical uploads across this worker's threads and other workers on the host
+upload_flights = SingleFlight()
+
+# Bounds this worker's formatting jobs; past the limits uploads get a fast 503
+admission = AdmissionController()
+for _name, _key, _help in (
+        ('transcript_admission_in_flight', 'in_flight', 'Formatting jobs in progress in this worker.'),
+        ('transcript_admission_queued_bytes', 'queued_bytes', 'Transcript bytes being formatted in this worker.'),
+        ('transcript_admission_estimated_tokens', 'estimated_tokens', 'Estimated Claude tokens of the jobs in progress.')):
+    register(Gauge(_name, _help, lambda key=_key: admission.stats()[key]))
+# Admitted uploads take formatting slots cheapest first, fairly across clients
+scheduler = Scheduler()
+register(Gauge('transcript_scheduler_waiting', 'Admitted uploads waiting for a formatting slot.',
+               lambda: scheduler.stats()['waiting']))
+register(Gauge('transcript_scheduler_running', 'Uploads holding a formatting slot.',
+               lambda: scheduler.stats()['running']))
+ADMISSION_REJECTED = register(Counter('transcript_admission_rejected_total',
+                                      'Uploads rejected with 503 because the worker was full.', ()))
+# Uploads stop when their client disconnects or cancels them, freeing their slot and tokens
+active_jobs = ActiveJobs()
+UPLOADS_CANCELLED = register(Counter('transcript_uploads_cancelled_total',
+                                     'Uploads stopped because the client disconnected or cancelled them.',
+                                     ('reason',)))
+
+def is_admin_request():
+    """True when the request carries the ADMIN_TOKEN in an X-Admin-Token header."""
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    supplied = request.headers.get('X-Admin-Token', '')
+    return bool(admin_token) and hmac.compare_digest(supplied.encode(), admin_token.encode())
+
+def client_id():
+    """Who an upload is for, for fair scheduling: API key, X-Client-Id or the caller's address."""
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        return 'key:' + hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    client = request.headers.get('X-Client-Id')
+    if client:
+        return 'id:' + client[:64]
+    forwarded = request.headers.get('X-Forwarded-For', '').split(',')[0].strip()
+    return 'ip:' + (forwarded or request.remote_addr or 'unknown')
+
+def requested_formats(value):
+    """Parse the comma-separated 'formats' form field; docx is always produced."""
+    formats = ['docx']
+    for fmt in (value or '').lower().split(','):
+        fmt = fmt.strip()
+        if fmt in EXPORTERS and fmt not in formats:
+            formats.append(fmt)
+    return formats
+
 def allowed_file(filename):
     """Check if file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def get_meeting_prompt():
     """Get the system prompt for meeting transcript formatting."""
-    return """You are a professional meeting transcript formatter. Convert raw meeting transcripts into clean, readable documents while preserving ALL substantive content from every speaker. Output clean text WITHOUT any asterisks, underscores, or markdown symbols.
-
-<language_cleanup_rules>
-
-When formatting this transcript, clean up the spoken language by:
-
-REMOVE:
-- Filler words: "uh", "um", "like" (when used as filler), "you know", "I mean", "so" (at sentence starts), "right?" (when seeking agreement)
-- Verbal pauses: "hmm", "mmm", "give me one second"
-- False starts: incomplete phrases that get rephrased (e.g., "we will... we need to" → "we need to")
-- Repetitive phrases: "at least" when used multiple times unnecessarily
-- Trailing ellipses ("...") unless indicating an actual meaningful pause
-
-KEEP:
-- Technical terms and product names exactly as spoken
-- All substantive content and meaning
-- Natural conversational flow where it aids clarity
-- Important context and qualifications
-
-STYLE:
-- Convert spoken fragments into complete, clear sentences
-- Maintain the speaker's intent and meaning
-- Keep the professional but conversational tone
-- Preserve important clarifications and examples
-
-Example transformation:
-BEFORE: "Uh, so yeah, at least... we will, uh, need to make sure that, you know, we have access to..."
-AFTER: "We need to make sure we have access to..."
+    return f"""You are a professional meeting transcript formatter. Convert raw meeting transcripts into clean, readable documents while preserving ALL substantive content from every speaker. Output clean text WITHOUT any asterisks, underscores, or markdown symbols.
 
-</language_cleanup_rules>
+{CLEANUP_RULES}
 
 <formatting_rules>
 
@@ -171,21 +222,9 @@ Summarize any agreed-upon next steps and follow-up meetings if scheduled
 
 Now format the meeting transcript with ALL speaker content preserved:"""
 
-# Claude AI formatting functionality
-def format_with_claude_inline(transcript_text, document_type="world_impact"):
-    """Format transcript using Claude AI - inline implementation."""
-    api_key = os.environ.get('ANTHROPIC_API_KEY')
-    
-    if not api_key:
-        raise ValueError("Anthropic API key not found. Please set ANTHROPIC_API_KEY environment variable.")
-    
-    client = anthropic.Anthropic(api_key=api_key)
-    
-    # Choose system prompt based on document type
-    if document_type == "meeting":
-        system_prompt = get_meeting_prompt()
-    else:
-        system_prompt = """You are a professional transcript formatter that converts raw AI-generated transcripts into polished, publication-ready documents. Output clean text WITHOUT any asterisks, underscores, or markdown symbols. The Word document exporter will handle all formatting. Document body will use Times New Roman size 12, while the title will be centered, bold, underlined in Gotham size 20. A branded template with pre-configured header and footers will be used for all documents.
+def get_world_impact_prompt():
+    """Get the system prompt for World Impact transcript formatting."""
+    return """You are a professional transcript formatter that converts raw AI-generated transcripts into polished, publication-ready documents. Output clean text WITHOUT any asterisks, underscores, or markdown symbols. The Word document exporter will handle all formatting. Document body will use Times New Roman size 12, while the title will be centered, bold, underlined in Gotham size 20. A branded template with pre-configured header and footers will be used for all documents.
 
 <divider_line_rules>
 
@@ -436,43 +475,190 @@ Billy: Today on World Impact...
 </critical_notes>
 
 Now format the transcript:"""
+
+# Claude AI formatting functionality
+def format_with_claude_inline(transcript_text, document_type="world_impact", route=None, cancel=None):
+    """Format transcript using Claude AI - inline implementation.
+    
+    The model, max_tokens and chunking come from the routing policy unless
+    a route is passed in. Cancelling ``cancel`` (a CancelToken) closes the
+    Claude stream and raises Cancelled.
+    """
+    api_key = os.environ.get('ANTHROPIC_API_KEY')
+    
+    if not api_key:
+        raise ValueError("Anthropic API key not found. Please set ANTHROPIC_API_KEY environment variable.")
     
+    client = anthropic.Anthropic(api_key=api_key)
+    
+    # Choose system prompt based on document type
+    with span('prompt', document_type):
+        if document_type == "meeting":
+            system_prompt = get_meeting_prompt()
+        else:
+            system_prompt = get_world_impact_prompt()
+        user_message = f"Please format this transcript:\n\n{transcript_text}"
+    
+    route = route or choose_route(len(transcript_text), document_type, 'web')
+    model = route.model
+    if route.chunk_chars and document_type == "meeting":
+        # Per-chunk cleanup and extraction, then one small summary request
+        logger.info(f"Calling Claude API ({model}, {route.name} route) for a map-reduce meeting...")
+        with span('generate', document_type, model=model, mode='map_reduce'):
+            return format_meeting(client, model, transcript_text, route.chunk_chars,
+                                  max_tokens=route.max_tokens, entry_point='web', cancel=cancel)
+    if route.chunk_chars:
+        return format_chunked_inline(client, transcript_text, system_prompt, route, document_type,
+                                     cancel)
+    
+    if cancel is not None:
+        cancel.raise_if_cancelled()
+    started = time.perf_counter()
     try:
-        # Use Claude Sonnet 4.5 - optimized for Render deployment
-        logger.info("Calling Claude Sonnet 4.5 API...")
-        response = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=20480,  # Match Claude's actual output capability
-            temperature=0.1,
-            system=system_prompt,
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"Please format this transcript:\n\n{transcript_text}"
-                }
-            ]
-        )
+        logger.info(f"Calling Claude API ({model}, {route.name} route)...")
+        # Stream the response so time-to-first-token is measured separately
+        # from total generation time
+        with span('generate', document_type, model=model) as generation:
+            with client.messages.stream(
+                model=model,
+                max_tokens=route.max_tokens,
+                temperature=0.1,
+                system=system_prompt,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": user_message
+                    }
+                ]
+            ) as stream:
+                formatted_text = collect_stream(stream, transcript_text, cancel,
+                                                on_text=lambda text: generation.mark('first_token'))
+                usage = stream.get_final_message().usage
         
-        # Get the formatted text from the response
-        formatted_text = response.content[0].text
-        logger.info("Claude Sonnet 4.5 API call successful")
+        record_usage('web', model, usage, time.perf_counter() - started, transcript_text, document_type)
+        logger.info("Claude API call successful")
         
         return formatted_text
             
+    except Cancelled as e:
+        # Tokens generated before the stream was closed are still billed
+        record_usage('web', model, e.usage, time.perf_counter() - started, transcript_text,
+                     document_type, status='cancelled')
+        logger.info(f"Claude API call stopped: {e}")
+        raise
     except anthropic.APIError as e:
+        record_usage('web', model, None, time.perf_counter() - started, transcript_text,
+                     document_type, status='error')
         logger.error(f"Claude API Error: Status={e.status_code if hasattr(e, 'status_code') else 'N/A'}, Message={str(e)}")
         raise RuntimeError(f"Claude API error: {str(e)}")
     except Exception as e:
         logger.error(f"Unexpected error calling Claude: {type(e).__name__}: {str(e)}")
         raise RuntimeError(f"Claude API error: {str(e)}")
 
+def format_chunked_inline(client, transcript_text, system_prompt, route, document_type, cancel=None):
+    """Format a long transcript as chunks sent to Claude concurrently."""
+    chunks = split_transcript(transcript_text, route.chunk_chars)
+    logger.info(f"Calling Claude API ({route.model}, {route.name} route) for {len(chunks)} chunks...")
+    formatter = ChunkedFormatter(client, route.model, "Please format this transcript:\n\n{transcript}",
+                                 max_tokens=route.max_tokens, system_prompt=system_prompt,
+                                 temperature=0.1, entry_point='web', document_type=document_type)
+    with span('generate', document_type, model=route.model, chunks=len(chunks)):
+        results, errors = formatter.format_chunks(chunks, cancel=cancel)
+    if cancel is not None:
+        cancel.raise_if_cancelled()
+    if errors:
+        logger.error(f"Claude API Error: {'; '.join(errors)}")
+        raise RuntimeError(f"Claude API error: {'; '.join(errors)}")
+    logger.info("Claude API calls successful")
+    return merge_formatted_chunks(results)
+
+def format_incremental_inline(transcript_text, episode, cache_path, document_type="world_impact", route=None,
+                              cancel=None):
+    """Format transcript sending only the parts changed since the episode's last upload.
+    
+    Parts formatted for an earlier version are reused from the chunk cache
+    (see transcript_formatter/core/incremental.py).
+    """
+    api_key = os.environ.get('ANTHROPIC_API_KEY')
+    if not api_key:
+        raise ValueError("Anthropic API key not found. Please set ANTHROPIC_API_KEY environment variable.")
+    client = anthropic.Anthropic(api_key=api_key)
+    
+    with span('prompt', document_type):
+        if document_type == "meeting":
+            system_prompt = get_meeting_prompt()
+        else:
+            system_prompt = get_world_impact_prompt()
+    
+    route = route or choose_route(len(transcript_text), document_type, 'web')
+    formatter = ChunkedFormatter(client, route.model, "Please format this transcript:\n\n{transcript}",
+                                 max_tokens=route.max_tokens, system_prompt=system_prompt,
+                                 temperature=0.1, entry_point='web', document_type=document_type)
+    with span('generate', document_type, model=route.model, mode='incremental') as generation:
+        with ChunkCache(cache_path) as cache:
+            formatted_text, stats = format_incremental(formatter, cache, episode, transcript_text,
+                                                       cancel=cancel)
+        # Logged with the span: how much of the transcript was re-sent
+        generation.fields.update(stats)
+    logger.info(f"Episode {episode}: {stats['changed']} of {stats['chunks']} parts changed, "
+                f"{stats['sent']} sent to Claude")
+    return formatted_text
+
+def format_structured_inline(transcript_text, document_type="world_impact", route=None, cancel=None):
+    """Format transcript as a validated document through Claude's structured output.
+    
+    Returns a TranscriptDocument that goes straight to the exporters. Falls
+    back to text (format_with_claude_inline) when the route chunks the
+    transcript or the structured output fails validation.
+    """
+    route = route or choose_route(len(transcript_text), document_type, 'web')
+    if route.chunk_chars:
+        return format_with_claude_inline(transcript_text, document_type, route, cancel)
+    if cancel is not None:
+        cancel.raise_if_cancelled()
+    
+    api_key = os.environ.get('ANTHROPIC_API_KEY')
+    if not api_key:
+        raise ValueError("Anthropic API key not found. Please set ANTHROPIC_API_KEY environment variable.")
+    client = anthropic.Anthropic(api_key=api_key)
+    
+    with span('prompt', document_type):
+        if document_type == "meeting":
+            system_prompt = get_meeting_prompt()
+        else:
+            system_prompt = get_world_impact_prompt()
+        user_message = f"Please format this transcript:\n\n{transcript_text}"
+    
+    model = route.model
+    started = time.perf_counter()
+    try:
+        logger.info(f"Calling Claude API for structured output ({model}, {route.name} route)...")
+        with span('generate', document_type, model=model, mode='structured'):
+            message = request_structured(client, model, route.max_tokens, system_prompt, user_message)
+    except anthropic.APIError as e:
+        record_usage('web', model, None, time.perf_counter() - started, transcript_text,
+                     document_type, status='error')
+        logger.error(f"Claude API Error: {str(e)}")
+        raise RuntimeError(f"Claude API error: {str(e)}")
+    record_usage('web', model, message.usage, time.perf_counter() - started, transcript_text, document_type)
+    
+    try:
+        with span('validate', document_type):
+            return document_from_message(message)
+    except ValueError as e:
+        logger.warning(f"Structured output rejected ({e}); formatting as text instead")
+        return format_with_claude_inline(transcript_text, document_type, route, cancel)
+
 def create_word_document(formatted_text, title, output_path, document_type="world_impact"):
-    """Create a professionally formatted Word document using python-docx."""
+    """Create a professionally formatted Word document using python-docx.
+    
+    formatted_text is Claude's formatted text or an already built
+    TranscriptDocument (structured mode).
+    """
     try:
         from docx import Document
         from docx.shared import Pt, Inches, RGBColor
         from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-        import re
         import os
         
         # Use template only for World Impact documents
@@ -496,23 +682,10 @@ def create_word_document(formatted_text, title, output_path, document_type="worl
             else:
                 logger.info("Creating plain document for meeting transcript")
         
-        # Extract title from the formatted text (first non-divider line)
-        text_lines = formatted_text.split('\n')
-        document_title = title  # Default fallback
-        title_line_index = -1
-        
-        # Find the first line that's not empty or a divider
-        for i, line in enumerate(text_lines):
-            line = line.strip()
-            if line and not line.startswith('─'):  # Not empty and not a divider
-                document_title = line
-                title_line_index = i
-                break
-        
-        # Remove title from the content if we found it
-        if title_line_index >= 0:
-            # Keep content after the title line
-            formatted_text = '\n'.join(text_lines[title_line_index + 1:])
+        # Parse once; the first non-divider line is the title
+        with span('parse', document_type):
+            document = ensure_document(formatted_text, title_from_first_line=True)
+        document_title = document.title or title  # Default fallback
         
         # Add title (bold, centered, underlined, Gotham/Times New Roman 20)
         title_para = doc.add_paragraph()
@@ -530,13 +703,20 @@ def create_word_document(formatted_text, title, output_path, document_type="worl
         # Add blank line after title
         doc.add_paragraph()
         
-        # Process formatted text line by line
-        lines = formatted_text.split('\n')
+        def add_run(p, text, bold=False):
+            run = p.add_run(text)
+            run.bold = bold
+            run.font.name = 'Times New Roman'
+            run.font.size = Pt(12)
         
-        for line in lines:
-            line = line.strip()
+        # Render the blocks that follow the title
+        past_title = document.title is None
+        for block in document:
+            if not past_title:
+                past_title = block.kind == 'title'
+                continue
             
-            if not line:
+            if block.kind == 'blank':
                 # Empty line
                 doc.add_paragraph('')
                 continue
@@ -544,45 +724,29 @@ def create_word_document(formatted_text, title, output_path, document_type="worl
             # Create paragraph
             p = doc.add_paragraph()
             
-            # Check if this is a speaker name (ends with colon)
-            if re.match(r'^[A-Za-z\s\(\)]+:$', line):
-                # Speaker name - make it bold
-                run = p.add_run(line)
-                run.bold = True
-                run.font.name = 'Times New Roman'
-                run.font.size = Pt(12)
-                
-            # Check if this is a section header (starts with number and period)
-            elif re.match(r'^\d+\.\s+.+', line):
+            if block.kind == 'speaker' and not block.spans:
+                # Speaker name on its own line - make it bold
+                add_run(p, block.label, bold=True)
+            
+            elif block.kind == 'heading':
                 # Section header - make it bold
-                run = p.add_run(line)
-                run.bold = True
-                run.font.name = 'Times New Roman'
-                run.font.size = Pt(12)
-                
+                add_run(p, f"{block.number}. {block.text}", bold=True)
+            
+            elif block.kind == 'divider':
+                add_run(p, block.text)
+            
+            elif block.kind == 'lyrics':
+                for i, line in enumerate(block.lines):
+                    if i:
+                        p = doc.add_paragraph()
+                    add_run(p, line)
+            
             else:
-                # Regular content - process for Scripture references and special formatting
-                # Split by Scripture references pattern (Book Chapter:Verse)
-                scripture_pattern = r'(\b(?:Genesis|Exodus|Leviticus|Numbers|Deuteronomy|Joshua|Judges|Ruth|1 Samuel|2 Samuel|1 Kings|2 Kings|1 Chronicles|2 Chronicles|Ezra|Nehemiah|Esther|Job|Psalm|Psalms|Proverbs|Ecclesiastes|Song of Songs|Isaiah|Jeremiah|Lamentations|Ezekiel|Daniel|Hosea|Joel|Amos|Obadiah|Jonah|Micah|Nahum|Habakkuk|Zephaniah|Haggai|Zechariah|Malachi|Matthew|Mark|Luke|John|Acts|Romans|1 Corinthians|2 Corinthians|Galatians|Ephesians|Philippians|Colossians|1 Thessalonians|2 Thessalonians|1 Timothy|2 Timothy|Titus|Philemon|Hebrews|James|1 Peter|2 Peter|1 John|2 John|3 John|Jude|Revelation)\s+\d+:\d+(?:--\d+)?)\b'
-                
-                parts = re.split(scripture_pattern, line)
-                
-                for part in parts:
-                    if not part:
-                        continue
-                    
-                    # Check if this part is a Scripture reference
-                    if re.match(scripture_pattern, part):
-                        # Scripture reference - make it bold
-                        run = p.add_run(part)
-                        run.bold = True
-                        run.font.name = 'Times New Roman'
-                        run.font.size = Pt(12)
-                    else:
-                        # Regular text
-                        run = p.add_run(part)
-                        run.font.name = 'Times New Roman'
-                        run.font.size = Pt(12)
+                # Regular content - Scripture references in bold
+                if block.kind == 'speaker':
+                    add_run(p, block.label + ' ')
+                for part in block.spans:
+                    add_run(p, part.text, bold=part.bold or part.scripture)
         
         # Add footer only for World Impact documents
         if document_type == "world_impact":
@@ -612,7 +776,8 @@ def create_word_document(formatted_text, title, output_path, document_type="worl
         # No Creative Commons license - will be added later if needed
         
         # Save document
-        doc.save(output_path)
+        with span('save', document_type):
+            doc.save(output_path)
         logger.info(f"Word document saved successfully: {output_path}")
         
     except ImportError:
@@ -620,13 +785,170 @@ def create_word_document(formatted_text, title, output_path, document_type="worl
         # Fallback to text file if python-docx not available
         with open(output_path.replace('.docx', '.txt'), 'w', encoding='utf-8') as f:
             f.write(f"Title: {title}\n\n")
-            f.write(formatted_text)
+            f.write(formatted_text if isinstance(formatted_text, str) else render_markup(formatted_text))
 
 @app.route('/')
 def index():
     """Main page with upload form."""
     return render_template('index.html')
 
+class UploadError(Exception):
+    """A processing step failed; the message is returned to the client as is."""
+
+def process_upload(file, filename, document_type, formats, mode='rewrite', episode=None, cancel=None):
+    """
+    Save, extract, format and export one uploaded transcript.
+    
+    Args:
+        file: The uploaded FileStorage
+        filename: Its secured filename
+        document_type: 'world_impact' or 'meeting'
+        formats: Output formats, docx first (see requested_formats)
+        mode: 'rewrite' (Claude returns text) or 'structured' (Claude
+            returns the document model, validated before export)
+        episode: Matches earlier uploads of the same transcript; defaults
+            to the file name. With TRANSCRIPT_CHUNK_CACHE set, a rewrite
+            only sends the parts changed since the last upload
+        cancel: Optional CancelToken that stops the formatting
+    
+    Returns:
+        The JSON result for the client
+    
+    Raises:
+        UploadError: If saving, reading or formatting fails
+        Cancelled: If ``cancel`` fired before the transcript was formatted
+    """
+    try:
+        # A path of its own: concurrent uploads with the same file name must not share one
+        fd, upload_path = tempfile.mkstemp(suffix=Path(filename).suffix, dir=UPLOAD_FOLDER)
+        os.close(fd)
+    except OSError as e:
+        logger.error(f"File save failed: {e}")
+        raise UploadError(f'File save failed: {str(e)}')
+    try:
+        # Save uploaded file
+        logger.info(f"Saving file to: {upload_path}")
+        try:
+            file.save(upload_path)
+            logger.info("File saved successfully")
+        except Exception as save_error:
+            logger.error(f"File save failed: {save_error}")
+            raise UploadError(f'File save failed: {str(save_error)}')
+        
+        # Read file content (.txt with encoding fallback, .docx streamed from its XML)
+        logger.info("Reading file content")
+        try:
+            with span('extract', document_type, filename=filename):
+                content = extract_text(upload_path)
+            logger.info(f"File content length: {len(content)} characters")
+        except (OSError, ValueError) as read_error:
+            logger.error(f"File read failed: {read_error}")
+            raise UploadError(f'File read failed: {str(read_error)}')
+        
+        # Format the transcript using AI
+        logger.info("Starting AI formatting")
+        try:
+            route = choose_route(len(content), document_type, 'web')
+            cache_path = cache_path_if_enabled()
+            if mode == 'structured':
+                formatted_text = format_structured_inline(content, document_type, route, cancel)
+            elif cache_path and document_type != 'meeting':
+                # Meetings are summarized as a whole, so they are not cached by chunk
+                formatted_text = format_incremental_inline(
+                    content, episode or Path(filename).stem, cache_path, document_type, route, cancel)
+            else:
+                formatted_text = format_with_claude_inline(content, document_type, route, cancel)
+            formatter_used = f"Claude ({route.model})"
+            logger.info("AI formatting completed successfully")
+        except Cancelled:
+            raise
+        except Exception as e:
+            logger.error(f"AI formatting failed: {str(e)}")
+            logger.error(f"AI formatting traceback: {traceback.format_exc()}")
+            raise UploadError(f'AI formatting failed: {str(e)}')
+        
+        # Create output filename
+        # Suffixed with a fresh id: it names this upload for /reexport, and
+        # uploads with the same file name must not share outputs
+        base_name = Path(filename).stem
+        suffix = 'meeting_summary' if document_type == 'meeting' else 'formatted'
+        output_filename = f"{base_name}_{suffix}_{uuid.uuid4().hex[:12]}.docx"
+        output_path = os.path.join(OUTPUT_FOLDER, output_filename)
+        
+        title = base_name.replace('_', ' ').replace('-', ' ')
+        output_files = export_outputs(formatted_text, title, output_path, document_type, formats)
+        
+        # Keep the full formatted text so /reexport can re-render without Claude
+        try:
+            save_formatted(os.path.splitext(output_path)[0], formatted_text, title=title,
+                           document_type=document_type, title_from_first_line=True)
+        except OSError as e:
+            logger.warning(f"Could not save formatted text for re-export: {str(e)}")
+        
+        logger.info("Upload processing completed successfully")
+        if not isinstance(formatted_text, str):
+            formatted_text = render_markup(formatted_text)
+        return {
+            'success': True,
+            'id': Path(output_filename).stem,
+            'filename': output_filename,
+            'files': output_files,
+            'formatter': formatter_used,
+            'preview': formatted_text[:500] + '...' if len(formatted_text) > 500 else formatted_text
+        }
+    finally:
+        # Clean up uploaded file
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+
+def export_outputs(formatted_text, title, output_path, document_type, formats):
+    """
+    Render the Word document and any extra formats, and index the document.
+    
+    Args:
+        formatted_text: Claude's formatted text or a TranscriptDocument
+        title: Document title
+        output_path: The .docx path in OUTPUT_FOLDER; other formats share its base name
+        document_type: 'world_impact' or 'meeting'
+        formats: Output formats, docx first (see requested_formats)
+    
+    Returns:
+        Mapping of format to output filename
+    """
+    logger.info(f"Creating Word document: {output_path}")
+    create_word_document(formatted_text, title, output_path, document_type)
+    output_files = {'docx': os.path.basename(output_path)}
+    
+    # Keep the search index current when TRANSCRIPT_INDEX is set
+    try:
+        if index_if_enabled(output_path, formatted_text, title_from_first_line=True):
+            logger.info(f"Indexed {output_files['docx']} for search")
+    except Exception as e:
+        logger.warning(f"Search indexing failed: {str(e)}")
+    
+    # Render any extra formats from the same formatting result
+    extra_formats = formats[1:]
+    if extra_formats:
+        logger.info(f"Exporting extra formats: {', '.join(extra_formats)}")
+        with span('export', document_type, formats=extra_formats):
+            exported = export_formats(formatted_text, os.path.splitext(output_path)[0],
+                                      extra_formats, title_from_first_line=True)
+        for fmt, path in exported.items():
+            output_files[fmt] = os.path.basename(path)
+    return output_files
+
+def busy_response(rejected):
+    """503 with a Retry-After estimate for an upload the admission controller turned away."""
+    logger.warning(f"Upload rejected: {rejected}")
+    ADMISSION_REJECTED.inc(())
+    response = jsonify({'success': False, 'error': str(rejected), 'retry_after': rejected.retry_after})
+    response.headers['Retry-After'] = str(rejected.retry_after)
+    return response, 503
+
+def outputs_exist(result):
+    """True while every file of a finished upload is still in OUTPUT_FOLDER."""
+    return all(os.path.exists(os.path.join(OUTPUT_FOLDER, name)) for name in result['files'].values())
+
 @app.route('/upload', methods=['POST', 'OPTIONS'])
 def upload_file():
     """Handle file upload and processing."""
@@ -638,6 +960,12 @@ def upload_file():
         response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
         return response
     
+    # Turn uploads away before reading the body when this worker is already full
+    try:
+        admission.check(request.content_length or 0)
+    except Rejected as e:
+        return busy_response(e)
+    
     try:
         logger.info("=== UPLOAD REQUEST START ===")
         logger.info(f"Request method: {request.method}")
@@ -659,99 +987,119 @@ def upload_file():
             logger.warning("Empty filename")
             return jsonify({'success': False, 'error': 'No file selected'}), 400
         
+        # Profiling (?profile=1 or a 'profile' form field) is for admins only
+        profile_flag = request.args.get('profile') or request.form.get('profile', '')
+        profile_requested = profile_flag.lower() in ('1', 'true', 'on')
+        if profile_requested and not is_admin_request():
+            return jsonify({'success': False, 'error': 'Profiling requires a valid X-Admin-Token header'}), 403
+        
         if file and allowed_file(file.filename):
-            upload_path = None
+            profiler = None
             try:
-                # Save uploaded file
                 logger.info("=== FILE PROCESSING START ===")
                 filename = secure_filename(file.filename)
-                upload_path = os.path.join(UPLOAD_FOLDER, filename)
-                logger.info(f"Saving file to: {upload_path}")
                 
-                try:
-                    file.save(upload_path)
-                    logger.info("File saved successfully")
-                except Exception as save_error:
-                    logger.error(f"File save failed: {save_error}")
-                    response = jsonify({'success': False, 'error': f'File save failed: {str(save_error)}'})
-                    response.headers['Content-Type'] = 'application/json'
-                    return response, 500
-                
-                # Read file content
-                logger.info("Reading file content")
-                try:
-                    with open(upload_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    logger.info(f"File content length: {len(content)} characters")
-                except Exception as read_error:
-                    logger.error(f"File read failed: {read_error}")
-                    # Try different encodings
-                    try:
-                        with open(upload_path, 'r', encoding='latin-1') as f:
-                            content = f.read()
-                        logger.info(f"File read with latin-1 encoding, length: {len(content)} characters")
-                    except Exception as read_error2:
-                        logger.error(f"File read failed with latin-1: {read_error2}")
-                        if upload_path and os.path.exists(upload_path):
-                            os.remove(upload_path)
-                        response = jsonify({'success': False, 'error': f'File read failed: {str(read_error)}'})
-                        response.headers['Content-Type'] = 'application/json'
-                        return response, 500
-                
-                # Get document type from request
+                # Get document type and export formats from request
                 document_type = request.form.get('document_type', 'world_impact')
-                logger.info(f"Document type: {document_type}")
+                formats = requested_formats(request.form.get('formats'))
+                mode = request.form.get('mode', 'rewrite')
+                episode = request.form.get('episode') or None
+                if mode not in ('rewrite', 'structured'):
+                    return jsonify({'success': False, 'error': f'Unknown formatting mode: {mode}'}), 400
+                # A job id chosen by the client lets it cancel before the response arrives
+                job_id = request.form.get('job_id') or request.headers.get('X-Job-Id') or uuid.uuid4().hex
+                if not valid_job_id(job_id):
+                    return jsonify({'success': False, 'error': 'Invalid job id'}), 400
+                logger.info(f"Document type: {document_type}, mode: {mode}, job: {job_id}")
                 
-                # Format the transcript using AI
-                logger.info("Starting AI formatting")
-                try:
-                    formatted_text = format_with_claude_inline(content, document_type)
-                    formatter_used = 'Claude Sonnet 4.5'
-                    logger.info("AI formatting completed successfully")
-                except Exception as e:
-                    logger.error(f"AI formatting failed: {str(e)}")
-                    logger.error(f"AI formatting traceback: {traceback.format_exc()}")
-                    # Clean up uploaded file on error
-                    if upload_path and os.path.exists(upload_path):
-                        os.remove(upload_path)
-                    response = jsonify({'success': False, 'error': f'AI formatting failed: {str(e)}'})
-                    response.headers['Content-Type'] = 'application/json'
-                    return response, 500
+                data = file.read()
+                file.seek(0)
                 
-                # Create output filename
-                base_name = Path(filename).stem
-                if document_type == 'meeting':
-                    output_filename = f"{base_name}_meeting_summary.docx"
-                else:
-                    output_filename = f"{base_name}_formatted.docx"
-                output_path = os.path.join(OUTPUT_FOLDER, output_filename)
-                logger.info(f"Creating Word document: {output_path}")
+                # Scheduling cost: the route's estimate from length, model and document type
+                cost = choose_route(len(data), document_type, 'web').estimated_seconds
+                client = client_id()
                 
-                # Create Word document
-                title = base_name.replace('_', ' ').replace('-', ' ')
-                create_word_document(formatted_text, title, output_path, document_type)
-                
-                # Clean up uploaded file
-                if upload_path and os.path.exists(upload_path):
-                    os.remove(upload_path)
+                # Cancelled when the client disconnects or calls /api/jobs/<id>/cancel;
+                # the admission ticket and scheduler slot are released on the way out
+                with active_jobs.track(job_id, request_socket(request.environ)) as cancel:
+                    def admitted_upload():
+                        # Rejected here (by the request that would do the work)
+                        # also rejects identical uploads waiting on it
+                        with admission.admit(len(data)):
+                            with scheduler.slot(cost, client, cancel) as waited:
+                                # Queue wait and processing are reported separately
+                                record('queue_wait', waited, document_type_label(document_type),
+                                       estimated_seconds=cost)
+                                with span('process', document_type, estimated_seconds=cost):
+                                    return process_upload(file, filename, document_type, formats, mode,
+                                                          episode, cancel)
+                    
+                    # Profile from saving the upload through export
+                    if profile_requested:
+                        profile_name = f"{Path(filename).stem}-{time.strftime('%Y%m%d-%H%M%S')}.prof"
+                        profiler = Profiler(os.path.join(PROFILE_FOLDER, profile_name))
+                        try:
+                            profiler.start()
+                        except RuntimeError as busy:
+                            profiler = None
+                            return jsonify({'success': False, 'error': str(busy)}), 409
+                        result = admitted_upload()
+                    else:
+                        # Identical uploads already being formatted share that run's result; the
+                        # file name and episode shape the outputs and chunk cache, so they count too
+                        key = flight_key(data, filename, episode or '', document_type, ','.join(formats), mode)
+                        while True:
+                            try:
+                                result, shared = upload_flights.run(key, admitted_upload, valid=outputs_exist)
+                                break
+                            except Cancelled:
+                                if cancel.cancelled:
+                                    raise
+                                # The upload this one joined was cancelled by its own client
+                                logger.info("Identical upload in progress was cancelled; formatting this one")
+                        if shared:
+                            logger.info(f"Joined an identical upload in progress: {result['filename']}")
+                            result = dict(result, coalesced=True)
+                    result = dict(result, job_id=job_id)
                 
-                logger.info("Upload processing completed successfully")
-                response = jsonify({
-                    'success': True,
-                    'filename': output_filename,
-                    'formatter': formatter_used,
-                    'preview': formatted_text[:500] + '...' if len(formatted_text) > 500 else formatted_text
-                })
+                if profiler:
+                    report = profiler.stop()
+                    logger.info(f"Profile written to {report['prof_path']}")
+                    result['profile'] = {
+                        'file': os.path.basename(report['prof_path']),
+                        'wall_seconds': report['wall_seconds'],
+                        'cpu_seconds': report['cpu_seconds'],
+                        'wait_seconds': report['wait_seconds'],
+                        'network_seconds': report['network_seconds'],
+                        'summary': report['summary'],
+                    }
+                response = jsonify(result)
                 response.headers['Content-Type'] = 'application/json'
                 return response
                 
+            except Rejected as e:
+                return busy_response(e)
+            except JobAlreadyRunning as e:
+                # Checked when the job is tracked, so two requests racing for an id get one 409
+                return jsonify({'success': False, 'error': str(e)}), 409
+            except Cancelled as e:
+                UPLOADS_CANCELLED.inc((e.reason,))
+                logger.info(f"Upload {job_id} stopped: {e.reason}")
+                return jsonify({'success': False, 'cancelled': True, 'job_id': job_id,
+                                'error': f'Upload cancelled ({e.reason})'}), 409
+            except UploadError as e:
+                response = jsonify({'success': False, 'error': str(e)})
+                response.headers['Content-Type'] = 'application/json'
+                return response, 500
             except Exception as e:
                 logger.error(f"Processing error: {str(e)}")
                 logger.error(f"Processing traceback: {traceback.format_exc()}")
-                # Clean up uploaded file on any error
-                if upload_path and os.path.exists(upload_path):
-                    os.remove(upload_path)
                 return jsonify({'success': False, 'error': f'Processing failed: {str(e)}'}), 500
+            finally:
+                # Failed runs are profiled too; the files show where they spent their time
+                if profiler and profiler.running:
+                    report = profiler.stop()
+                    logger.info(f"Profile of failed upload written to {report['prof_path']}")
         
         logger.warning(f"Invalid file type: {file.filename}")
         return jsonify({'success': False, 'error': 'Invalid file type. Please upload .txt or .docx files.'}), 400
@@ -762,6 +1110,57 @@ def upload_file():
         # Catch all unhandled exceptions and return JSON
         return jsonify({'success': False, 'error': f'Server error: {str(e)}'}), 500
 
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Stop an upload in progress; its Claude stream is closed and its slot freed."""
+    if not valid_job_id(job_id):
+        return jsonify({'success': False, 'error': 'Invalid job id'}), 400
+    outcome = active_jobs.cancel(job_id)
+    if outcome is None:
+        return jsonify({'success': False, 'error': f'No upload {job_id} in progress'}), 404
+    # 'requested': another worker is running it and stops within a second
+    return jsonify({'success': True, 'job_id': job_id, 'status': outcome}), 200 if outcome == 'cancelled' else 202
+
+@app.route('/reexport/<export_id>', methods=['POST'])
+def reexport(export_id):
+    """Re-render an earlier upload from its saved formatted text, without calling Claude.
+    
+    export_id is the 'id' returned by /upload. Optional form fields:
+    'formats' (as for /upload), 'document_type' and 'title'; both default
+    to the values the upload was rendered with.
+    """
+    if secure_filename(export_id) != export_id:
+        return jsonify({'success': False, 'error': 'Invalid id'}), 400
+    output_path = os.path.join(OUTPUT_FOLDER, f"{export_id}.docx")
+    try:
+        formatted_text, options = load_formatted(formatted_path_for(os.path.splitext(output_path)[0]))
+    except FileNotFoundError:
+        return jsonify({'success': False, 'error': 'No saved formatted text for this id'}), 404
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not read saved formatted text for {export_id}: {str(e)}")
+        return jsonify({'success': False, 'error': f'Re-export failed: {str(e)}'}), 500
+    
+    document_type = request.form.get('document_type') or options.get('document_type', 'world_impact')
+    title = request.form.get('title') or options.get('title') or export_id
+    formats = requested_formats(request.form.get('formats'))
+    started = time.perf_counter()
+    try:
+        with span('reexport', document_type, formats=formats):
+            output_files = export_outputs(ensure_document(formatted_text, title_from_first_line=True),
+                                          title, output_path, document_type, formats)
+    except Exception as e:
+        logger.error(f"Re-export failed: {str(e)}")
+        logger.error(f"Re-export traceback: {traceback.format_exc()}")
+        return jsonify({'success': False, 'error': f'Re-export failed: {str(e)}'}), 500
+    
+    return jsonify({
+        'success': True,
+        'id': export_id,
+        'filename': output_files['docx'],
+        'files': output_files,
+        'render_ms': round((time.perf_counter() - started) * 1000, 1),
+    })
+
 @app.route('/download/<filename>')
 def download_file(filename):
     """Download processed file."""
@@ -774,6 +1173,55 @@ def download_file(filename):
     except Exception as e:
         return jsonify({'success': False, 'error': f'Download failed: {str(e)}'}), 500
 
+@app.route('/api/search')
+def search_transcripts():
+    """Search the formatted transcript index (q, speaker, scripture, heading, limit)."""
+    index_path = default_index_path()
+    if not os.path.exists(index_path):
+        return jsonify({'success': False, 'error': 'Search index not found'}), 404
+    
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be a number'}), 400
+    
+    started = time.perf_counter()
+    try:
+        with TranscriptIndex(index_path) as index:
+            results = index.search(
+                request.args.get('q'),
+                speaker=request.args.get('speaker'),
+                scripture=request.args.get('scripture'),
+                heading=request.args.get('heading'),
+                limit=limit,
+            )
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    output_dir = os.path.abspath(OUTPUT_FOLDER)
+    for result in results:
+        path = result.pop('path')
+        result['filename'] = os.path.basename(path)
+        # Documents produced by this app can be downloaded again
+        if os.path.dirname(path) == output_dir:
+            result['download_url'] = url_for('download_file', filename=result['filename'])
+    
+    return jsonify({
+        'success': True,
+        'results': results,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2),
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Per-stage timing histograms in the Prometheus text format."""
+    return render_prometheus(), 200, {'Content-Type': PROMETHEUS_CONTENT_TYPE}
+
+@app.route('/api/queue')
+def queue_status():
+    """This worker's admission load, limits and scheduler queue, for autoscalers."""
+    return jsonify(dict(admission.stats(), scheduler=scheduler.stats()))
+
 @app.route('/health')
 def health_check():
     """Health check endpoint."""
@@ -11,6 +11,8 @@ from pathlib import Path
 from flask import Flask, render_template, request, send_file, flash, redirect, url_for, jsonify
 from werkzeug.utils import secure_filename
 
+from transcript_formatter.core.extractor import extract_text
+
 # Try to import CORS
 try:
     from flask_cors import CORS
@@ -253,16 +255,7 @@ def upload_file():
                 file.save(upload_path)
                 
                 # Extract text content
-                if filename.lower().endswith('.txt'):
-                    with open(upload_path, 'r', encoding='utf-8') as f:
-                        transcript_text = f.read()
-                elif filename.lower().endswith('.docx'):
-                    try:
-                        from docx import Document
-                        doc = Document(upload_path)
-                        transcript_text = '\n'.join([para.text for para in doc.paragraphs])
-                    except ImportError:
-                        return jsonify({'success': False, 'error': 'DOCX support not available'}), 500
+                transcript_text = extract_text(upload_path)
                 
                 # Format with Claude (with fallback)
                 formatted_text, model_used = format_with_claude_fallback(transcript_text)
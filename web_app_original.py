@@ -12,6 +12,8 @@ from flask import Flask, render_template, request, send_file, flash, redirect, u
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 
+from transcript_formatter.core.extractor import extract_text
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -267,26 +269,18 @@ def upload_file():
                     response.headers['Content-Type'] = 'application/json'
                     return response, 500
                 
-                # Read file content
+                # Read file content (.txt with encoding fallback, .docx streamed from its XML)
                 logger.info("Reading file content")
                 try:
-                    with open(upload_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
+                    content = extract_text(upload_path)
                     logger.info(f"File content length: {len(content)} characters")
-                except Exception as read_error:
+                except (OSError, ValueError) as read_error:
                     logger.error(f"File read failed: {read_error}")
-                    # Try different encodings
-                    try:
-                        with open(upload_path, 'r', encoding='latin-1') as f:
-                            content = f.read()
-                        logger.info(f"File read with latin-1 encoding, length: {len(content)} characters")
-                    except Exception as read_error2:
-                        logger.error(f"File read failed with latin-1: {read_error2}")
-                        if upload_path and os.path.exists(upload_path):
-                            os.remove(upload_path)
-                        response = jsonify({'success': False, 'error': f'File read failed: {str(read_error)}'})
-                        response.headers['Content-Type'] = 'application/json'
-                        return response, 500
+                    if upload_path and os.path.exists(upload_path):
+                        os.remove(upload_path)
+                    response = jsonify({'success': False, 'error': f'File read failed: {str(read_error)}'})
+                    response.headers['Content-Type'] = 'application/json'
+                    return response, 500
                 
                 # Format the transcript using AI
                 logger.info("Starting AI formatting")
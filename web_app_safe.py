@@ -11,6 +11,9 @@ from pathlib import Path
 from flask import Flask, render_template, request, send_file, flash, redirect, url_for, jsonify
 from werkzeug.utils import secure_filename
 
+from transcript_formatter.core.document import parse_document
+from transcript_formatter.core.extractor import extract_text
+
 # Try to import CORS, but don't fail if not available
 try:
     from flask_cors import CORS
@@ -218,35 +221,28 @@ def export_to_word(formatted_text, title, output_path):
         title_paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
         
         # Process the formatted text
-        paragraphs = formatted_text.split('\n\n')
+        document = parse_document(formatted_text)
         
-        for para_text in paragraphs:
-            if not para_text.strip():
+        for block in document:
+            if block.kind == 'blank':
                 continue
             
             p = doc.add_paragraph()
             
-            # Process the paragraph text for formatting
-            import re
-            
-            # Pattern to match bold text and italic text
-            parts = re.split(r'(\*\*[^*]+\*\*|\*[^*]+\*)', para_text)
-            
-            for part in parts:
-                if not part:
-                    continue
-                
-                if part.startswith('**') and part.endswith('**'):
-                    # Bold text
-                    run = p.add_run(part[2:-2])
-                    run.bold = True
-                elif part.startswith('*') and part.endswith('*'):
-                    # Italic text
-                    run = p.add_run(part[1:-1])
-                    run.italic = True
-                else:
-                    # Normal text
-                    p.add_run(part)
+            if block.kind == 'lyrics':
+                # Song lyrics in italics
+                p.add_run('\n'.join(block.lines)).italic = True
+            elif block.kind == 'divider':
+                p.add_run(block.text)
+            else:
+                if block.kind == 'speaker':
+                    p.add_run(block.label + ' ').bold = True
+                elif block.kind == 'heading':
+                    p.add_run(f"{block.number}. ")
+                for span in block.spans:
+                    run = p.add_run(span.text)
+                    run.bold = span.bold
+                    run.italic = span.italic
             
             # Set font for the entire paragraph
             for run in p.runs:
@@ -295,16 +291,7 @@ def upload_file():
                 file.save(upload_path)
                 
                 # Extract text content
-                if filename.lower().endswith('.txt'):
-                    with open(upload_path, 'r', encoding='utf-8') as f:
-                        transcript_text = f.read()
-                elif filename.lower().endswith('.docx'):
-                    try:
-                        from docx import Document
-                        doc = Document(upload_path)
-                        transcript_text = '\n'.join([para.text for para in doc.paragraphs])
-                    except ImportError:
-                        return jsonify({'success': False, 'error': 'DOCX support not available'}), 500
+                transcript_text = extract_text(upload_path)
                 
                 # Format with Claude
                 formatted_text = format_with_claude_inline(transcript_text)